@@ -0,0 +1,390 @@
+"""Headless HTTP API in front of the story engine.
+
+Run with:
+
+    uvicorn api.app:app --workers 4
+
+    POST   /generate          story parameters -> finished story as JSON
+    POST   /generate/stream   same body -> Server-Sent Events while the story streams
+    GET    /stories           saved stories; filter, sort and page, or search with q=
+    GET    /stories/{id}      one saved story including its text
+    DELETE /stories/{id}
+    GET    /export            saved stories streamed as format=jsonl|zip|markdown|epub, optionally filtered
+    GET    /analytics         library analytics plus generation, cache, scheduler, body store, index cache and upstream stats
+    POST   /analytics         metrics for a single {"story": ...}
+    GET    /metrics           upstream latency/error histograms and breaker state for Prometheus
+
+Generation bodies take the same fields as the sidebar (user_prompt, theme,
+length, tone, pov, creativity_level, complexity, ...) plus optional
+"use_cache" and "save" flags, a "latency_budget" in seconds that the
+model router tries to meet, and "chapters": false to write a Long story
+in one call, or a section count to write any length as an outline plus
+that many chapters (more chapters, longer story). Clients can send
+X-Session-Id so the scheduler shares capacity fairly between them.
+"""
+import contextlib
+import json
+import threading
+import time
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from config.settings import AppSettings
+from core.ai_client import create_groq_client
+from core.async_engine import AsyncStoryEngine
+from core.batch import DEFAULT_PARAMS, GRID_OPTIONS
+from core.cache import GenerationCache
+from core.metrics import metrics_recorder, call_stats
+from core.prompt_builder import PromptBuilder
+from core.token_budget import token_budget
+from core.resilience import CircuitBreaker, CircuitOpenError, circuit_breakers, get_status_code, get_retry_after
+from utils.blob_store import blob_store
+from utils.corpus_analytics import CorpusAnalytics
+from utils.export import EXPORT_FORMATS, select_story_ids, stream_export
+from utils.helper import ValidationHelpers
+from utils.story_backends import (
+    StoryBackend, InMemoryStoryBackend, SQLiteStoryBackend, SORT_OPTIONS, build_story_record
+)
+from utils.session_indexes import session_indexes
+from utils.text_analyzer import analyze_text
+
+MAX_PAGE_SIZE = 100
+
+class ApiError(Exception):
+    def __init__(self, status_code: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.headers = headers
+
+def upstream_error(error: Exception) -> ApiError:
+    retry_after = get_retry_after(error)
+    headers = {'Retry-After': str(int(retry_after + 0.999))} if retry_after is not None else None
+    if isinstance(error, CircuitOpenError):
+        return ApiError(503, str(error), headers)
+    if get_status_code(error) == 429:
+        return ApiError(429, "Model provider is rate limiting requests", headers)
+    return ApiError(502, f"Error generating story: {error}")
+
+def create_story_backend() -> StoryBackend:
+    if AppSettings.STORAGE_BACKEND == "sqlite":
+        return SQLiteStoryBackend(AppSettings.STORAGE_PATH)
+    # Without sessions the in-memory store is shared by every client of this process
+    return InMemoryStoryBackend()
+
+class StoryService:
+    """State shared by every request: engine, prompt builder, store and analytics"""
+
+    def __init__(self, client, backend: Optional[StoryBackend] = None,
+                 cache: Optional[GenerationCache] = None):
+        self.cache = cache
+        self.engine = AsyncStoryEngine(client, cache=cache)
+        self.prompt_builder = PromptBuilder()
+        self.backend = backend or create_story_backend()
+        self.analytics = CorpusAnalytics()
+        # SQLite serialises its own writers; the in-memory store needs a lock across threads
+        self._backend_lock = contextlib.nullcontext() if isinstance(self.backend, SQLiteStoryBackend) else threading.Lock()
+        self._analytics_lock = threading.Lock()
+
+    async def storage(self, method: str, *args, **kwargs):
+        """Run a backend call on the thread pool so disk I/O never blocks the event loop"""
+        def call():
+            with self._backend_lock:
+                return getattr(self.backend, method)(*args, **kwargs)
+        return await run_in_threadpool(call)
+
+    async def export(self, fmt: str, theme: Optional[str], favorites_only: bool) -> Iterator[bytes]:
+        """Chunks of an export; stories are read a batch at a time as the response is sent"""
+        def select():
+            with self._backend_lock:
+                return select_story_ids(self.backend, theme, favorites_only)
+        story_ids = await run_in_threadpool(select)
+        return stream_export(self.backend, fmt, story_ids, lock=self._backend_lock)
+
+    async def prepare(self, request: Request) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
+        """Validate a generation body into (params, master prompt, options)"""
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            raise ApiError(400, "Request body must be JSON")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+
+        options = {}
+        for name in ('use_cache', 'save'):
+            # bool() would read the string "false" as true
+            value = body.pop(name, False)
+            if not isinstance(value, bool):
+                raise ApiError(422, f"{name} must be true or false")
+            options[name] = value
+        latency_budget = body.pop('latency_budget', None)
+        if latency_budget is not None:
+            try:
+                latency_budget = float(latency_budget)
+            except (TypeError, ValueError):
+                raise ApiError(422, "latency_budget must be a number of seconds")
+            if latency_budget <= 0:
+                raise ApiError(422, "latency_budget must be positive")
+        options['latency_budget'] = latency_budget
+        chapters = body.pop('chapters', None)
+        if isinstance(chapters, bool):
+            # true keeps the length's default; only Long stories are chaptered by default
+            options['sections'] = None if chapters else 1
+        elif chapters is None or (isinstance(chapters, int) and 2 <= chapters <= AppSettings.CHAPTER_MAX_SECTIONS):
+            options['sections'] = chapters
+        else:
+            raise ApiError(422, f"chapters must be true, false or a section count from 2 to {AppSettings.CHAPTER_MAX_SECTIONS}")
+        params = {**DEFAULT_PARAMS, **body}
+        for name in ('user_prompt', *GRID_OPTIONS):
+            if not isinstance(params.get(name), str):
+                raise ApiError(422, f"{name} must be a string")
+        try:
+            params['creativity_level'] = float(params['creativity_level'])
+        except (TypeError, ValueError):
+            raise ApiError(422, "creativity_level must be a number")
+
+        is_valid, message = ValidationHelpers.validate_story_prompt(params.get('user_prompt', ''))
+        if is_valid:
+            is_valid, message = ValidationHelpers.validate_story_parameters(params)
+        if not is_valid:
+            raise ApiError(422, message)
+        for name, allowed in GRID_OPTIONS.items():
+            if params[name] not in allowed:
+                raise ApiError(422, f"{name} must be one of: {', '.join(allowed)}")
+        try:
+            prompt = self.prompt_builder.build_master_prompt(params)
+        except KeyError as e:
+            raise ApiError(422, f"Unknown option: {e}")
+        return params, prompt, options
+
+    def _save(self, story: str, params: Dict[str, Any], analytics_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Same duplicate policy as StoryStorage.save_story
+        duplicates = []
+        with self._backend_lock:
+            if AppSettings.DUPLICATE_POLICY != "off":
+                duplicates = self.backend.find_near_duplicates(story, AppSettings.DUPLICATE_THRESHOLD)
+                if duplicates and AppSettings.DUPLICATE_POLICY == "skip":
+                    return {'story_id': duplicates[0][0], 'saved': False, 'duplicate': True}
+            story_id = self.backend.add_story(build_story_record(params, analytics_data), story)
+        return {
+            'story_id': story_id,
+            'saved': True,
+            'near_duplicates': [{'story_id': other, 'similarity': score} for other, score in duplicates]
+        }
+
+    async def save(self, story: str, params: Dict[str, Any], analytics_data: Dict[str, Any]) -> Dict[str, Any]:
+        return await run_in_threadpool(self._save, story, params, analytics_data)
+
+    def _library_analytics(self) -> Dict[str, Any]:
+        with self._analytics_lock:
+            with self._backend_lock:
+                self.analytics.refresh(self.backend)
+            return {
+                'summary': self.analytics.summary(),
+                'word_count_histograms': self.analytics.word_count_histograms(),
+                'readability_by_tone': self.analytics.readability_by_tone(),
+                'dialogue_vs_creativity': self.analytics.dialogue_vs_creativity()
+            }
+
+    async def library_analytics(self) -> Dict[str, Any]:
+        return await run_in_threadpool(self._library_analytics)
+
+def session_id(request: Request) -> str:
+    return request.headers.get('x-session-id') or (request.client.host if request.client else "anonymous")
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def generate(request: Request) -> JSONResponse:
+    service: StoryService = request.app.state.service
+    params, prompt, options = await service.prepare(request)
+    started = time.perf_counter()
+    try:
+        story = await service.engine.generate_story(
+            prompt, params['creativity_level'], session_id=session_id(request), use_cache=options['use_cache'],
+            length=params['length'], latency_budget=options['latency_budget'], sections=options['sections']
+        )
+    except Exception as e:
+        raise upstream_error(e)
+
+    analytics_data = analyze_text(story)
+    result = {
+        'story': story,
+        'params': params,
+        'analytics': analytics_data,
+        'elapsed': round(time.perf_counter() - started, 3)
+    }
+    if options['save']:
+        result['saved'] = await service.save(story, params, analytics_data)
+    return JSONResponse(result)
+
+async def generate_stream(request: Request) -> StreamingResponse:
+    service: StoryService = request.app.state.service
+    params, prompt, options = await service.prepare(request)
+    client_session = session_id(request)
+
+    async def events():
+        parts = []
+        try:
+            async for event, data in service.engine.stream_events(
+                prompt, params['creativity_level'], session_id=client_session, use_cache=options['use_cache'],
+                length=params['length'], latency_budget=options['latency_budget'], sections=options['sections']
+            ):
+                if event == 'chunk':
+                    parts.append(data['text'])
+                yield sse_event(event, data)
+        except Exception as e:
+            error = upstream_error(e)
+            yield sse_event('error', {'status': error.status_code, 'message': error.message})
+            return
+
+        story = ''.join(parts)
+        analytics_data = analyze_text(story)
+        result = {'params': params, 'analytics': analytics_data}
+        if options['save']:
+            result['saved'] = await service.save(story, params, analytics_data)
+        yield sse_event('result', result)
+
+    # X-Accel-Buffering stops nginx-style proxies from holding the stream back
+    return StreamingResponse(events(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def int_param(request: Request, name: str, default: int, minimum: int = 0, maximum: Optional[int] = None) -> int:
+    raw = request.query_params.get(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise ApiError(400, f"{name} must be between {minimum} and {maximum}")
+    return value
+
+async def list_stories(request: Request) -> JSONResponse:
+    service: StoryService = request.app.state.service
+    query = request.query_params
+    theme = query.get('theme') or None
+    favorites_only = query.get('favorites', '').lower() in ('1', 'true', 'yes')
+    limit = int_param(request, 'limit', AppSettings.SAVED_STORIES_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+
+    if query.get('q'):
+        stories = await service.storage('search_stories', query['q'], theme=theme,
+                                        favorites_only=favorites_only, limit=limit)
+        return JSONResponse({'query': query['q'], 'stories': stories})
+
+    sort_by = query.get('sort', 'Recent')
+    if sort_by not in SORT_OPTIONS:
+        raise ApiError(400, f"sort must be one of: {', '.join(SORT_OPTIONS)}")
+    offset = int_param(request, 'offset', 0)
+    total = await service.storage('count_stories', theme=theme, favorites_only=favorites_only)
+    stories = await service.storage('list_stories', theme=theme, favorites_only=favorites_only,
+                                    sort_by=sort_by, offset=offset, limit=limit)
+    return JSONResponse({'total': total, 'offset': offset, 'limit': limit, 'stories': stories})
+
+async def get_story(request: Request) -> JSONResponse:
+    service: StoryService = request.app.state.service
+    story_id = request.path_params['story_id']
+    record = await service.storage('get_story', story_id)
+    if record is None:
+        raise ApiError(404, f"Story {story_id} not found")
+    record['story'] = await service.storage('get_story_body', story_id)
+    return JSONResponse(record)
+
+async def delete_story(request: Request) -> JSONResponse:
+    service: StoryService = request.app.state.service
+    story_id = request.path_params['story_id']
+    if await service.storage('get_story', story_id) is None:
+        raise ApiError(404, f"Story {story_id} not found")
+    await service.storage('delete_story', story_id)
+    return JSONResponse({'deleted': story_id})
+
+async def export_stories(request: Request) -> StreamingResponse:
+    service: StoryService = request.app.state.service
+    query = request.query_params
+    fmt = query.get('format', 'jsonl')
+    if fmt not in EXPORT_FORMATS:
+        raise ApiError(400, f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    favorites_only = query.get('favorites', '').lower() in ('1', 'true', 'yes')
+    chunks = await service.export(fmt, query.get('theme') or None, favorites_only)
+    writer = EXPORT_FORMATS[fmt]
+    return StreamingResponse(chunks, media_type=writer.mime_type, headers={
+        'Content-Disposition': f'attachment; filename="stories.{writer.extension}"'
+    })
+
+async def library_analytics(request: Request) -> JSONResponse:
+    service: StoryService = request.app.state.service
+    return JSONResponse({
+        'library': await service.library_analytics(),
+        'generation': metrics_recorder.summary(),
+        'models': metrics_recorder.summary_by_model(),
+        'length_budget': token_budget.report(),
+        'scheduler': service.engine.scheduler.stats(),
+        'cache': service.cache.stats() if service.cache else None,
+        'blob_store': blob_store.stats(),
+        'session_indexes': session_indexes.stats(),
+        'upstream': {
+            'models': call_stats.summary(),
+            'circuit_breakers': {name: breaker.to_dict() for name, breaker in circuit_breakers().items()}
+        }
+    })
+
+BREAKER_STATE_VALUES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    lines = [
+        "# HELP story_circuit_breaker_state 0 closed, 1 half-open, 2 open",
+        "# TYPE story_circuit_breaker_state gauge"
+    ]
+    for name, breaker in sorted(circuit_breakers().items()):
+        lines.append(f'story_circuit_breaker_state{{model="{name}"}} {BREAKER_STATE_VALUES[breaker.state]}')
+    return PlainTextResponse(call_stats.to_prometheus() + "\n".join(lines) + "\n",
+                             media_type='text/plain; version=0.0.4')
+
+async def story_analytics(request: Request) -> JSONResponse:
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise ApiError(400, "Request body must be JSON")
+    story = body.get('story') if isinstance(body, dict) else None
+    if not isinstance(story, str):
+        raise ApiError(422, "Body must be an object with a \"story\" string")
+    return JSONResponse(analyze_text(story))
+
+async def handle_api_error(request: Request, error: ApiError) -> JSONResponse:
+    return JSONResponse({'error': error.message}, status_code=error.status_code, headers=error.headers)
+
+def create_app(client=None, backend: Optional[StoryBackend] = None) -> Starlette:
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        cache = GenerationCache(
+            max_entries=AppSettings.CACHE_MAX_ENTRIES,
+            disk_path=AppSettings.CACHE_DISK_PATH,
+            ttl_seconds=AppSettings.CACHE_TTL_SECONDS,
+            max_disk_bytes=AppSettings.CACHE_MAX_DISK_MB * 1024 * 1024
+        )
+        story_client = client or create_groq_client()
+        if story_client is None:
+            raise RuntimeError("GROQ_API_KEY is not set")
+        app.state.service = StoryService(story_client, backend, cache)
+        yield
+
+    routes = [
+        Route('/generate', generate, methods=['POST']),
+        Route('/generate/stream', generate_stream, methods=['POST']),
+        Route('/stories', list_stories, methods=['GET']),
+        Route('/stories/{story_id:int}', get_story, methods=['GET']),
+        Route('/stories/{story_id:int}', delete_story, methods=['DELETE']),
+        Route('/export', export_stories, methods=['GET']),
+        Route('/analytics', library_analytics, methods=['GET']),
+        Route('/analytics', story_analytics, methods=['POST']),
+        Route('/metrics', prometheus_metrics, methods=['GET'])
+    ]
+    return Starlette(routes=routes, lifespan=lifespan, exception_handlers={ApiError: handle_api_error})
+
+app = create_app()
@@ -0,0 +1,50 @@
+"""Headless bulk story generation.
+
+Each input line is a JSON object with a user_prompt plus any story
+parameters (theme, length, tone, pov, creativity_level, complexity).
+An optional "grid" maps parameter names to lists of values, or "*" for
+every option the UI offers, and expands into one job per combination:
+
+    {"id": "lighthouse", "user_prompt": "A keeper counts ships that never come", "grid": {"theme": "*", "tone": "*"}}
+
+Results are appended to the output JSONL as each job finishes. Re-running
+with the same output file skips jobs that already succeeded.
+"""
+import argparse
+import sys
+
+from core.ai_client import create_groq_client
+from core.batch import run_batch
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate stories in bulk from a JSONL file")
+    parser.add_argument('input', help="JSONL file of job specs")
+    parser.add_argument('output', help="JSONL file results are appended to")
+    parser.add_argument('--parallelism', type=int, default=4, help="Concurrent requests (default: 4)")
+    parser.add_argument('--max-retries', type=int, default=5, help="Retries per job on 429/5xx (default: 5)")
+    parser.add_argument('--no-resume', action='store_true', help="Overwrite the output instead of skipping finished jobs")
+    args = parser.parse_args()
+    
+    client = create_groq_client()
+    if not client:
+        sys.exit("GROQ_API_KEY is not set")
+    
+    def report(result):
+        status = "✓" if result['status'] == 'ok' else "✗"
+        print(f"{status} {result['id']} ({result.get('elapsed', 0):.1f}s)", flush=True)
+    
+    summary = run_batch(
+        client, args.input, args.output,
+        parallelism=args.parallelism,
+        max_retries=args.max_retries,
+        resume=not args.no_resume,
+        on_result=report
+    )
+    print(
+        f"\n{summary['ok']} ok, {summary['failed']} failed, {summary['skipped']} skipped, "
+        f"{summary['retries']} retries in {summary['elapsed']:.1f}s "
+        f"({summary['jobs_per_minute']:.1f} jobs/min)"
+    )
+
+if __name__ == "__main__":
+    main()
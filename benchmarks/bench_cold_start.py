@@ -0,0 +1,78 @@
+"""Cold start of the Streamlit app: fresh interpreter to first rendered page.
+
+Each run starts a new Python process, imports main and executes main()
+once in Streamlit's bare mode, which is what a freshly scheduled pod pays
+on its first page load. Two paths are measured: no API key (only the
+key-entry form) and a configured key (the full generation page).
+Exits non-zero when a path goes over its budget. Run from the repository root:
+    python -m benchmarks.bench_cold_start
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, Any, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.main()
+finished = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_run_ms': (finished - imported) * 1000,
+    'total_ms': (finished - started) * 1000,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': len(sys.modules),
+    'groq_loaded': 'groq' in sys.modules,
+    'numpy_loaded': 'numpy' in sys.modules
+}))
+"""
+
+def cold_start(api_key: Optional[str]) -> Dict[str, Any]:
+    env = {k: v for k, v in os.environ.items() if k != "GROQ_API_KEY"}
+    if api_key:
+        # Building the client never contacts the API, so any value will do
+        env["GROQ_API_KEY"] = api_key
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD], cwd=ROOT, env=env,
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help="Best of N fresh processes")
+    parser.add_argument('--no-key-budget-ms', type=float, default=800.0)
+    parser.add_argument('--budget-ms', type=float, default=1500.0)
+    args = parser.parse_args()
+
+    failures = []
+    for label, api_key, budget in (
+        ("no API key", None, args.no_key_budget_ms),
+        ("with API key", "cold-start-benchmark", args.budget_ms)
+    ):
+        best = min((cold_start(api_key) for _ in range(args.runs)), key=lambda r: r['total_ms'])
+        print(f"{label}:")
+        print(f"  import main:     {best['import_ms']:8.1f} ms")
+        print(f"  first run:       {best['first_run_ms']:8.1f} ms")
+        print(f"  total:           {best['total_ms']:8.1f} ms (budget {budget:.0f} ms)")
+        print(f"  peak RSS:        {best['rss_mb']:8.1f} MB")
+        print(f"  modules:         {best['modules']:8d} (groq {'yes' if best['groq_loaded'] else 'no'}, "
+              f"numpy {'yes' if best['numpy_loaded'] else 'no'})")
+        if best['total_ms'] > budget:
+            failures.append(f"{label} took {best['total_ms']:.0f} ms, over the {budget:.0f} ms budget")
+
+    if failures:
+        sys.exit("FAIL: " + "; ".join(failures))
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Cold import time of the headless engine, checked against a fixed budget.
+
+Exits non-zero when the import goes over budget or pulls in Streamlit, so
+it can guard CI. Run from the repository root:
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --module api.app --budget-ms 400
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# UI-only packages the headless layer must never import
+FORBIDDEN = ("streamlit",)
+
+def import_profile(module: str) -> List[Tuple[str, int, int]]:
+    """(name, self µs, cumulative µs) for every module a fresh interpreter imports"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(result.stderr.strip().splitlines()[-1])
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return entries
+
+def cumulative_ms(entries: List[Tuple[str, int, int]], module: str) -> float:
+    for name, _, cumulative in entries:
+        if name.strip() == module:
+            return cumulative / 1000
+    return 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default="core.story_engine")
+    parser.add_argument('--budget-ms', type=float, default=150.0)
+    parser.add_argument('--runs', type=int, default=5, help="Best of N fresh interpreters")
+    args = parser.parse_args()
+
+    profiles = [import_profile(args.module) for _ in range(args.runs)]
+    best = min(profiles, key=lambda entries: cumulative_ms(entries, args.module))
+    total = cumulative_ms(best, args.module)
+
+    top_level: Dict[str, int] = {}
+    for name, self_us, _ in best:
+        package = name.strip().split(".")[0]
+        top_level[package] = top_level.get(package, 0) + self_us
+    forbidden = sorted(name for name in top_level if name in FORBIDDEN)
+
+    print(f"import {args.module}: {total:8.1f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    print(f"modules loaded:        {len(best):8d}")
+    print("heaviest packages:")
+    for package, self_us in sorted(top_level.items(), key=lambda item: -item[1])[:8]:
+        print(f"  {package:<24}{self_us / 1000:8.1f} ms")
+
+    failures = []
+    if total > args.budget_ms:
+        failures.append(f"import took {total:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    if forbidden:
+        failures.append(f"imports UI packages: {', '.join(forbidden)}")
+    if failures:
+        sys.exit("FAIL: " + "; ".join(failures))
+    print("OK")
+
+if __name__ == "__main__":
+    main()
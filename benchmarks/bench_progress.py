@@ -0,0 +1,53 @@
+"""End-to-end latency of generate_with_progress before and after removing the timed steps.
+
+Run from the repository root:
+    python -m benchmarks.bench_progress
+"""
+import argparse
+import time
+from typing import Optional
+
+from benchmarks.fake_client import make_fake_client
+from core.story_engine import StoryEngine
+
+def legacy_generate_with_progress(engine: StoryEngine, prompt: str, creativity_level: float) -> Optional[str]:
+    # Replica of the previous implementation: three 0.5s sleeps around a blocking call
+    time.sleep(0.5)
+    time.sleep(0.5)
+    story = engine.generate_story(prompt, creativity_level)
+    time.sleep(0.5)
+    return story
+
+def _time(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return sum(timings) / len(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.2, help="Simulated time to first token (s)")
+    parser.add_argument('--tokens-per-second', type=float, default=500.0)
+    args = parser.parse_args()
+    
+    engine = StoryEngine(make_fake_client(
+        first_token_latency=args.latency,
+        tokens_per_second=args.tokens_per_second
+    ))
+    events = []
+    
+    legacy = _time(lambda: legacy_generate_with_progress(engine, "prompt", 0.7), args.runs)
+    current = _time(lambda: engine.generate_with_progress(
+        "prompt", 0.7, on_progress=lambda event, data: events.append(event)
+    ), args.runs)
+    
+    print(f"legacy (sleep-based):  {legacy * 1000:8.1f} ms")
+    print(f"event-driven progress: {current * 1000:8.1f} ms")
+    print(f"saved per story:       {(legacy - current) * 1000:8.1f} ms")
+    print(f"progress events per story: {len(events) // args.runs}")
+
+if __name__ == "__main__":
+    main()
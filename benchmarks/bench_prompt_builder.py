@@ -0,0 +1,58 @@
+"""Prompts/sec for PromptBuilder with and without the precomputed prompt table.
+
+Run from the repository root:
+    python -m benchmarks.bench_prompt_builder
+"""
+import argparse
+import itertools
+import time
+
+from config.settings import AppSettings
+from core.prompt_builder import PromptBuilder, CREATIVITY_BUCKETS
+from data.examples import get_example_prompts
+
+def _param_grid():
+    examples = get_example_prompts()
+    for theme, tone, pov, length, creativity_level in itertools.product(
+        AppSettings.GENRES, AppSettings.TONES, AppSettings.POV_OPTIONS,
+        AppSettings.WORD_TARGETS, CREATIVITY_BUCKETS.values()
+    ):
+        yield {
+            'user_prompt': examples[theme],
+            'theme': theme,
+            'tone': tone,
+            'pov': pov,
+            'length': length,
+            'creativity_level': creativity_level
+        }
+
+def _rate(build, params_list, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for params in params_list:
+            build(params)
+    return rounds * len(params_list) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+    
+    params_list = list(_param_grid())
+    
+    # Both paths must produce byte-identical prompts for every combination
+    builder = PromptBuilder()
+    for params in params_list:
+        assert builder.build_master_prompt(params) == builder.compose_master_prompt(params)
+    
+    # "Before" also pays for a fresh builder per call, as handle_story_generation did
+    before = _rate(lambda p: PromptBuilder().compose_master_prompt(p), params_list, args.rounds)
+    after = _rate(lambda p: PromptBuilder().build_master_prompt(p), params_list, args.rounds)
+    
+    print(f"combinations:           {len(params_list)}")
+    print(f"composed per call:      {before:12,.0f} prompts/s")
+    print(f"precomputed table:      {after:12,.0f} prompts/s")
+    print(f"speedup:                {after / before:12.1f}x")
+
+if __name__ == "__main__":
+    main()
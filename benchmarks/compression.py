@@ -0,0 +1,129 @@
+"""Compression ratio and throughput per genre for story bodies.
+
+Compares zlib, plain zstd and zstd with a per-genre trained dictionary
+(what the story stores use). Each genre's dictionary is trained on its
+first --train stories and measured on the rest, the way the stores train on
+recent bodies and apply the dictionary to new ones. Also times a body read
+through the LRU against a cold decompression.
+
+The default corpus is synthetic: sentences drawn from the sample story and
+each genre's sensory vocabulary in config/prompts.py. Pass --db to measure
+a real SQLite library instead. Run from the repository root:
+    python -m benchmarks.compression
+    python -m benchmarks.compression --db stories.db --json compression.json
+"""
+import argparse
+import json
+import random
+import time
+import zlib
+from typing import Dict, Any, Callable, List
+
+from benchmarks.fake_client import SAMPLE_STORY
+from config.prompts import PromptTemplates
+from config.settings import AppSettings
+from utils.compression import BodyCache, StoryCodec
+from utils.story_backends import SQLiteStoryBackend
+
+def genre_story(genre: str, words: int, rng: random.Random) -> str:
+    phrases = [phrase.strip() for phrase in PromptTemplates.SENSORY_DETAILS[genre].split(',')]
+    vocabulary = SAMPLE_STORY.split() + ' '.join(phrases).split()
+    sentences = []
+    while words > 0:
+        sentence = [rng.choice(vocabulary) for _ in range(rng.randint(6, 18))]
+        if rng.random() < 0.3:
+            sentence.insert(rng.randint(0, len(sentence)), rng.choice(phrases))
+        text = ' '.join(sentence)
+        sentences.append(text[0].upper() + text[1:].rstrip('.!?"') + '.')
+        words -= len(text.split())
+    paragraphs = [' '.join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)]
+    return '\n\n'.join(paragraphs)
+
+def synthetic_corpus(stories: int, seed: int) -> Dict[str, List[str]]:
+    rng = random.Random(seed)
+    estimates = list(AppSettings.WORD_ESTIMATES.values())
+    return {
+        genre: [genre_story(genre, rng.choice(estimates), rng) for _ in range(stories)]
+        for genre in AppSettings.GENRES
+    }
+
+def library_corpus(path: str) -> Dict[str, List[str]]:
+    backend = SQLiteStoryBackend(path)
+    corpus: Dict[str, List[str]] = {}
+    for record in reversed(backend.list_stories()):
+        body = backend.get_story_body(record['id'])
+        if body:
+            corpus.setdefault(record['theme'], []).append(body)
+    return corpus
+
+def timed(operation: Callable[[Any], Any], items: List[Any]) -> float:
+    """Seconds to run operation over every item"""
+    started = time.perf_counter()
+    for item in items:
+        operation(item)
+    return time.perf_counter() - started
+
+def measure_genre(genre: str, bodies: List[str], train: int) -> Dict[str, Any]:
+    training, test = bodies[:train], bodies[train:]
+    raw = sum(len(body.encode('utf-8')) for body in test)
+    plain = StoryCodec()
+    codec = StoryCodec()
+    started = time.perf_counter()
+    trained = codec.train(genre, training)
+    training_ms = (time.perf_counter() - started) * 1000
+
+    frames = [codec.compress(body, genre) for body in test]
+    cache = BodyCache(max_entries=len(frames))
+    for index, frame in enumerate(frames):
+        cache.put(index, codec.decompress(frame))
+    compress_seconds = timed(lambda body: codec.compress(body, genre), test)
+    decompress_seconds = timed(codec.decompress, frames)
+    cached_seconds = timed(cache.get, list(range(len(frames))))
+
+    return {
+        'stories': len(bodies),
+        'test_bytes': raw,
+        'dictionary': trained is not None,
+        'training_ms': round(training_ms, 1),
+        'ratio': {
+            'zlib': raw / sum(len(zlib.compress(body.encode('utf-8'), 6)) for body in test),
+            'zstd': raw / sum(len(plain.compress(body)) for body in test),
+            'zstd_dictionary': raw / sum(len(frame) for frame in frames)
+        },
+        'compress_mb_s': raw / compress_seconds / 1e6,
+        'decompress_mb_s': raw / decompress_seconds / 1e6,
+        'cold_read_us': decompress_seconds / len(frames) * 1e6,
+        'cached_read_us': cached_seconds / len(frames) * 1e6
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help="Measure the stories in this SQLite library instead of a synthetic corpus")
+    parser.add_argument('--stories', type=int, default=400, help="Synthetic stories per genre")
+    parser.add_argument('--train', type=int, default=AppSettings.COMPRESSION_TRAINING_SAMPLES,
+                        help="Stories per genre the dictionary is trained on")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--json', help="Also write the report to this file")
+    args = parser.parse_args()
+
+    corpus = library_corpus(args.db) if args.db else synthetic_corpus(args.stories, args.seed)
+    report = {}
+    print(f"{'genre':<20}{'stories':>8}{'zlib':>7}{'zstd':>7}{'+dict':>7}{'comp MB/s':>11}"
+          f"{'decomp MB/s':>13}{'cold µs':>9}{'cached µs':>11}")
+    for genre, bodies in corpus.items():
+        # Keep at least a quarter of a small library for measuring
+        train = min(args.train, len(bodies) * 3 // 4)
+        if len(bodies) - train < 1:
+            continue
+        result = report[genre] = measure_genre(genre, bodies, train)
+        ratio = result['ratio']
+        print(f"{genre:<20}{result['stories']:>8}{ratio['zlib']:>6.2f}x{ratio['zstd']:>6.2f}x"
+              f"{ratio['zstd_dictionary']:>6.2f}x{result['compress_mb_s']:>11.0f}{result['decompress_mb_s']:>13.0f}"
+              f"{result['cold_read_us']:>9.1f}{result['cached_read_us']:>11.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import time
+from types import SimpleNamespace
+from typing import Iterator
+
+SAMPLE_STORY = (
+    "The lighthouse keeper counted the ships every night, though none had passed in years. "
+    "\"They'll come back,\" she told the gulls, and the gulls said nothing.\n\n"
+    "When the fog rolled in on the tenth of November, she ran down the spiral stairs "
+    "and walked out onto the rocks with a lantern held high. Something moved in the grey. "
+    "A hull, old and patient, was turning toward the light!\n\n"
+)
+
+class FakeCompletions:
+    """Stand-in for client.chat.completions that mimics Groq response shapes"""
+    
+    def __init__(self, story: str, first_token_latency: float, tokens_per_second: float):
+        self.story = story
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.calls = 0
+    
+    def _tokens(self):
+        return [word + ' ' for word in self.story.split(' ')]
+    
+    def _stream(self, tokens) -> Iterator[SimpleNamespace]:
+        time.sleep(self.first_token_latency)
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second else 0
+        for token in tokens:
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=token), finish_reason=None)],
+                x_groq=None
+            )
+            if delay:
+                time.sleep(delay)
+        yield SimpleNamespace(
+            choices=[],
+            x_groq=SimpleNamespace(usage=SimpleNamespace(completion_tokens=len(tokens)))
+        )
+    
+    def create(self, **kwargs):
+        self.calls += 1
+        tokens = self._tokens()
+        if kwargs.get('stream'):
+            return self._stream(tokens)
+        
+        time.sleep(self.first_token_latency)
+        if self.tokens_per_second:
+            time.sleep(len(tokens) / self.tokens_per_second)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=''.join(tokens)), finish_reason='stop')],
+            usage=SimpleNamespace(completion_tokens=len(tokens))
+        )
+
+def make_fake_client(story: str = SAMPLE_STORY, first_token_latency: float = 0.2,
+                     tokens_per_second: float = 0.0) -> SimpleNamespace:
+    completions = FakeCompletions(story, first_token_latency, tokens_per_second)
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
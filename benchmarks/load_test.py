@@ -0,0 +1,205 @@
+"""Load test: N concurrent simulated users generating stories against the mock Groq server.
+
+Each user is a thread with its own session state (saved-story backend and
+story history), running the same path as the app: build the master prompt,
+stream the story through StoryEngine (routing, retries, breaker, token
+budget), analyse it while it streams and save it. Reports throughput,
+latency percentiles and the memory each session retains.
+
+Starts a mock server in a child process unless --base-url points at one. Run from
+the repository root:
+    python -m benchmarks.load_test --users 20 --stories 5
+    python -m benchmarks.load_test --users 50 --error-rate 0.05 --error-status 429 --json load.json
+"""
+import argparse
+import json
+import random
+import resource
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Any, List, Optional
+
+from benchmarks.mock_groq import MockServer, add_config_arguments, config_from_args
+from config.settings import AppSettings
+from core.ai_client import create_groq_client
+from core.batch import DEFAULT_PARAMS, GRID_OPTIONS
+from core.metrics import call_stats
+from core.prompt_builder import PromptBuilder
+from core.resilience import circuit_breakers
+from core.story_engine import StoryEngine
+from utils.blob_store import blob_store
+from utils.memory import retained_size
+from utils.session_indexes import session_indexes
+from utils.story_backends import InMemoryStoryBackend, build_story_record
+from utils.text_analyzer import StreamingTextAnalyzer
+
+PROMPTS = [
+    "A lighthouse keeper counts ships that never come",
+    "Two rival bakers discover they share the same secret recipe",
+    "A detective who can hear the last thought of every object",
+    "The last library on a generation ship starts rewriting its books"
+]
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class SimulatedSession:
+    """What one browser session holds between reruns, minus the widgets"""
+
+    def __init__(self, user_id: int, client, seed: int):
+        self.user_id = user_id
+        self.engine = StoryEngine(client)
+        self.prompt_builder = PromptBuilder()
+        self.backend = InMemoryStoryBackend()
+        self.story_history = deque(maxlen=AppSettings.STORY_HISTORY_LIMIT)
+        self.rng = random.Random(seed * 1000 + user_id)
+
+    def story_params(self) -> Dict[str, Any]:
+        params = {name: self.rng.choice(options) for name, options in GRID_OPTIONS.items()}
+        return {**DEFAULT_PARAMS, **params, 'user_prompt': self.rng.choice(PROMPTS)}
+
+    def generate(self) -> Dict[str, Any]:
+        params = self.story_params()
+        started = time.perf_counter()
+        first_token = {}
+
+        def on_progress(event: str, data: Dict[str, Any]):
+            if event == 'first_token':
+                first_token['at'] = time.perf_counter()
+
+        prompt = self.prompt_builder.build_master_prompt(params)
+        analyzer = StreamingTextAnalyzer()
+        parts = []
+        try:
+            for chunk in self.engine.iter_story(prompt, params['creativity_level'], on_progress,
+                                                use_cache=False, length=params['length']):
+                analyzer.feed(chunk)
+                parts.append(chunk)
+        except Exception as e:
+            return {'status': 'error', 'error': type(e).__name__, 'total': time.perf_counter() - started}
+
+        story = ''.join(parts)
+        analytics_data = analyzer.snapshot()
+        story_id = self.backend.add_story(build_story_record(params, analytics_data), story)
+        self.story_history.append({'action': 'saved', 'story_id': story_id, 'timestamp': time.time()})
+        metrics = self.engine.last_metrics
+        return {
+            'status': 'ok',
+            'model': metrics.model,
+            'time_to_first_token': first_token['at'] - started if 'at' in first_token else None,
+            'total': time.perf_counter() - started,
+            'tokens': metrics.token_count,
+            'words': analytics_data['word_count']
+        }
+
+def run_users(client, users: int, stories: int, think_time: float, seed: int) -> Dict[str, Any]:
+    sessions = [SimulatedSession(user_id, client, seed) for user_id in range(users)]
+    results: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+    start_together = threading.Barrier(users)
+
+    def user(session: SimulatedSession):
+        start_together.wait()
+        for index in range(stories):
+            result = session.generate()
+            with lock:
+                results.append(result)
+            if think_time and index < stories - 1:
+                time.sleep(session.rng.uniform(0, 2 * think_time))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(user, sessions))
+    elapsed = time.perf_counter() - started
+    return {'sessions': sessions, 'results': results, 'elapsed': elapsed}
+
+def session_memory(sessions: List[SimulatedSession], client) -> float:
+    """Average bytes a session keeps alive; the client, router, body store and index cache are shared by every session"""
+    if not sessions:
+        return 0.0
+    shared = {id(client), id(sessions[0].engine.router), id(blob_store), id(session_indexes)}
+    return sum(retained_size(session, shared) for session in sessions) / len(sessions)
+
+def summarize(run: Dict[str, Any], users: int) -> Dict[str, Any]:
+    results = run['results']
+    ok = [r for r in results if r['status'] == 'ok']
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r['status'] != 'ok':
+            errors[r['error']] = errors.get(r['error'], 0) + 1
+    ttfts = [r['time_to_first_token'] for r in ok if r['time_to_first_token'] is not None]
+    totals = [r['total'] for r in ok]
+    models: Dict[str, int] = {}
+    for r in ok:
+        models[r['model']] = models.get(r['model'], 0) + 1
+    elapsed = run['elapsed']
+    return {
+        'users': users,
+        'stories': len(ok),
+        'failed': len(results) - len(ok),
+        'errors': errors,
+        'elapsed': round(elapsed, 3),
+        'stories_per_minute': round(len(ok) / elapsed * 60, 2) if elapsed else 0.0,
+        'tokens_per_second': round(sum(r['tokens'] for r in ok) / elapsed, 1) if elapsed else 0.0,
+        'time_to_first_token': {f"p{int(q * 100)}": percentile(ttfts, q) for q in (0.5, 0.95, 0.99)},
+        'latency': {f"p{int(q * 100)}": percentile(totals, q) for q in (0.5, 0.95, 0.99)},
+        'models': models
+    }
+
+def _ms(value: Optional[float]) -> str:
+    return f"{value * 1000:8.0f} ms" if value is not None else "       n/a"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10, help="Concurrent simulated sessions")
+    parser.add_argument('--stories', type=int, default=3, help="Stories each user generates")
+    parser.add_argument('--think-time', type=float, default=0.0, help="Mean pause between a user's stories (s)")
+    parser.add_argument('--base-url', help="Use a running mock server instead of starting one")
+    parser.add_argument('--json', help="Also write the report to this file")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockServer(config_from_args(args)) if not args.base_url else nullcontext()
+    with server:
+        base_url = args.base_url or server.url
+        client = create_groq_client(api_key="mock", base_url=base_url)
+        run = run_users(client, args.users, args.stories, args.think_time, args.seed)
+        report = summarize(run, args.users)
+        report['upstream'] = call_stats.summary()
+        report['circuit_breakers'] = {name: b.to_dict() for name, b in circuit_breakers().items()}
+        if not args.base_url:
+            report['mock'] = server.stats()
+    report['memory_per_session_kb'] = round(session_memory(run['sessions'], client) / 1024, 1)
+    report['blob_store'] = blob_store.stats()
+    report['session_indexes'] = session_indexes.stats()
+    report['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    print(f"{report['users']} users, {report['stories']} stories, {report['failed']} failed in {report['elapsed']:.1f}s")
+    print(f"  throughput:        {report['stories_per_minute']:8.1f} stories/min, {report['tokens_per_second']:.0f} tokens/s")
+    for label, key in (("first token", 'time_to_first_token'), ("full story", 'latency')):
+        values = report[key]
+        print(f"  {label + ':':<18} p50 {_ms(values['p50'])}  p95 {_ms(values['p95'])}  p99 {_ms(values['p99'])}")
+    print(f"  memory/session:    {report['memory_per_session_kb']:8.1f} KB")
+    blobs = report['blob_store']
+    print(f"  shared bodies:     {blobs['stored_bytes'] / 1024:8.1f} KB for {blobs['blobs']} stories "
+          f"({blobs['compression_ratio'] or 0:.1f}x compressed)")
+    indexes = report['session_indexes']
+    print(f"  shared indexes:    {indexes['entries']:8d} built of {indexes['max_entries']}, "
+          f"{indexes['builds']} builds, {indexes['evictions']} evictions")
+    print(f"  peak RSS:          {report['peak_rss_mb']:8.1f} MB")
+    print(f"  models:            {report['models']}")
+    if report['errors']:
+        print(f"  errors:            {report['errors']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
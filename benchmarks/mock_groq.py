@@ -0,0 +1,220 @@
+"""Local stand-in for the Groq chat-completions endpoint.
+
+Serves POST /openai/v1/chat/completions in the shapes the groq SDK parses,
+streamed (Server-Sent Events ending in [DONE], usage under x_groq) or not.
+Stories are deterministic: the text depends only on the request messages,
+its length follows the prompt's TARGET LENGTH and is capped by max_tokens,
+so the same load test always generates the same words. Injected errors
+follow a seeded sequence and 429s carry Retry-After.
+
+Point the app at it with GROQ_BASE_URL (any GROQ_API_KEY will do):
+    python -m benchmarks.mock_groq --port 8089 --error-rate 0.05
+    GROQ_BASE_URL=http://127.0.0.1:8089 GROQ_API_KEY=mock streamlit run main.py
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from benchmarks.fake_client import SAMPLE_STORY
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Completion tokens reported per generated word
+TOKENS_PER_WORD = 1.3
+_VOCABULARY = SAMPLE_STORY.split()
+
+@dataclass
+class MockConfig:
+    first_token_latency: float = 0.2
+    tokens_per_second: float = 500.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    retry_after: float = 1.0
+    seed: int = 0
+
+class MockGroq:
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self._errors = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'streamed': 0, 'errors': 0, 'tokens': 0}
+
+    def story_words(self, body: Dict[str, Any]) -> List[str]:
+        prompt = "\n".join(str(m.get('content', '')) for m in body.get('messages', []))
+        rng = random.Random(hashlib.sha256(prompt.encode('utf-8')).hexdigest())
+        match = re.search(r'TARGET LENGTH:\s*(\d+)-(\d+)', prompt)
+        count = rng.randint(int(match.group(1)), int(match.group(2))) if match else 300
+        return [rng.choice(_VOCABULARY) for _ in range(count)]
+
+    def inject_error(self) -> Optional[JSONResponse]:
+        with self._lock:
+            self.stats['requests'] += 1
+            failed = self._errors.random() < self.config.error_rate
+            if failed:
+                self.stats['errors'] += 1
+        if not failed:
+            return None
+        status = self.config.error_status
+        headers = {'retry-after': f"{self.config.retry_after:g}"} if status == 429 else None
+        body = {'error': {'message': f"Injected mock error {status}", 'type': 'mock_error'}}
+        return JSONResponse(body, status_code=status, headers=headers)
+
+    async def completions(self, request: Request):
+        body = await request.json()
+        error = self.inject_error()
+        if error is not None:
+            return error
+
+        words = self.story_words(body)
+        budget = int(body.get('max_tokens') or 4096)
+        finish_reason = 'stop'
+        if len(words) * TOKENS_PER_WORD > budget:
+            words = words[:int(budget / TOKENS_PER_WORD)]
+            finish_reason = 'length'
+        completion_tokens = round(len(words) * TOKENS_PER_WORD)
+        with self._lock:
+            self.stats['tokens'] += completion_tokens
+
+        completion_id = f"chatcmpl-mock-{self.stats['requests']}"
+        model = body.get('model', 'mock')
+        usage = {'prompt_tokens': 0, 'completion_tokens': completion_tokens, 'total_tokens': completion_tokens}
+        delay = 1.0 / self.config.tokens_per_second if self.config.tokens_per_second else 0.0
+
+        if not body.get('stream'):
+            await asyncio.sleep(self.config.first_token_latency + len(words) * delay)
+            return JSONResponse({
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': ' '.join(words)},
+                    'finish_reason': finish_reason
+                }],
+                'usage': usage
+            })
+
+        with self._lock:
+            self.stats['streamed'] += 1
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None, extra: Optional[Dict[str, Any]] = None) -> str:
+            payload = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish}],
+                **(extra or {})
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            await asyncio.sleep(self.config.first_token_latency)
+            yield chunk({'role': 'assistant', 'content': ''})
+            for index, word in enumerate(words):
+                yield chunk({'content': word if index == 0 else ' ' + word})
+                if delay:
+                    await asyncio.sleep(delay)
+            yield chunk({}, finish_reason, {'x_groq': {'id': completion_id, 'usage': usage}})
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type='text/event-stream')
+
+    async def mock_stats(self, request: Request) -> JSONResponse:
+        with self._lock:
+            return JSONResponse(dict(self.stats))
+
+def create_mock_app(config: Optional[MockConfig] = None) -> Starlette:
+    mock = MockGroq(config or MockConfig())
+    app = Starlette(routes=[
+        Route('/openai/v1/chat/completions', mock.completions, methods=['POST']),
+        Route('/mock/stats', mock.mock_stats, methods=['GET'])
+    ])
+    app.state.mock = mock
+    return app
+
+class MockServer:
+    """Runs the mock in a child process, so its CPU time does not compete with the code under test"""
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1"):
+        self.config = config or MockConfig()
+        self.host = host
+        with socket.socket() as probe:
+            probe.bind((host, 0))
+            self.port = probe.getsockname()[1]
+        self.url = f"http://{host}:{self.port}"
+        self._process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "MockServer":
+        c = self.config
+        self._process = subprocess.Popen([
+            sys.executable, "-m", "benchmarks.mock_groq", "--host", self.host, "--port", str(self.port),
+            "--first-token-latency", str(c.first_token_latency), "--tokens-per-second", str(c.tokens_per_second),
+            "--error-rate", str(c.error_rate), "--error-status", str(c.error_status),
+            "--retry-after", str(c.retry_after), "--seed", str(c.seed)
+        ], cwd=ROOT)
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                with socket.create_connection((self.host, self.port), timeout=0.1):
+                    return self
+            except OSError:
+                if self._process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("mock Groq server did not start")
+                time.sleep(0.05)
+
+    def stats(self) -> Dict[str, int]:
+        with urllib.request.urlopen(f"{self.url}/mock/stats") as response:
+            return json.loads(response.read())
+
+    def __exit__(self, *exc):
+        self._process.terminate()
+        self._process.wait()
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--first-token-latency', type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument('--tokens-per-second', type=float, default=500.0, help="Streaming rate; 0 for instant")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with an error")
+    parser.add_argument('--error-status', type=int, default=503, help="Status code for injected errors")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Retry-After seconds on injected 429s")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the error sequence")
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(
+        first_token_latency=args.first_token_latency,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+
+def main():
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8089)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_mock_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""Benchmark suite for the prompt -> generate -> analyze -> save hot paths.
+
+Every case is timed on fixed, seeded inputs: prompt building over the full
+parameter grid, story analysis and keyword extraction on a Long-sized
+story, save/filter/sort on both storage backends at each library size, and
+the engine (blocking, streaming and cache hit) against the in-process fake
+client. Results are written as JSON and compared with a stored baseline on the
+best round, the figure least disturbed by other load on the machine. A
+case slower than the baseline by more than --tolerance is timed again up to
+--retries times, and fails the run only if it stays slow.
+
+Baselines are machine specific, so record one on the machine that runs the
+comparison. Run from the repository root:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --quick
+    python -m benchmarks.suite --update-baseline
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Any, Iterator, List, Optional
+
+from benchmarks.fake_client import SAMPLE_STORY, make_fake_client
+from config.settings import AppSettings
+from core.cache import GenerationCache
+from core.prompt_builder import PromptBuilder, CREATIVITY_BUCKETS
+from core.story_engine import StoryEngine
+from utils.analytics import StoryAnalytics
+from utils.helper import TextUtils
+from utils.story_backends import InMemoryStoryBackend, SQLiteStoryBackend, SORT_OPTIONS, StoryBackend
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SIZES = (1000, 10000, 100000)
+QUICK_SIZES = (1000, 10000)
+BACKENDS = ("memory", "sqlite")
+SEED = 1234
+
+# A case returns a callable that performs one operation per call
+Case = Callable[[], Callable[[], Any]]
+
+def autorange(operation: Callable[[], Any], min_round: float = 0.05) -> int:
+    """Calls per round so one round takes at least min_round seconds, as timeit does"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        if time.perf_counter() - start >= min_round or number >= 1_000_000:
+            return number
+        number *= 2
+
+def time_case(operation: Callable[[], Any], number: Optional[int], repeat: int) -> Dict[str, Any]:
+    """Median and best per-operation time over repeat rounds of number calls, with GC off like timeit"""
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number = number or autorange(operation)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                operation()
+            timings.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        'median_us': round(statistics.median(timings) * 1e6, 3),
+        'min_us': round(min(timings) * 1e6, 3),
+        'number': number,
+        'repeat': repeat
+    }
+
+def story_text(words: int, rng: random.Random) -> str:
+    vocabulary = SAMPLE_STORY.split()
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(6, 22))
+        sentence = ' '.join(rng.choice(vocabulary) for _ in range(length))
+        sentences.append(sentence.rstrip('.!?"') + '.')
+        words -= length
+    paragraphs = [' '.join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)]
+    return '\n\n'.join(paragraphs)
+
+def param_grid() -> List[Dict[str, Any]]:
+    return [
+        {
+            'user_prompt': "A lighthouse keeper counts ships that never come",
+            'theme': theme, 'tone': tone, 'pov': pov, 'length': length,
+            'creativity_level': creativity_level
+        }
+        for theme, tone, pov, length, creativity_level in itertools.product(
+            AppSettings.GENRES, AppSettings.TONES, AppSettings.POV_OPTIONS,
+            AppSettings.WORD_TARGETS, CREATIVITY_BUCKETS.values()
+        )
+    ]
+
+def cycle(items: List[Any]) -> Callable[[], Any]:
+    iterator = itertools.cycle(items)
+    return lambda: next(iterator)
+
+def text_cases() -> Dict[str, Case]:
+    story = story_text(AppSettings.WORD_ESTIMATES["Long"], random.Random(SEED))
+
+    def prompt_builder():
+        builder = PromptBuilder()
+        next_params = cycle(param_grid())
+        return lambda: builder.build_master_prompt(next_params())
+
+    def analyze_story():
+        analytics = StoryAnalytics()
+        return lambda: analytics.analyze_story(story)
+
+    def extract_keywords():
+        return lambda: TextUtils.extract_keywords(story)
+
+    return {
+        'prompt.build_master_prompt': prompt_builder,
+        'analytics.analyze_story': analyze_story,
+        'text.extract_keywords': extract_keywords
+    }
+
+def engine_cases() -> Dict[str, Case]:
+    prompt = PromptBuilder().build_master_prompt(param_grid()[0])
+
+    def engine(cache: Optional[GenerationCache] = None) -> StoryEngine:
+        return StoryEngine(make_fake_client(first_token_latency=0.0), cache=cache)
+
+    def complete():
+        story_engine = engine()
+        return lambda: story_engine.complete(prompt, 0.7, use_cache=False, length="Medium")
+
+    def stream():
+        story_engine = engine()
+        return lambda: ''.join(story_engine.iter_story(prompt, 0.7, use_cache=False, length="Medium"))
+
+    def cache_hit():
+        story_engine = engine(GenerationCache(max_entries=8))
+        story_engine.complete(prompt, 0.7, length="Medium")
+        return lambda: story_engine.complete(prompt, 0.7, length="Medium")
+
+    return {
+        'engine.complete': complete,
+        'engine.stream': stream,
+        'engine.cache_hit': cache_hit
+    }
+
+def story_records(count: int, rng: random.Random) -> Iterator[Dict[str, Any]]:
+    for index in range(count):
+        yield {
+            'prompt': f"Story idea {index}",
+            'theme': rng.choice(AppSettings.GENRES),
+            'word_count': rng.randint(500, 2600),
+            'settings': f"{rng.choice(list(AppSettings.WORD_TARGETS))}/{rng.choice(AppSettings.TONES)}/First Person",
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(1_700_000_000 + index * 60)),
+            'creativity_level': rng.choice(list(CREATIVITY_BUCKETS.values())),
+            'complexity': "Layered"
+        }
+
+def seed_backend(backend: StoryBackend, size: int):
+    rng = random.Random(SEED + size)
+    for record in story_records(size, rng):
+        story_id = backend.add_story(record, story_text(rng.randint(60, 160), rng))
+        if rng.random() < 0.1:
+            backend.set_favorite(story_id, True)
+
+def storage_cases(backend_name: str, size: int, workdir: str) -> Dict[str, Case]:
+    if backend_name == "sqlite":
+        backend = SQLiteStoryBackend(os.path.join(workdir, f"stories-{size}.db"))
+    else:
+        backend = InMemoryStoryBackend()
+    seed_backend(backend, size)
+    page_size = AppSettings.SAVED_STORIES_PAGE_SIZE
+    prefix = f"storage.{backend_name}.{size}"
+
+    def save():
+        rng = random.Random(SEED)
+        records = list(story_records(200, rng))
+        bodies = [story_text(120, rng) for _ in records]
+        next_story = cycle(list(zip(records, bodies)))
+        return lambda: backend.add_story(*next_story())
+
+    def filter_page():
+        # What the saved-stories panel does per rerun: count for the pager, then one page
+        next_filter = cycle([(theme, favorites) for theme in AppSettings.GENRES for favorites in (False, True)])
+
+        def operation():
+            theme, favorites = next_filter()
+            backend.count_stories(theme=theme, favorites_only=favorites)
+            return backend.list_stories(theme=theme, favorites_only=favorites, limit=page_size)
+        return operation
+
+    def sort_page():
+        # First page and a page halfway through for every sort order
+        next_sort = cycle([(sort_by, offset) for sort_by in SORT_OPTIONS for offset in (0, size // 2)])
+
+        def operation():
+            sort_by, offset = next_sort()
+            return backend.list_stories(sort_by=sort_by, offset=offset, limit=page_size)
+        return operation
+
+    return {f"{prefix}.save": save, f"{prefix}.filter": filter_page, f"{prefix}.sort": sort_page}
+
+REPEAT = 7
+# Saves grow the store, so they get a fixed, small number of calls per round
+SAVE_NUMBER = 40
+
+def run_suite(sizes: List[int], backends: List[str], wanted: Callable[[str], bool]) -> Dict[str, Any]:
+    results = {}
+
+    def run(cases: Dict[str, Case]):
+        for name, case in cases.items():
+            if not wanted(name):
+                continue
+            number = SAVE_NUMBER if name.endswith('.save') else None
+            results[name] = time_case(case(), number, REPEAT)
+            print(f"  {name:<36}{results[name]['min_us']:12.1f} µs", flush=True)
+
+    run(text_cases())
+    run(engine_cases())
+    workdir = tempfile.mkdtemp(prefix="story-bench-")
+    try:
+        for backend_name in backends:
+            for size in sizes:
+                prefix = f"storage.{backend_name}.{size}."
+                if not any(wanted(prefix + op) for op in ('save', 'filter', 'sort')):
+                    continue
+                print(f"  seeding {backend_name} with {size:,} stories...", flush=True)
+                run(storage_cases(backend_name, size, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'sizes': sizes,
+            'backends': backends,
+            'created': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        },
+        'results': results
+    }
+
+def regressions(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    return [
+        name for name, current in results['results'].items()
+        if name in baseline['results'] and current['min_us'] / baseline['results'][name]['min_us'] - 1 > tolerance
+    ]
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print current vs baseline for the cases both runs have; return the regressions"""
+    regressions = []
+    print(f"\n{'case':<36}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, current in results['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            print(f"{name:<36}{'-':>12}{current['min_us']:>10.1f}µs{'new':>10}")
+            continue
+        change = current['min_us'] / previous['min_us'] - 1
+        flag = " !" if change > tolerance else ""
+        print(f"{name:<36}{previous['min_us']:>10.1f}µs{current['min_us']:>10.1f}µs{change:>+9.0%}{flag}")
+        if change > tolerance:
+            regressions.append(f"{name} {change:+.0%}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', help=f"Comma-separated library sizes (default: {','.join(map(str, SIZES))})")
+    parser.add_argument('--quick', action='store_true', help=f"Only sizes {', '.join(map(str, QUICK_SIZES))}")
+    parser.add_argument('--backends', default=",".join(BACKENDS))
+    parser.add_argument('--only', help="Run only cases whose name contains this text")
+    parser.add_argument('--output', default="benchmark-results.json", help="Where to write this run's results")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.3, help="Allowed slowdown before failing (0.3 = 30%%)")
+    parser.add_argument('--retries', type=int, default=2, help="Times a slow case is re-timed before it counts")
+    args = parser.parse_args()
+
+    if args.sizes:
+        sizes = [int(size) for size in args.sizes.split(',')]
+    else:
+        sizes = list(QUICK_SIZES if args.quick else SIZES)
+    backends = [name for name in args.backends.split(',') if name]
+
+    baseline = None
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print(f"Python {platform.python_version()} on {platform.machine()}")
+    results = run_suite(sizes, backends, lambda name: not args.only or args.only in name)
+    for _ in range(args.retries if baseline else 0):
+        slow = set(regressions(results, baseline, args.tolerance))
+        if not slow:
+            break
+        print(f"re-timing {len(slow)} case(s) slower than the baseline...", flush=True)
+        for name, result in run_suite(sizes, backends, slow.__contains__)['results'].items():
+            if result['min_us'] < results['results'][name]['min_us']:
+                results['results'][name] = result
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline updated: {args.baseline}")
+        return
+    if baseline is None:
+        print("no baseline to compare against; record one with --update-baseline")
+        return
+
+    failed = compare(results, baseline, args.tolerance)
+    if failed:
+        sys.exit(f"FAIL: slower than baseline by more than {args.tolerance:.0%}: " + "; ".join(failed))
+    print("OK")
+
+if __name__ == "__main__":
+    main()
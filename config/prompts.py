@@ -108,3 +108,32 @@ EXPERT EXECUTION CHECKLIST:
 Remember: You're not just telling a story - you're creating an experience that will haunt readers long after they finish. Make every word count. Make every moment matter.
 
 Now craft your masterpiece.'''
+    
+    # Appended to the master prompt when a long story is written in sections (core.chapters)
+    OUTLINE_TEMPLATE = '''
+
+CHAPTER PLAN FIRST:
+Before any prose, plan this story as exactly {sections} sections that together run {total_words}. Each section must move the story forward, and the last one must deliver the climax and resolution.
+
+Reply with the plan only, one line per section, in exactly this format:
+1. Section title | Two or three sentences on what happens, who is involved and how the section ends
+
+Do not write any of the story itself.'''
+    
+    SECTION_TEMPLATE = '''
+
+YOU ARE WRITING ONE SECTION OF A LONGER STORY.
+The whole story runs {total_words} in {sections} sections, following this plan:
+{outline}
+
+STORY SO FAR:
+{story_so_far}
+
+NOW WRITE SECTION {number} OF {sections}: "{title}"
+{synopsis}
+
+- Length: {section_words} for this section alone
+- Continue seamlessly from the story so far; do not recap it
+- Keep names, voice, tense and point of view consistent with the plan
+- {ending}
+- Do not write a section number, title or heading; start directly with the prose'''
@@ -1,6 +1,5 @@
 import os
-from typing import Dict, Any
-import streamlit as st
+from typing import Dict, Any, Optional
 
 class AppSettings:
     # Page Configuration
@@ -10,11 +9,87 @@ class AppSettings:
     
     # AI Model Settings
     DEFAULT_MODEL = "gemma2-9b-it"
-    MAX_TOKENS = 3000
+    # Hard ceiling on completion tokens; each request gets a tighter budget from core.token_budget
+    MAX_TOKENS = 4096
     TOP_P = 0.95
     FREQUENCY_PENALTY = 0.1
     PRESENCE_PENALTY = 0.1
     
+    # Share of the top of the word target added to the token budget so endings are not cut off
+    TOKEN_BUDGET_HEADROOM = 0.2
+    TOKEN_CALIBRATION_MIN_SAMPLES = 5
+    # Models like to tack a word tally onto the story; stop before paying for it
+    STOP_SEQUENCES = ["Word count:", "Word Count:", "(Word count", "(Word Count"]
+    
+    # Models the router picks from per request. Throughput and first-token figures
+    # are starting estimates, replaced by observed stats once a model has enough calls
+    MODELS = {
+        "llama-3.1-8b-instant": {"tier": "fast", "tokens_per_second": 560.0, "time_to_first_token": 0.3},
+        "gemma2-9b-it": {"tier": "fast", "tokens_per_second": 500.0, "time_to_first_token": 0.3},
+        "llama-3.3-70b-versatile": {"tier": "large", "tokens_per_second": 275.0, "time_to_first_token": 0.5}
+    }
+    # Short stories go to the fastest model, Long ones to the big models
+    LENGTH_TIERS = {"Short": "fast", "Medium": "fast", "Long": "large"}
+    MAX_FALLBACK_MODELS = 1
+    ROUTER_MIN_SAMPLES = 5
+    
+    # Generation Cache (opt-in per request from the sidebar)
+    CACHE_MAX_ENTRIES = 256
+    CACHE_DISK_PATH = os.getenv("STORY_CACHE_PATH")
+    CACHE_TTL_SECONDS = 7 * 24 * 3600
+    CACHE_MAX_DISK_MB = 256
+    
+    # Upper bound on concurrent model requests per server process
+    MAX_IN_FLIGHT_REQUESTS = int(os.getenv("STORY_MAX_IN_FLIGHT", "8"))
+    
+    # Chaptered generation (core.chapters): an outline call, then sections written
+    # concurrently. Sections per length that is chaptered by default, how many
+    # run at once, and the most a caller may ask for
+    CHAPTER_SECTIONS = {"Long": 4}
+    CHAPTER_PARALLELISM = int(os.getenv("STORY_CHAPTER_PARALLELISM", "3"))
+    CHAPTER_MAX_SECTIONS = 16
+    
+    # Upstream calls: per-request timeout, retries on 429/5xx/timeouts, and a
+    # per-model circuit breaker that fails fast after consecutive failures
+    REQUEST_TIMEOUT_SECONDS = float(os.getenv("STORY_REQUEST_TIMEOUT", "60"))
+    MAX_RETRIES = int(os.getenv("STORY_MAX_RETRIES", "2"))
+    RETRY_BACKOFF_BASE = 1.0
+    RETRY_BACKOFF_CAP = 20.0
+    CIRCUIT_FAILURE_THRESHOLD = 5
+    CIRCUIT_RESET_SECONDS = 30.0
+    
+    # Saved story storage: "memory" (per session) or "sqlite" (persistent, shared)
+    STORAGE_BACKEND = os.getenv("STORY_STORAGE_BACKEND", "memory")
+    STORAGE_PATH = os.getenv("STORY_DB_PATH", "stories.db")
+    
+    # Story bodies are zstd-compressed with a dictionary trained per genre once it has
+    # COMPRESSION_MIN_SAMPLES stories, retrained every COMPRESSION_RETRAIN_EVERY new ones
+    COMPRESSION_LEVEL = 3
+    COMPRESSION_DICT_SIZE = 16 * 1024
+    COMPRESSION_MIN_SAMPLES = 20
+    COMPRESSION_TRAINING_SAMPLES = 200
+    COMPRESSION_RETRAIN_EVERY = 500
+    # Decompressed bodies kept for repeated reads
+    BODY_CACHE_ENTRIES = 32
+    # In-memory stores whose search and duplicate indexes stay built, process-wide
+    SESSION_INDEX_CACHE_ENTRIES = int(os.getenv("STORY_SESSION_INDEX_CACHE", "16"))
+    
+    # Bulk export: stories fetched and checkpointed per batch, and where the UI writes archives
+    EXPORT_BATCH_SIZE = 200
+    EXPORT_DIR = os.getenv("STORY_EXPORT_DIR", "exports")
+    # Bulk import: stories written per transaction, and per batch of the deferred index build
+    IMPORT_BATCH_SIZE = 2000
+    IMPORT_INDEX_BATCH_SIZE = 500
+    
+    SAVED_STORIES_PAGE_SIZE = 10
+    # Entries kept in each session's save/delete history
+    STORY_HISTORY_LIMIT = 50
+    SEARCH_RESULT_LIMIT = 20
+    
+    # Near-duplicate stories on save: "flag" (save and warn), "skip" (keep the existing one) or "off"
+    DUPLICATE_POLICY = os.getenv("STORY_DUPLICATE_POLICY", "flag")
+    DUPLICATE_THRESHOLD = 0.8
+    
     # Story Settings
     WORD_TARGETS = {
         "Short": "600-800 words",
@@ -28,6 +103,9 @@ class AppSettings:
         "Long": 2250
     }
     
+    # Rough tokens per English word until token_budget has calibrated a model
+    TOKENS_PER_WORD = 1.3
+    
     # UI Settings
     GENRES = [
         "Fantasy", "Science Fiction", "Mystery/Thriller",
@@ -51,5 +129,38 @@ class AppSettings:
         "Linear", "Flashbacks", "Multiple Timeline", "Circular"
     ]
 
-def get_api_key() -> str:
-    return st.secrets.get("GROQ_API_KEY") or os.getenv("GROQ_API_KEY")
\ No newline at end of file
+# Same files Streamlit reads its secrets from; later files win
+SECRETS_PATHS = [
+    os.path.expanduser(os.path.join("~", ".streamlit", "secrets.toml")),
+    os.path.join(os.getcwd(), ".streamlit", "secrets.toml")
+]
+
+def _read_secrets(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        import tomllib
+        return tomllib.loads(data.decode("utf-8"))
+    except ImportError:  # Python < 3.11
+        pass
+    # Flat KEY = "value" lines are all the app needs from the file
+    secrets = {}
+    for line in data.decode("utf-8").splitlines():
+        key, sep, value = line.partition("=")
+        if sep and not key.strip().startswith("#"):
+            secrets[key.strip()] = value.strip().strip('"\'')
+    return secrets
+
+def load_secrets() -> Dict[str, Any]:
+    secrets = {}
+    for path in SECRETS_PATHS:
+        if os.path.isfile(path):
+            secrets.update(_read_secrets(path))
+    return secrets
+
+def get_api_key() -> Optional[str]:
+    return load_secrets().get("GROQ_API_KEY") or os.getenv("GROQ_API_KEY")
+
+def get_base_url() -> Optional[str]:
+    """Alternative Groq endpoint, e.g. benchmarks.mock_groq for load tests; None means the real API"""
+    return load_secrets().get("GROQ_BASE_URL") or os.getenv("GROQ_BASE_URL")
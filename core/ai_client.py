@@ -1,31 +1,20 @@
-import streamlit as st
-import os
-from groq import Groq
-from config.settings import get_api_key
+from typing import Optional, TYPE_CHECKING
+from config.settings import AppSettings, get_api_key, get_base_url
 
-@st.cache_resource
-def init_groq_client():
-    api_key = get_api_key()
-    if not api_key:
-        return None
-    return Groq(api_key=api_key)
+if TYPE_CHECKING:
+    from groq import Groq
 
-def get_groq_client():
-    client = init_groq_client()
-    if not client:
-        handle_missing_api_key()
+def create_groq_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> Optional["Groq"]:
+    """Groq client for the configured key and endpoint, or None when no key is set"""
+    api_key = api_key or get_api_key()
+    if not api_key:
         return None
-    return client
-
-def handle_missing_api_key():
-    with st.expander("🔑 API Configuration", expanded=True):
-        api_key_input = st.text_input(
-            "Enter your Groq API Key:",
-            type="password",
-            help="Get your free API key from https://console.groq.com/"
-        )
-        
-        if api_key_input:
-            os.environ["GROQ_API_KEY"] = api_key_input
-            st.success("API Key set! Advanced story generation is now available.")
-            st.rerun()
\ No newline at end of file
+    # groq (and its pydantic models) is the heaviest import in the app; only pay for it with a key
+    from groq import Groq
+    # StoryEngine owns retries and the circuit breaker; the SDK's own retries would hide failures from both
+    return Groq(
+        api_key=api_key,
+        base_url=base_url or get_base_url(),
+        timeout=AppSettings.REQUEST_TIMEOUT_SECONDS,
+        max_retries=0
+    )
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from core.cache import GenerationCache
+from core.chapters import ChapteredStory
+from core.scheduler import RequestScheduler, get_scheduler
+from core.story_engine import StoryEngine, ProgressCallback
+
+_END = object()
+
+class _Failure:
+    def __init__(self, error: Exception):
+        self.error = error
+
+class AsyncStoryEngine:
+    """asyncio front end for StoryEngine.
+
+    Shares the synchronous Groq client from init_groq_client and runs the
+    blocking calls on the scheduler's thread pool, holding a scheduler slot
+    for the whole request so in-flight calls stay under the global cap.
+    Chaptered stories (see ChapteredStory) run on the loop's default pool
+    instead and take a slot per model call, so a story waiting on its
+    sections never holds capacity it is not using.
+    """
+
+    def __init__(self, client, cache: Optional[GenerationCache] = None,
+                 scheduler: Optional[RequestScheduler] = None, max_retries: Optional[int] = None):
+        self.client = client
+        self.cache = cache
+        self.scheduler = scheduler or get_scheduler()
+        self.max_retries = max_retries
+
+    def _engine(self) -> StoryEngine:
+        # A fresh engine per request keeps last_metrics from racing between tasks
+        return StoryEngine(self.client, cache=self.cache, max_retries=self.max_retries)
+
+    def _chapters(self, session_id: str, loop: asyncio.AbstractEventLoop) -> ChapteredStory:
+        @contextmanager
+        def slot():
+            # Called on a worker thread: wait for the slot on the loop without blocking it
+            asyncio.run_coroutine_threadsafe(self.scheduler.acquire(session_id), loop).result()
+            try:
+                yield
+            finally:
+                self.scheduler.release()
+        return ChapteredStory(self._engine(), slot=slot)
+
+    async def generate_story(self, prompt: str, creativity_level: float,
+                             session_id: str = "default", use_cache: bool = True,
+                             length: Optional[str] = None, latency_budget: Optional[float] = None,
+                             sections: Optional[int] = None) -> str:
+        """The full story; sections as for ChapteredStory, where None means the length's default"""
+        loop = asyncio.get_running_loop()
+        if ChapteredStory.sections_for(length, sections) > 1:
+            return await loop.run_in_executor(
+                None, self._chapters(session_id, loop).complete, prompt, creativity_level, use_cache,
+                length, latency_budget, sections
+            )
+        engine = self._engine()
+        async with self.scheduler.slot(session_id):
+            return await loop.run_in_executor(
+                self.scheduler.executor, engine.complete, prompt, creativity_level, use_cache,
+                length, latency_budget
+            )
+
+    async def stream_events(self, prompt: str, creativity_level: float,
+                            session_id: str = "default",
+                            use_cache: bool = True, length: Optional[str] = None,
+                            latency_budget: Optional[float] = None,
+                            sections: Optional[int] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """(event, data) pairs in the order they happened: ('chunk', {'text': ...}) per text
+        delta, and the engine's progress events between them.
+
+        Chunks and progress travel through one queue from the worker thread,
+        so a done or section event can never overtake the text around it.
+        tokens events are left out, and failures are raised rather than sent
+        as an error event.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def on_progress(event: str, data: Dict[str, Any]):
+            # Called on the worker thread
+            if event not in ('tokens', 'error'):
+                loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+        chaptered = ChapteredStory.sections_for(length, sections) > 1
+        if chaptered:
+            chunks = self._chapters(session_id, loop).iter_story(
+                prompt, creativity_level, on_progress, use_cache, length, latency_budget, sections
+            )
+        else:
+            chunks = self._engine().iter_story(prompt, creativity_level, on_progress, use_cache, length,
+                                               latency_budget)
+
+        def produce():
+            # Runs on a worker thread and hands chunks back to the event loop
+            try:
+                for chunk in chunks:
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, ('chunk', {'text': chunk}))
+                loop.call_soon_threadsafe(queue.put_nowait, _END)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, _Failure(e))
+            finally:
+                chunks.close()
+
+        async with nullcontext() if chaptered else self.scheduler.slot(session_id):
+            producer = loop.run_in_executor(None if chaptered else self.scheduler.executor, produce)
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is _END:
+                        break
+                    if isinstance(item, _Failure):
+                        raise item.error
+                    yield item
+            finally:
+                stop.set()
+                # Hold the slot until the worker thread is actually free
+                await asyncio.wait([producer])
+
+    async def stream_story(self, prompt: str, creativity_level: float,
+                           session_id: str = "default",
+                           on_progress: Optional[ProgressCallback] = None,
+                           use_cache: bool = True, length: Optional[str] = None,
+                           latency_budget: Optional[float] = None,
+                           sections: Optional[int] = None) -> AsyncIterator[str]:
+        """Text deltas; on_progress runs on the event loop, in order with the chunks"""
+        events = self.stream_events(prompt, creativity_level, session_id, use_cache, length,
+                                    latency_budget, sections)
+        try:
+            async for event, data in events:
+                if event == 'chunk':
+                    yield data['text']
+                elif on_progress is not None:
+                    on_progress(event, data)
+        finally:
+            await events.aclose()
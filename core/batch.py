@@ -0,0 +1,209 @@
+import asyncio
+import itertools
+import json
+import os
+import time
+from typing import Dict, Any, Iterator, Iterable, Set, Tuple
+
+from config.settings import AppSettings
+from core.async_engine import AsyncStoryEngine
+from core.prompt_builder import PromptBuilder
+from core.resilience import is_retryable, is_rate_limited, retry_delay
+from core.scheduler import RequestScheduler
+from utils.helper import ValidationHelpers
+
+# Same defaults the sidebar starts with
+DEFAULT_PARAMS = {
+    'theme': AppSettings.GENRES[0],
+    'length': "Medium",
+    'tone': AppSettings.TONES[0],
+    'pov': AppSettings.POV_OPTIONS[0],
+    'creativity_level': 0.7,
+    'complexity': AppSettings.COMPLEXITY_LEVELS[1]
+}
+
+# Grid values of "*" expand to every option the UI offers
+GRID_OPTIONS = {
+    'theme': AppSettings.GENRES,
+    'length': list(AppSettings.WORD_TARGETS),
+    'tone': AppSettings.TONES,
+    'pov': AppSettings.POV_OPTIONS,
+    'complexity': AppSettings.COMPLEXITY_LEVELS
+}
+
+def expand_job(spec: Dict[str, Any], line_number: int) -> Iterator[Dict[str, Any]]:
+    """Turn one input line into jobs, expanding its optional parameter grid.
+
+    A malformed spec becomes a single job carrying an "error", reported in
+    the results file like any other failed job.
+    """
+    if not isinstance(spec, dict):
+        yield {'id': f"line-{line_number}", 'params': None, 'error': "Job spec must be a JSON object"}
+        return
+    base_id = str(spec.get('id', f"line-{line_number}"))
+    params = {**DEFAULT_PARAMS, **{k: v for k, v in spec.items() if k not in ('id', 'grid')}}
+    grid = spec.get('grid') or {}
+    if not grid:
+        yield {'id': base_id, 'params': params}
+        return
+    if not isinstance(grid, dict):
+        yield {'id': base_id, 'params': params, 'error': "grid must map parameter names to lists of values or \"*\""}
+        return
+
+    keys = sorted(grid)
+    values = []
+    for key in keys:
+        if grid[key] == "*":
+            if key not in GRID_OPTIONS:
+                yield {'id': base_id, 'params': params,
+                       'error': f"grid: \"*\" is only allowed for {', '.join(GRID_OPTIONS)}, not {key}"}
+                return
+            values.append(GRID_OPTIONS[key])
+        elif isinstance(grid[key], list) and grid[key]:
+            values.append(grid[key])
+        else:
+            yield {'id': base_id, 'params': params, 'error': f"grid: {key} must be a non-empty list or \"*\""}
+            return
+    for combo in itertools.product(*values):
+        suffix = ",".join(f"{key}={value}" for key, value in zip(keys, combo))
+        yield {'id': f"{base_id}/{suffix}", 'params': {**params, **dict(zip(keys, combo))}}
+
+def read_jobs(path: str) -> Iterator[Dict[str, Any]]:
+    """Lazily read JSONL job specs so huge inputs never sit in memory"""
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                spec = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {'id': f"line-{line_number}", 'params': None, 'error': f"Invalid JSON: {e}"}
+                continue
+            yield from expand_job(spec, line_number)
+
+def validate_job(params: Dict[str, Any]) -> Tuple[bool, str]:
+    """The prompt and parameter checks the UI applies, for one job"""
+    if not isinstance(params.get('user_prompt'), str):
+        return False, "user_prompt must be a string"
+    is_valid, message = ValidationHelpers.validate_story_prompt(params['user_prompt'])
+    if not is_valid:
+        return is_valid, message
+    creativity_level = params.get('creativity_level')
+    if isinstance(creativity_level, bool) or not isinstance(creativity_level, (int, float)):
+        return False, "creativity_level must be a number"
+    return ValidationHelpers.validate_story_parameters(params)
+
+def read_finished_ids(path: str) -> Set[str]:
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a torn last line
+                continue
+            if record.get('status') == 'ok':
+                finished.add(record['id'])
+    return finished
+
+class BatchRunner:
+    def __init__(self, client, parallelism: int = 4, max_retries: int = 5,
+                 backoff_base: float = 1.0, backoff_cap: float = 60.0):
+        self.parallelism = parallelism
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        # Retries live here so a 429 can pause every worker, not only the engine that saw it
+        self.engine = AsyncStoryEngine(client, scheduler=RequestScheduler(parallelism), max_retries=0)
+        self.prompt_builder = PromptBuilder()
+        self._paused_until = 0.0
+        self.stats = {'ok': 0, 'failed': 0, 'skipped': 0, 'retries': 0}
+
+    async def _wait_for_rate_limit(self):
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _generate(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        params = job['params']
+        started = time.perf_counter()
+        if 'error' in job:
+            return {'id': job['id'], 'status': 'error', 'params': params, 'error': job['error'], 'attempts': 0}
+        is_valid, message = validate_job(params)
+        if not is_valid:
+            return {'id': job['id'], 'status': 'error', 'params': params, 'error': message, 'attempts': 0}
+        try:
+            prompt = self.prompt_builder.build_master_prompt(params)
+        except KeyError as e:
+            return {'id': job['id'], 'status': 'error', 'params': params, 'error': f"Unknown option: {e}", 'attempts': 0}
+
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_rate_limit()
+            try:
+                story = await self.engine.generate_story(
+                    prompt, params['creativity_level'], session_id=job['id'], use_cache=False,
+                    length=params['length']
+                )
+                return {
+                    'id': job['id'],
+                    'status': 'ok',
+                    'params': params,
+                    'story': story,
+                    'word_count': len(story.split()),
+                    'attempts': attempt + 1,
+                    'elapsed': round(time.perf_counter() - started, 3)
+                }
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    return {
+                        'id': job['id'],
+                        'status': 'error',
+                        'params': params,
+                        'error': str(e),
+                        'attempts': attempt + 1,
+                        'elapsed': round(time.perf_counter() - started, 3)
+                    }
+                delay = retry_delay(e, attempt, self.backoff_base, self.backoff_cap)
+                if is_rate_limited(e):
+                    # Back every worker off, not just the one that hit the limit
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                self.stats['retries'] += 1
+                await asyncio.sleep(delay)
+
+    async def run(self, jobs: Iterable[Dict[str, Any]], output_path: str,
+                  resume: bool = True, on_result=None) -> Dict[str, Any]:
+        finished = read_finished_ids(output_path) if resume else set()
+        job_iter = iter(jobs)
+        started = time.perf_counter()
+
+        with open(output_path, 'a' if resume else 'w', encoding='utf-8') as out:
+            async def worker():
+                # Pull jobs one at a time so pending work stays bounded by parallelism
+                for job in job_iter:
+                    if job['id'] in finished:
+                        self.stats['skipped'] += 1
+                        continue
+                    result = await self._generate(job)
+                    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    out.flush()
+                    self.stats['ok' if result['status'] == 'ok' else 'failed'] += 1
+                    if on_result:
+                        on_result(result)
+
+            await asyncio.gather(*(worker() for _ in range(self.parallelism)))
+
+        elapsed = time.perf_counter() - started
+        generated = self.stats['ok'] + self.stats['failed']
+        return {
+            **self.stats,
+            'elapsed': round(elapsed, 3),
+            'jobs_per_minute': round(generated / elapsed * 60, 2) if elapsed else 0.0
+        }
+
+def run_batch(client, input_path: str, output_path: str, parallelism: int = 4,
+              max_retries: int = 5, resume: bool = True, on_result=None) -> Dict[str, Any]:
+    runner = BatchRunner(client, parallelism=parallelism, max_retries=max_retries)
+    return asyncio.run(runner.run(read_jobs(input_path), output_path, resume=resume, on_result=on_result))
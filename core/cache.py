@@ -0,0 +1,136 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+class GenerationCache:
+    """Response cache keyed on the exact request sent to the model.
+
+    Lookups hit an in-memory LRU first and fall back to an optional SQLite
+    file shared across processes, which expires entries after ttl_seconds and
+    evicts least recently used entries beyond max_disk_bytes.
+    """
+
+    KEY_FIELDS = (
+        'model', 'messages', 'temperature', 'top_p',
+        'frequency_penalty', 'presence_penalty', 'max_tokens'
+    )
+
+    def __init__(self, max_entries: int = 256, disk_path: Optional[str] = None,
+                 ttl_seconds: float = 7 * 24 * 3600, max_disk_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'memory_hits': 0, 'disk_hits': 0, 'evictions': 0}
+        self._db = self._open_disk(disk_path) if disk_path else None
+
+    @staticmethod
+    def _open_disk(path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS generation_cache ("
+            "key TEXT PRIMARY KEY, story TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON generation_cache(accessed_at)")
+        return db
+
+    @classmethod
+    def make_key(cls, request: Dict[str, Any]) -> str:
+        payload = {field: request.get(field) for field in cls.KEY_FIELDS}
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            story = self._memory.get(key)
+            if story is not None:
+                self._memory.move_to_end(key)
+                self._stats['hits'] += 1
+                self._stats['memory_hits'] += 1
+                return story
+
+            story = self._disk_get(key)
+            if story is not None:
+                self._memory_put(key, story)
+                self._stats['hits'] += 1
+                self._stats['disk_hits'] += 1
+                return story
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key: str, story: str):
+        with self._lock:
+            self._memory_put(key, story)
+            self._disk_put(key, story)
+
+    def _memory_put(self, key: str, story: str):
+        self._memory[key] = story
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT story, created_at FROM generation_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        if now - row[1] > self.ttl_seconds:
+            self._db.execute("DELETE FROM generation_cache WHERE key = ?", (key,))
+            return None
+        self._db.execute("UPDATE generation_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def _disk_put(self, key: str, story: str):
+        if self._db is None:
+            return
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO generation_cache (key, story, size, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, story, len(story.encode('utf-8')), now, now)
+        )
+        self._evict_disk(now)
+
+    def _evict_disk(self, now: float):
+        self._db.execute("DELETE FROM generation_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM generation_cache").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+
+        # Drop least recently used entries until the file is back under budget
+        for key, size in self._db.execute(
+            "SELECT key, size FROM generation_cache ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_disk_bytes:
+                break
+            self._db.execute("DELETE FROM generation_cache WHERE key = ?", (key,))
+            total -= size
+            self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM generation_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
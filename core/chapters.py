@@ -0,0 +1,302 @@
+import logging
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Callable, ContextManager, Iterator, List, Optional, Tuple
+
+from config.settings import AppSettings
+from core.cache import GenerationCache
+from core.metrics import GenerationMetrics
+from core.prompt_builder import PromptBuilder
+from core.story_engine import StoryEngine, ProgressCallback
+from core.token_budget import word_range
+
+# "1. Title | synopsis"; models sometimes write "1)" or wrap the title in markdown
+_OUTLINE_LINE = re.compile(r'^\s*(\d+)[.)]\s*(.+?)\s*\|\s*(.+?)\s*$')
+# Closing words of a written section handed to the one after it
+TAIL_WORDS = 120
+# Outline words asked for per section
+OUTLINE_WORDS = (30, 60)
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+class _Failure:
+    def __init__(self, error: Exception):
+        self.error = error
+
+def parse_outline(text: str, sections: int) -> List[Tuple[str, str]]:
+    """(title, synopsis) per section from an outline reply; empty if the reply does not follow the format"""
+    outline = []
+    for line in text.splitlines():
+        match = _OUTLINE_LINE.match(line)
+        if match and int(match.group(1)) == len(outline) + 1:
+            outline.append((match.group(2).strip('*#"\' '), match.group(3)))
+    return outline[:sections] if len(outline) >= 2 else []
+
+def section_words(length: str, sections: int) -> Tuple[str, str]:
+    """(per-section, whole story) word ranges when length is written in sections.
+
+    A section is one default-sized chapter of the length's target, so asking
+    for more sections than CHAPTER_SECTIONS gives a proportionally longer story.
+    """
+    share = AppSettings.CHAPTER_SECTIONS.get(length, 1)
+    low, high = word_range(length)
+    low, high = low // share, high // share
+    return f"{low}-{high} words", f"{low * sections}-{high * sections} words"
+
+class ChapteredStory:
+    """Writes a story as an outline followed by sections generated concurrently.
+
+    One call plans the story as numbered sections, then up to parallelism
+    sections are written at once. Each section's prompt holds the master
+    prompt, the whole outline and a rolling summary of the story so far:
+    the outline's synopses of the earlier sections, plus the closing words
+    of the previous section when it is already written. Sections are
+    yielded strictly in order, the first live and each later one as soon as
+    its predecessor ends (buffered text first, then live), so callers see
+    one continuous stream. Sections carry a literal word range instead of a
+    length label, so they get a tight token budget and the router's fast
+    default model, and no single call approaches MAX_TOKENS.
+
+    Lengths without CHAPTER_SECTIONS, an explicit sections of 1, and
+    outlines that cannot be parsed all fall back to one ordinary call.
+    slot, if given, returns a context manager held around each model call,
+    such as a scheduler slot.
+    """
+
+    def __init__(self, engine: StoryEngine, prompt_builder: Optional[PromptBuilder] = None,
+                 parallelism: Optional[int] = None, slot: Optional[Callable[[], ContextManager]] = None):
+        self.engine = engine
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        self.settings = AppSettings()
+        self.parallelism = parallelism or self.settings.CHAPTER_PARALLELISM
+        self.slot = slot or nullcontext
+        self.outline: List[Tuple[str, str]] = []
+        self.last_metrics: Optional[GenerationMetrics] = None
+        self.last_cache_hit = False
+        self._tokens = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def sections_for(length: Optional[str], sections: Optional[int] = None) -> int:
+        """Sections to write: the explicit count, else the length's default; below 2 means one call"""
+        if sections is None:
+            return AppSettings.CHAPTER_SECTIONS.get(length, 1)
+        return sections
+
+    def _single(self, prompt: str, creativity_level: float, notify: ProgressCallback,
+                use_cache: bool, length: Optional[str], latency_budget: Optional[float]) -> Iterator[str]:
+        with self.slot():
+            yield from self.engine.iter_story(prompt, creativity_level, notify, use_cache, length, latency_budget)
+        self.last_metrics = self.engine.last_metrics
+        self.last_cache_hit = self.engine.last_cache_hit
+
+    def _cache_key(self, prompt: str, creativity_level: float, sections: int, words: str,
+                   latency_budget: Optional[float]) -> str:
+        # Apart from single-call keys: the same prompt written in sections is a different story.
+        # Like them it names the model, here the one the sections would be routed to
+        return GenerationCache.make_key({
+            'model': self.engine.router.route(words, latency_budget)[0],
+            'messages': [{'role': 'user', 'content': prompt},
+                         {'role': 'system', 'content': f"chaptered: {sections} x {words}"}],
+            'temperature': creativity_level
+        })
+
+    def story_so_far(self, outline: List[Tuple[str, str]], index: int, written: Dict[int, str]) -> str:
+        """Rolling summary for section index: earlier synopses, and how the previous section actually ends"""
+        if index == 0:
+            return "Nothing yet: this section opens the story."
+        lines = [f"{number}. {title}: {synopsis}" for number, (title, synopsis) in enumerate(outline[:index], 1)]
+        previous = written.get(index - 1)
+        if previous:
+            lines.append(f'Section {index} ends: "...{" ".join(previous.split()[-TAIL_WORDS:])}"')
+        return "\n".join(lines)
+
+    def _count(self):
+        with self._lock:
+            self._tokens += 1
+
+    def _summarize(self, started: float, first_token_at: Optional[float], engines: List[StoryEngine],
+                   error: Optional[Exception] = None) -> GenerationMetrics:
+        """One record for the whole story, timed from the outline request; each call was recorded on its own.
+
+        engines are the sections that reached the caller; ones written ahead
+        and then dropped by a failure or an early stop do not count.
+        """
+        parts = [engine.last_metrics for engine in engines if engine.last_metrics is not None]
+        models = sorted({metrics.model for metrics in parts})
+        summary = GenerationMetrics(", ".join(models), streamed=True)
+        summary.started_at = started
+        summary.first_token_at = first_token_at
+        summary.chunk_count = sum(metrics.chunk_count for metrics in parts)
+        usage = [metrics.completion_tokens for metrics in parts]
+        summary.finish(completion_tokens=sum(usage) if parts and None not in usage else None,
+                       error=None if error is None else str(error),
+                       finish_reason=parts[-1].finish_reason if parts else None)
+        return summary
+
+    def _write_sections(self, prompt: str, creativity_level: float, outline: List[Tuple[str, str]],
+                        words: Tuple[str, str], notify: ProgressCallback,
+                        latency_budget: Optional[float], started: float) -> Iterator[str]:
+        channels = [queue.Queue() for _ in outline]
+        engines = [self.engine.fork() for _ in outline]
+        written: Dict[int, str] = {}
+        stop = threading.Event()
+        self._tokens = 0
+
+        def write(index: int):
+            # Runs on a pool thread; results go through the section's channel only
+            try:
+                with self.slot():
+                    if stop.is_set():
+                        return
+                    section_prompt = self.prompt_builder.build_section_prompt(
+                        prompt, outline, index, self.story_so_far(outline, index, written), *words
+                    )
+                    chunks = engines[index].iter_story(
+                        section_prompt, creativity_level, use_cache=False, length=words[0],
+                        latency_budget=latency_budget
+                    )
+                    parts = []
+                    try:
+                        for chunk in chunks:
+                            if stop.is_set():
+                                return
+                            parts.append(chunk)
+                            self._count()
+                            channels[index].put(chunk)
+                    finally:
+                        chunks.close()
+                written[index] = ''.join(parts)
+                channels[index].put(_END)
+            except Exception as e:
+                channels[index].put(_Failure(e))
+
+        first_token_at = None
+        # Sections that have started reaching the caller, and why the stream ended early if it did
+        yielded = 0
+        error = None
+        pool = ThreadPoolExecutor(max_workers=min(self.parallelism, len(outline)),
+                                  thread_name_prefix="story-section")
+        try:
+            # Submitted in order, so the pool starts the earliest sections first
+            for index in range(len(outline)):
+                pool.submit(write, index)
+            for index, (title, _) in enumerate(outline):
+                notify('section', {'index': index, 'sections': len(outline), 'title': title})
+                opening = True
+                while True:
+                    item = channels[index].get()
+                    if item is _END:
+                        break
+                    if isinstance(item, _Failure):
+                        raise item.error
+                    if opening:
+                        # Sections are joined by a blank line, so drop the model's own leading whitespace
+                        item = item.lstrip()
+                        if not item:
+                            continue
+                        opening = False
+                        yielded = index + 1
+                        if index:
+                            item = "\n\n" + item
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        notify('first_token', {'time_to_first_token': first_token_at - started})
+                    notify('tokens', {'tokens': self._tokens})
+                    yield item
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.last_metrics = self._summarize(started, first_token_at, engines[:yielded], error)
+
+    def iter_story(self, prompt: str, creativity_level: float,
+                   on_progress: Optional[ProgressCallback] = None,
+                   use_cache: bool = True, length: Optional[str] = None,
+                   latency_budget: Optional[float] = None, sections: Optional[int] = None) -> Iterator[str]:
+        """Yield the story as text deltas, raising on API errors like StoryEngine.iter_story.
+
+        Besides the engine's first_token, tokens, done and error events,
+        on_progress receives outline_sent, outline (with the section titles)
+        and section (with index, sections and title) as each section starts
+        to stream. tokens counts chunks received across every section.
+        """
+        notify = on_progress or (lambda event, data: None)
+        self.outline = []
+        self.last_metrics = None
+        self.last_cache_hit = False
+        sections = self.sections_for(length, sections)
+        if sections < 2:
+            yield from self._single(prompt, creativity_level, notify, use_cache, length, latency_budget)
+            return
+
+        words = section_words(length, sections)
+        cache_key = self._cache_key(prompt, creativity_level, sections, words[0], latency_budget)
+        cache = self.engine.cache
+        if cache is not None and use_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                self.last_cache_hit = True
+                notify('done', {'cached': True})
+                yield cached
+                return
+
+        started = time.perf_counter()
+        notify('outline_sent', {'sections': sections})
+        try:
+            with self.slot():
+                plan = self.engine.complete(
+                    self.prompt_builder.build_outline_prompt(prompt, sections, words[1]), creativity_level,
+                    use_cache=False, length=f"{OUTLINE_WORDS[0] * sections}-{OUTLINE_WORDS[1] * sections} words",
+                    latency_budget=latency_budget
+                )
+        except Exception as e:
+            notify('error', {'error': str(e)})
+            raise
+        outline = parse_outline(plan, sections)
+        if not outline:
+            logger.warning("Outline did not follow the section format, writing the story in one call")
+            notify('outline', {'titles': []})
+            yield from self._single(prompt, creativity_level, notify, use_cache, length, latency_budget)
+            return
+
+        self.outline = outline
+        notify('outline', {'titles': [title for title, _ in outline]})
+        parts = []
+        try:
+            for chunk in self._write_sections(prompt, creativity_level, outline, words, notify,
+                                              latency_budget, started):
+                parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            notify('error', {'error': str(e)})
+            raise
+        if cache is not None:
+            # Only complete stories are cached, as with single calls
+            cache.put(cache_key, ''.join(parts))
+        notify('done', {**self.last_metrics.to_dict(), 'sections': len(outline)})
+
+    def complete(self, prompt: str, creativity_level: float, use_cache: bool = True,
+                 length: Optional[str] = None, latency_budget: Optional[float] = None,
+                 sections: Optional[int] = None) -> str:
+        """The full story, raising on API errors"""
+        return ''.join(self.iter_story(prompt, creativity_level, None, use_cache, length, latency_budget, sections))
+
+    def stream_story(self, prompt: str, creativity_level: float,
+                     on_progress: Optional[ProgressCallback] = None,
+                     use_cache: bool = True, length: Optional[str] = None,
+                     latency_budget: Optional[float] = None, sections: Optional[int] = None) -> Iterator[str]:
+        """Like StoryEngine.stream_story: failures go to the engine's on_error instead of raising"""
+        try:
+            yield from self.iter_story(prompt, creativity_level, on_progress, use_cache, length,
+                                       latency_budget, sections)
+        except Exception as e:
+            self.engine._report_error(e)
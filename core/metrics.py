@@ -0,0 +1,250 @@
+import bisect
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+class GenerationMetrics:
+    def __init__(self, model: str, streamed: bool = False):
+        self.model = model
+        self.streamed = streamed
+        self.started_at = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.chunk_count = 0
+        self.completion_tokens: Optional[int] = None
+        self.finish_reason: Optional[str] = None
+        self.error: Optional[str] = None
+
+    def mark_chunk(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.chunk_count += 1
+
+    def finish(self, completion_tokens: Optional[int] = None, error: Optional[str] = None,
+               finish_reason: Optional[str] = None):
+        self.finished_at = time.perf_counter()
+        if self.first_token_at is None and error is None:
+            # Non-streamed responses arrive all at once
+            self.first_token_at = self.finished_at
+        if completion_tokens is not None:
+            self.completion_tokens = completion_tokens
+        self.finish_reason = finish_reason
+        self.error = error
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def total_time(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    @property
+    def token_count(self) -> int:
+        # Each streamed chunk carries roughly one token; prefer the API's usage figure
+        return self.completion_tokens if self.completion_tokens is not None else self.chunk_count
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        if self.finished_at is None or self.first_token_at is None:
+            return None
+        # Measure decode throughput from the first token so queueing is not counted twice
+        window = self.finished_at - self.first_token_at if self.streamed else self.total_time
+        if not window:
+            return None
+        return self.token_count / window
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'model': self.model,
+            'streamed': self.streamed,
+            'time_to_first_token': self.time_to_first_token,
+            'total_time': self.total_time,
+            'tokens': self.token_count,
+            'tokens_per_second': self.tokens_per_second,
+            'finish_reason': self.finish_reason,
+            'error': self.error
+        }
+
+class MetricsRecorder:
+    def __init__(self, max_records: int = 1000):
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        # Bumped on every record; summary_by_model is reused until it changes
+        self._version = 0
+        self._by_model: Optional[Tuple[int, Dict[str, Dict[str, Any]]]] = None
+
+    def record(self, metrics: GenerationMetrics):
+        with self._lock:
+            self._records.append(metrics.to_dict())
+            self._version += 1
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            records = list(self._records)
+        return records[-limit:] if limit else records
+
+    def summary(self) -> Dict[str, Any]:
+        records = [r for r in self.recent() if r['error'] is None]
+        ttfts = [r['time_to_first_token'] for r in records if r['time_to_first_token'] is not None]
+        rates = [r['tokens_per_second'] for r in records if r['tokens_per_second'] is not None]
+        return {
+            'requests': len(records),
+            'avg_time_to_first_token': sum(ttfts) / len(ttfts) if ttfts else None,
+            'avg_tokens_per_second': sum(rates) / len(rates) if rates else None
+        }
+
+    def summary_by_model(self) -> Dict[str, Dict[str, Any]]:
+        """Latency, throughput and error rate of recent generations, per model.
+
+        The router asks for this on every request, cache hits included, so
+        the result is kept until the next record arrives.
+        """
+        with self._lock:
+            version = self._version
+            cached = self._by_model
+            records = list(self._records) if cached is None or cached[0] != version else None
+        if records is None:
+            return cached[1]
+
+        by_model: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            by_model.setdefault(record['model'], []).append(record)
+
+        summary = {}
+        for model, records in by_model.items():
+            ok = [r for r in records if r['error'] is None]
+            ttfts = [r['time_to_first_token'] for r in ok if r['time_to_first_token'] is not None]
+            rates = [r['tokens_per_second'] for r in ok if r['tokens_per_second'] is not None]
+            totals = sorted(r['total_time'] for r in ok if r['total_time'] is not None)
+            summary[model] = {
+                'requests': len(records),
+                'errors': len(records) - len(ok),
+                'error_rate': (len(records) - len(ok)) / len(records),
+                'avg_time_to_first_token': sum(ttfts) / len(ttfts) if ttfts else None,
+                'avg_tokens_per_second': sum(rates) / len(rates) if rates else None,
+                'p50_total_time': totals[len(totals) // 2] if totals else None,
+                'p95_total_time': totals[min(len(totals) - 1, int(len(totals) * 0.95))] if totals else None
+            }
+        with self._lock:
+            self._by_model = (version, summary)
+        return summary
+
+# Process-wide recorder shared by every session
+metrics_recorder = MetricsRecorder()
+
+# Upper bounds in seconds for upstream call latency; anything slower lands in +Inf
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+class LatencyHistogram:
+    """Cumulative buckets for scraping plus a window of recent samples for exact quantiles"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS, window: int = 1000):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._recent = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self._recent.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def cumulative_counts(self) -> List[Tuple[str, int]]:
+        bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+        return list(zip(bounds, itertools.accumulate(self.counts)))
+
+class CallStats:
+    """Latency and error histograms for every upstream model call, by model.
+
+    Each attempt is observed, retries included, so error rates reflect
+    what the provider actually returned rather than what users saw.
+    """
+
+    def __init__(self):
+        self._latency: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, seconds: Optional[float], error_kind: Optional[str] = None):
+        """seconds is None for calls rejected before reaching the provider"""
+        outcome = 'ok' if error_kind is None else 'error'
+        with self._lock:
+            if seconds is not None:
+                histogram = self._latency.get((model, outcome))
+                if histogram is None:
+                    histogram = self._latency[(model, outcome)] = LatencyHistogram()
+                histogram.observe(seconds)
+            if error_kind is not None:
+                self._errors[(model, error_kind)] = self._errors.get((model, error_kind), 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        models: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (model, outcome), histogram in self._latency.items():
+                entry = models.setdefault(model, {'calls': 0, 'errors': {}})
+                entry['calls'] += histogram.count
+                if outcome == 'ok':
+                    for q in QUANTILES:
+                        entry[f"p{int(q * 100)}"] = histogram.quantile(q)
+            for (model, kind), count in self._errors.items():
+                models.setdefault(model, {'calls': 0, 'errors': {}})['errors'][kind] = count
+        for entry in models.values():
+            # Breaker rejections never reached the provider, so they are not part of its error rate
+            failed = sum(count for kind, count in entry['errors'].items() if kind != 'circuit_open')
+            entry['error_rate'] = failed / entry['calls'] if entry['calls'] else 0.0
+        return models
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition of the histograms and error counters"""
+        lines = [
+            "# HELP story_upstream_request_seconds Latency of model API calls",
+            "# TYPE story_upstream_request_seconds histogram"
+        ]
+        with self._lock:
+            latency = sorted(self._latency.items())
+            errors = sorted(self._errors.items())
+            for (model, outcome), histogram in latency:
+                labels = f'model="{model}",outcome="{outcome}"'
+                for bound, count in histogram.cumulative_counts():
+                    lines.append(f'story_upstream_request_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"story_upstream_request_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"story_upstream_request_seconds_count{{{labels}}} {histogram.count}")
+
+            lines += [
+                "# HELP story_upstream_request_recent_seconds Latency quantiles over the most recent calls",
+                "# TYPE story_upstream_request_recent_seconds summary"
+            ]
+            for (model, outcome), histogram in latency:
+                labels = f'model="{model}",outcome="{outcome}"'
+                for q in QUANTILES:
+                    value = histogram.quantile(q)
+                    if value is not None:
+                        lines.append(f'story_upstream_request_recent_seconds{{{labels},quantile="{q}"}} {value:.6f}')
+
+        lines += [
+            "# HELP story_upstream_errors_total Failed model API calls by kind",
+            "# TYPE story_upstream_errors_total counter"
+        ]
+        for (model, kind), count in errors:
+            lines.append(f'story_upstream_errors_total{{model="{model}",kind="{kind}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+# Process-wide upstream call histograms, scraped from the API's /metrics
+call_stats = CallStats()
@@ -0,0 +1,79 @@
+from typing import Dict, Any, List, Optional
+
+from config.settings import AppSettings
+from core.metrics import MetricsRecorder, metrics_recorder
+from core.resilience import CircuitBreaker, circuit_breakers
+from core.token_budget import token_budget, word_range
+
+class ModelRouter:
+    """Picks the model for each request, followed by its fallbacks.
+
+    Models in the tier preferred for the requested length come first, and
+    within a tier the lowest expected completion time wins. That estimate
+    uses observed first-token latency and throughput once a model has
+    ROUTER_MIN_SAMPLES generations, and is inflated by its recent error
+    rate. Models whose circuit breaker is open are skipped, and models
+    expected to miss the latency budget go last.
+    """
+
+    def __init__(self, models: Optional[Dict[str, Dict[str, Any]]] = None,
+                 recorder: Optional[MetricsRecorder] = None,
+                 max_fallbacks: Optional[int] = None):
+        self.settings = AppSettings()
+        self.models = models or self.settings.MODELS
+        self.recorder = recorder or metrics_recorder
+        self.max_fallbacks = self.settings.MAX_FALLBACK_MODELS if max_fallbacks is None else max_fallbacks
+
+    def expected_tokens(self, length: Optional[str], model: str) -> float:
+        words = self.settings.WORD_ESTIMATES.get(length)
+        if words is None:
+            try:
+                # Literal ranges such as a chapter's "500-625 words"
+                words = sum(word_range(length)) / 2
+            except (TypeError, ValueError):
+                words = self.settings.WORD_ESTIMATES["Medium"]
+        return words * token_budget.tokens_per_word(model)
+
+    def estimates(self, length: Optional[str] = None) -> List[Dict[str, Any]]:
+        observed = self.recorder.summary_by_model()
+        breakers = circuit_breakers()
+        estimates = []
+        for model, profile in self.models.items():
+            stats = observed.get(model)
+            ttft = profile['time_to_first_token']
+            rate = profile['tokens_per_second']
+            error_rate = 0.0
+            if stats and stats['requests'] >= self.settings.ROUTER_MIN_SAMPLES:
+                ttft = stats['avg_time_to_first_token'] or ttft
+                rate = stats['avg_tokens_per_second'] or rate
+                error_rate = stats['error_rate']
+            expected = ttft + self.expected_tokens(length, model) / rate
+            breaker = breakers.get(model)
+            estimates.append({
+                'model': model,
+                'tier': profile['tier'],
+                'expected_seconds': expected,
+                'error_rate': error_rate,
+                # Each failure costs roughly another attempt elsewhere
+                'score': expected / max(0.1, 1.0 - error_rate),
+                'available': breaker is None or breaker.state != CircuitBreaker.OPEN
+            })
+        return estimates
+
+    def route(self, length: Optional[str] = None, latency_budget: Optional[float] = None) -> List[str]:
+        """Models to try in order: the primary, then up to max_fallbacks alternatives"""
+        estimates = self.estimates(length)
+        # With every breaker open, still hand back a route so the caller gets CircuitOpenError
+        candidates = [e for e in estimates if e['available']] or estimates
+        preferred_tier = self.settings.LENGTH_TIERS.get(length)
+
+        def rank(estimate: Dict[str, Any]):
+            over_budget = latency_budget is not None and estimate['expected_seconds'] > latency_budget
+            if preferred_tier is None:
+                off_preference = estimate['model'] != self.settings.DEFAULT_MODEL
+            else:
+                off_preference = estimate['tier'] != preferred_tier
+            return (over_budget, off_preference, estimate['score'])
+
+        ranked = sorted(candidates, key=rank)
+        return [e['model'] for e in ranked[:1 + self.max_fallbacks]]
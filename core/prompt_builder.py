@@ -1,11 +1,20 @@
-from typing import Dict, Any
+import functools
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Tuple
 from config.prompts import PromptTemplates
 from config.settings import AppSettings
 
+# Marks where the user's concept goes in a precomputed prompt
+_USER_PROMPT_SLOT = "\x00user_prompt\x00"
+
+# Representative level for each creativity bucket used by get_creativity_instructions
+CREATIVITY_BUCKETS = {"maximum": 0.9, "enhanced": 0.7, "balanced": 0.5}
+
 class PromptBuilder:
     def __init__(self):
-        self.templates = PromptTemplates()
-        self.settings = AppSettings()
+        # Both hold only class-level constants, so share them instead of instantiating
+        self.templates = PromptTemplates
+        self.settings = AppSettings
     
     def get_sensory_details_prompt(self, theme: str) -> str:
         return self.templates.SENSORY_DETAILS.get(
@@ -79,7 +88,27 @@ class PromptBuilder:
             - Create engaging but accessible narratives
             - Use proven techniques with personal touches'''
     
+    @staticmethod
+    def get_creativity_bucket(creativity_level: float) -> str:
+        if creativity_level > 0.8:
+            return "maximum"
+        elif creativity_level > 0.6:
+            return "enhanced"
+        return "balanced"
+    
     def build_master_prompt(self, params: Dict[str, Any]) -> str:
+        key = (
+            params['theme'], params['tone'], params['pov'], params['length'],
+            self.get_creativity_bucket(params['creativity_level'])
+        )
+        template = get_prompt_table().get(key)
+        if template is None:
+            # Options outside the UI's fixed set are composed on the fly
+            return self.compose_master_prompt(params)
+        prefix, suffix = template
+        return prefix + params['user_prompt'] + suffix
+    
+    def compose_master_prompt(self, params: Dict[str, Any]) -> str:
         user_prompt = params['user_prompt']
         theme = params['theme']
         length = params['length']
@@ -105,3 +134,54 @@ class PromptBuilder:
             sensory_prompt=sensory_prompt,
             prose_prompt=prose_prompt
         )
+    
+    def build_outline_prompt(self, master_prompt: str, sections: int, total_words: str) -> str:
+        """The master prompt turned into a request for a section-by-section plan"""
+        return master_prompt + self.templates.OUTLINE_TEMPLATE.format(sections=sections, total_words=total_words)
+    
+    def build_section_prompt(self, master_prompt: str, outline: List[Tuple[str, str]], index: int,
+                             story_so_far: str, section_words: str, total_words: str) -> str:
+        """The master prompt narrowed to writing one section of the outline"""
+        title, synopsis = outline[index]
+        if index == len(outline) - 1:
+            ending = "This is the final section: bring the story to its climax and a resolution that resonates"
+        else:
+            ending = (f'End where the plan says this section ends, leading into section {index + 2}: '
+                      f'"{outline[index + 1][0]}"; do not resolve the story yet')
+        return master_prompt + self.templates.SECTION_TEMPLATE.format(
+            total_words=total_words,
+            sections=len(outline),
+            outline="\n".join(f"{number}. {name}: {summary}" for number, (name, summary) in enumerate(outline, 1)),
+            story_so_far=story_so_far,
+            number=index + 1,
+            title=title,
+            synopsis=synopsis,
+            section_words=section_words,
+            ending=ending
+        )
+
+@functools.lru_cache(maxsize=None)
+def get_prompt_table() -> Mapping[Tuple[str, str, str, str, str], Tuple[str, str]]:
+    """Every prompt the UI can request, split around the user's concept.
+
+    Built once on first use rather than at import, so processes that never
+    build a prompt (the key-entry page, API workers serving /stories) skip it.
+    """
+    builder = PromptBuilder()
+    table = {}
+    for theme in AppSettings.GENRES:
+        for tone in AppSettings.TONES:
+            for pov in AppSettings.POV_OPTIONS:
+                for length in AppSettings.WORD_TARGETS:
+                    for bucket, creativity_level in CREATIVITY_BUCKETS.items():
+                        prompt = builder.compose_master_prompt({
+                            'user_prompt': _USER_PROMPT_SLOT,
+                            'theme': theme,
+                            'tone': tone,
+                            'pov': pov,
+                            'length': length,
+                            'creativity_level': creativity_level
+                        })
+                        prefix, suffix = prompt.split(_USER_PROMPT_SLOT)
+                        table[(theme, tone, pov, length, bucket)] = (prefix, suffix)
+    return MappingProxyType(table)
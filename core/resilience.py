@@ -0,0 +1,169 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+# Status codes worth retrying: timeouts, conflicts, rate limits and upstream failures
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+def get_status_code(error: Exception) -> Optional[int]:
+    code = getattr(error, 'status_code', None)
+    if code is None:
+        code = getattr(getattr(error, 'response', None), 'status_code', None)
+    return code
+
+def is_rate_limited(error: Exception) -> bool:
+    return get_status_code(error) == 429
+
+def is_retryable(error: Exception) -> bool:
+    code = get_status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    # Connection failures carry no status code (groq.APIConnectionError / APITimeoutError)
+    names = {cls.__name__ for cls in type(error).__mro__}
+    # An open breaker is worth waiting out, not a reason to give up on the job
+    return bool(names & {'APIConnectionError', 'APITimeoutError', 'ConnectionError', 'TimeoutError', 'CircuitOpenError'})
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, from Retry-After / retry-after-ms headers"""
+    if isinstance(error, CircuitOpenError):
+        return error.retry_after
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+
+    retry_after = headers.get('retry-after')
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff for the given zero-based attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def retry_delay(error: Exception, attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    retry_after = get_retry_after(error)
+    if retry_after is not None:
+        return min(cap, retry_after)
+    return backoff_delay(attempt, base, cap)
+
+def error_kind(error: Exception) -> str:
+    """Coarse failure label for error counters"""
+    if isinstance(error, CircuitOpenError):
+        return 'circuit_open'
+    code = get_status_code(error)
+    if code == 429:
+        return 'rate_limited'
+    if code is not None:
+        return 'server_error' if code >= 500 else 'client_error'
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & {'APITimeoutError', 'TimeoutError'}:
+        return 'timeout'
+    if names & {'APIConnectionError', 'ConnectionError'}:
+        return 'connection'
+    return 'other'
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a model whose breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is temporarily unavailable after repeated failures; retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open probe -> closed.
+
+    Only retryable failures (429, 5xx, timeouts, connection errors) count
+    towards opening it; a 4xx still proves the upstream is answering.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_count = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError; half-open lets a single probe through"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if self._state == self.OPEN and remaining <= 0:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            raise CircuitOpenError(self.name, max(remaining, 1.0))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._state = self.CLOSED
+            self._probe_in_flight = False
+
+    def record_failure(self, error: Exception):
+        if not is_retryable(error):
+            self.record_success()
+            return
+        with self._lock:
+            self.failures += 1
+            if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.opened_count += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'times_opened': self.opened_count
+        }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> CircuitBreaker:
+    """Process-wide breaker per upstream model, created on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, failure_threshold, reset_timeout)
+        return breaker
+
+def circuit_breakers() -> Dict[str, CircuitBreaker]:
+    with _breakers_lock:
+        return dict(_breakers)
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Any, Optional
+
+from config.settings import AppSettings
+
+class RequestScheduler:
+    """Caps in-flight model requests across the whole process.
+
+    Waiters queue per session and freed slots are handed out round-robin
+    across sessions, so one session submitting many requests cannot starve
+    the others. Safe to share between event loops running in different
+    threads, and with plain threads through blocking_slot.
+    """
+
+    def __init__(self, max_in_flight: int, wait_samples: int = 1000):
+        self.max_in_flight = max_in_flight
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="story-request")
+        self._lock = threading.Lock()
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._in_flight = 0
+        self._waits = deque(maxlen=wait_samples)
+        self._completed = 0
+
+    async def acquire(self, session_id: str = "default"):
+        loop = asyncio.get_running_loop()
+        enqueued_at = time.perf_counter()
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._queues:
+                self._in_flight += 1
+                self._waits.append(0.0)
+                return
+            future = loop.create_future()
+            waiter = (loop, future, enqueued_at)
+            self._queues.setdefault(session_id, deque()).append(waiter)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                queue = self._queues.get(session_id)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[session_id]
+                    raise
+            # The slot was already handed to us; pass it on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            self._completed += 1
+            waiter = self._next_waiter()
+            if waiter is None:
+                self._in_flight -= 1
+                return
+            loop, future, enqueued_at = waiter
+            self._waits.append(time.perf_counter() - enqueued_at)
+        # The slot moves straight to the waiter, in_flight stays the same
+        loop.call_soon_threadsafe(self._grant, future)
+
+    def _next_waiter(self):
+        # Rotate through sessions: take the head session's oldest waiter, then move it to the back
+        if not self._queues:
+            return None
+        session_id, queue = self._queues.popitem(last=False)
+        waiter = queue.popleft()
+        if queue:
+            self._queues[session_id] = queue
+        return waiter
+
+    def _grant(self, future: asyncio.Future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, session_id: str = "default"):
+        await self.acquire(session_id)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @contextmanager
+    def blocking_slot(self, session_id: str = "default"):
+        """slot() for synchronous callers on threads without an event loop, such as Streamlit scripts"""
+        asyncio.run(self.acquire(session_id))
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            per_session = {session_id: len(queue) for session_id, queue in self._queues.items()}
+            in_flight = self._in_flight
+            completed = self._completed
+        return {
+            'max_in_flight': self.max_in_flight,
+            'in_flight': in_flight,
+            'queue_depth': sum(per_session.values()),
+            'queued_sessions': per_session,
+            'completed': completed,
+            'avg_wait': sum(waits) / len(waits) if waits else 0.0,
+            'p95_wait': waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+            'max_wait': waits[-1] if waits else 0.0
+        }
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> RequestScheduler:
+    """Return the process-wide scheduler, creating it on first use"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler(AppSettings.MAX_IN_FLIGHT_REQUESTS)
+        return _scheduler
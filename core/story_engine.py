@@ -1,66 +1,298 @@
-import streamlit as st
-from typing import Optional
+import logging
+import time
+from typing import Optional, Iterator, Dict, Any, Callable, List, Tuple
 from config.settings import AppSettings
+from core.metrics import GenerationMetrics, metrics_recorder, call_stats
+from core.cache import GenerationCache
+from core.model_router import ModelRouter
+from core.token_budget import token_budget, trim_to_sentence
+from core.resilience import (
+    CircuitBreaker, CircuitOpenError, get_circuit_breaker, is_retryable, retry_delay, error_kind
+)
+
+# Receives (event, data) pairs: request_sent, first_token, tokens, fallback, done, error
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+# Receives the exception when generate_story / stream_story swallow a failure
+ErrorCallback = Callable[[Exception], None]
+
+logger = logging.getLogger(__name__)
 
 class StoryEngine:
-    def __init__(self, client):
+    SYSTEM_MESSAGE = "You are a world-class storyteller known for creating deeply engaging, emotionally resonant narratives."
+
+    def __init__(self, client, cache: Optional[GenerationCache] = None,
+                 on_error: Optional[ErrorCallback] = None, max_retries: Optional[int] = None,
+                 router: Optional[ModelRouter] = None):
         self.client = client
+        self.cache = cache
+        self.on_error = on_error
         self.settings = AppSettings()
+        self.max_retries = self.settings.MAX_RETRIES if max_retries is None else max_retries
+        self.router = router or ModelRouter()
+        self.last_metrics: Optional[GenerationMetrics] = None
+        self.last_cache_hit = False
+    
+    def fork(self) -> "StoryEngine":
+        """A new engine sharing this one's client, cache, router and retry policy, for a concurrent call"""
+        return StoryEngine(self.client, cache=self.cache, on_error=self.on_error,
+                           max_retries=self.max_retries, router=self.router)
+    
+    def _build_request(self, prompt: str, creativity_level: float, stream: bool,
+                       model: Optional[str] = None, length: Optional[str] = None) -> Dict[str, Any]:
+        model = model or self.settings.DEFAULT_MODEL
+        return {
+            'messages': [
+                {
+                    "role": "system",
+                    "content": self.SYSTEM_MESSAGE
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            'model': model,
+            'temperature': creativity_level,
+            **token_budget.plan(length, model),
+            'top_p': self.settings.TOP_P,
+            'frequency_penalty': self.settings.FREQUENCY_PENALTY,
+            'presence_penalty': self.settings.PRESENCE_PENALTY,
+            'stream': stream,
+            # For streams this bounds the gap between chunks, so a stalled stream fails too
+            'timeout': self.settings.REQUEST_TIMEOUT_SECONDS
+        }
+    
+    def _cached_story(self, cache_key: str, use_cache: bool) -> Optional[str]:
+        self.last_cache_hit = False
+        if self.cache is None or not use_cache:
+            return None
+        story = self.cache.get(cache_key)
+        self.last_cache_hit = story is not None
+        return story
+    
+    def _store_story(self, cache_key: str, story: str):
+        if self.cache is not None and story:
+            self.cache.put(cache_key, story)
+    
+    def _prepare_for(self, request: Dict[str, Any], model: str, length: Optional[str]):
+        # The token budget follows the model's own words-to-tokens ratio
+        request['model'] = model
+        request.update(token_budget.plan(length, model))
+    
+    def _cache_key(self, request: Dict[str, Any], model: str, length: Optional[str]) -> str:
+        # Keyed on the model that would answer, so one model's story is never served as another's
+        self._prepare_for(request, model, length)
+        return GenerationCache.make_key(request)
     
-    def generate_story(self, prompt: str, creativity_level: float) -> Optional[str]:
+    def _record(self, metrics: GenerationMetrics):
+        self.last_metrics = metrics
+        metrics_recorder.record(metrics)
+    
+    def _breaker(self, model: str) -> CircuitBreaker:
+        return get_circuit_breaker(
+            model, self.settings.CIRCUIT_FAILURE_THRESHOLD, self.settings.CIRCUIT_RESET_SECONDS
+        )
+    
+    def _finish_call(self, model: str, started: float, error: Optional[Exception] = None):
+        call_stats.observe(model, time.perf_counter() - started, None if error is None else error_kind(error))
+        if error is None:
+            self._breaker(model).record_success()
+        else:
+            self._breaker(model).record_failure(error)
+    
+    def _send(self, request: Dict[str, Any], max_retries: int) -> Tuple[Any, float]:
+        """Send the request, retrying 429/5xx and timeouts with backoff that honors Retry-After.
+
+        Returns the response and when the successful attempt started; the
+        caller reports that attempt through _finish_call once it completes.
+        """
+        model = request['model']
+        breaker = self._breaker(model)
+        for attempt in range(max_retries + 1):
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                call_stats.observe(model, None, 'circuit_open')
+                raise
+            started = time.perf_counter()
+            try:
+                return self.client.chat.completions.create(**request), started
+            except Exception as e:
+                self._finish_call(model, started, e)
+                if attempt == max_retries or not is_retryable(e):
+                    raise
+                delay = retry_delay(e, attempt, self.settings.RETRY_BACKOFF_BASE, self.settings.RETRY_BACKOFF_CAP)
+                logger.warning("%s call failed (%s), retrying in %.1fs", model, e, delay)
+                time.sleep(delay)
+    
+    def _route(self, length: Optional[str], latency_budget: Optional[float]) -> List[str]:
+        return self.router.route(length, latency_budget)
+    
+    def _retries_for(self, models: List[str], index: int) -> int:
+        # With a fallback left, fail over straight away instead of backing off on a struggling model
+        return self.max_retries if index == len(models) - 1 else 0
+    
+    def _report_error(self, error: Exception):
+        if self.on_error is not None:
+            self.on_error(error)
+        else:
+            logger.error("Error generating story: %s", error)
+    
+    def _complete_with(self, request: Dict[str, Any], max_retries: int, length: Optional[str]) -> str:
+        metrics = GenerationMetrics(request['model'])
         try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a world-class storyteller known for creating deeply engaging, emotionally resonant narratives."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model=self.settings.DEFAULT_MODEL,
-                temperature=creativity_level,
-                max_tokens=self.settings.MAX_TOKENS,
-                top_p=self.settings.TOP_P,
-                frequency_penalty=self.settings.FREQUENCY_PENALTY,
-                presence_penalty=self.settings.PRESENCE_PENALTY,
-                stream=False
-            )
+            chat_completion, started = self._send(request, max_retries)
+            self._finish_call(request['model'], started)
             
-            return chat_completion.choices[0].message.content
+            usage = getattr(chat_completion, 'usage', None)
+            choice = chat_completion.choices[0]
+            metrics.finish(completion_tokens=getattr(usage, 'completion_tokens', None),
+                           finish_reason=getattr(choice, 'finish_reason', None))
+            story = choice.message.content
+            token_budget.observe(request['model'], length, story, metrics.completion_tokens, metrics.finish_reason)
+            if metrics.finish_reason == 'length':
+                # Out of budget mid-sentence: end on the last full sentence instead
+                story = trim_to_sentence(story)
+            return story
             
         except Exception as e:
-            st.error(f"Error generating story: {str(e)}")
-            return None
+            metrics.finish(error=str(e))
+            raise
+        finally:
+            self._record(metrics)
     
-    def generate_with_progress(self, prompt: str, creativity_level: float) -> Optional[str]:
-        import time
-        
-        # Progress tracking
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+    def complete(self, prompt: str, creativity_level: float, use_cache: bool = True,
+                 length: Optional[str] = None, latency_budget: Optional[float] = None) -> str:
+        """Generate the full story, raising on API errors once every routed model has failed"""
+        request = self._build_request(prompt, creativity_level, stream=False, length=length)
+        models = self._route(length, latency_budget)
+        cached = self._cached_story(self._cache_key(request, models[0], length), use_cache)
+        if cached is not None:
+            return cached
         
-        status_text.text("🧠 Analyzing your concept...")
-        progress_bar.progress(25)
-        time.sleep(0.5)
-        
-        status_text.text("🎨 Crafting characters and setting...")
-        progress_bar.progress(50)
-        time.sleep(0.5)
-        
-        status_text.text("📝 Weaving your masterpiece...")
-        progress_bar.progress(75)
-        
-        story = self.generate_story(prompt, creativity_level)
-        
-        progress_bar.progress(100)
-        status_text.text("✨ Story complete!")
-        time.sleep(0.5)
-        
-        # Clear progress indicators
-        progress_bar.empty()
-        status_text.empty()
+        for index, model in enumerate(models):
+            self._prepare_for(request, model, length)
+            try:
+                story = self._complete_with(request, self._retries_for(models, index), length)
+            except Exception as e:
+                if index == len(models) - 1:
+                    raise
+                logger.warning("%s failed (%s), falling back to %s", model, e, models[index + 1])
+                continue
+            self._store_story(GenerationCache.make_key(request), story)
+            return story
+    
+    def generate_story(self, prompt: str, creativity_level: float, use_cache: bool = True,
+                       length: Optional[str] = None, latency_budget: Optional[float] = None) -> Optional[str]:
+        try:
+            return self.complete(prompt, creativity_level, use_cache, length, latency_budget)
+        except Exception as e:
+            self._report_error(e)
+            return None
+    
+    def _stream_with(self, request: Dict[str, Any], max_retries: int, notify: ProgressCallback,
+                     final: bool, length: Optional[str], cache_key: str) -> Iterator[str]:
+        metrics = GenerationMetrics(request['model'], streamed=True)
+        completion_tokens = None
+        finish_reason = None
+        parts = []
+        started = None
+        try:
+            notify('request_sent', {'model': metrics.model})
+            # Retries happen before the first chunk only; a stream that fails midway is not replayed
+            stream, started = self._send(request, max_retries)
+            
+            for chunk in stream:
+                # Groq reports usage on the final chunk under x_groq
+                usage = getattr(getattr(chunk, 'x_groq', None), 'usage', None)
+                if usage is not None:
+                    completion_tokens = getattr(usage, 'completion_tokens', None)
+                
+                if not chunk.choices:
+                    continue
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    metrics.mark_chunk()
+                    if metrics.chunk_count == 1:
+                        notify('first_token', {'time_to_first_token': metrics.time_to_first_token})
+                    notify('tokens', {'tokens': metrics.chunk_count})
+                    parts.append(delta)
+                    yield delta
+            
+            metrics.finish(completion_tokens=completion_tokens, finish_reason=finish_reason)
+            self._finish_call(request['model'], started)
+            started = None
+            story = ''.join(parts)
+            token_budget.observe(request['model'], length, story, completion_tokens, finish_reason)
+            # Only complete streams are cached, never a partial story or one cut off by the token budget
+            if finish_reason != 'length':
+                self._store_story(cache_key, story)
+            notify('done', metrics.to_dict())
+            
+        except Exception as e:
+            metrics.finish(error=str(e))
+            if started is not None:
+                self._finish_call(request['model'], started, e)
+                started = None
+            # A failure that is about to be retried on another model is not the end of the stream
+            if final or metrics.chunk_count:
+                notify('error', metrics.to_dict())
+            raise
+        finally:
+            if metrics.finished_at is None:
+                # Consumer stopped reading before the stream ended
+                metrics.finish(completion_tokens=completion_tokens)
+            if started is not None:
+                self._finish_call(request['model'], started)
+            self._record(metrics)
+    
+    def iter_story(self, prompt: str, creativity_level: float,
+                   on_progress: Optional[ProgressCallback] = None,
+                   use_cache: bool = True, length: Optional[str] = None,
+                   latency_budget: Optional[float] = None) -> Iterator[str]:
+        """Yield the story as text deltas, raising on API errors once every routed model has failed"""
+        notify = on_progress or (lambda event, data: None)
+        request = self._build_request(prompt, creativity_level, stream=True, length=length)
+        models = self._route(length, latency_budget)
+        cached = self._cached_story(self._cache_key(request, models[0], length), use_cache)
+        if cached is not None:
+            notify('done', {'cached': True})
+            yield cached
+            return
         
-        return story
\ No newline at end of file
+        for index, model in enumerate(models):
+            self._prepare_for(request, model, length)
+            cache_key = GenerationCache.make_key(request)
+            final = index == len(models) - 1
+            streamed = False
+            try:
+                for delta in self._stream_with(request, self._retries_for(models, index), notify,
+                                               final, length, cache_key):
+                    streamed = True
+                    yield delta
+                return
+            except Exception as e:
+                # Once text has reached the caller, switching models would splice two stories together
+                if final or streamed:
+                    raise
+                logger.warning("%s failed (%s), falling back to %s", model, e, models[index + 1])
+                notify('fallback', {'model': model, 'fallback': models[index + 1], 'error': str(e)})
+    
+    def stream_story(self, prompt: str, creativity_level: float,
+                     on_progress: Optional[ProgressCallback] = None,
+                     use_cache: bool = True, length: Optional[str] = None,
+                     latency_budget: Optional[float] = None) -> Iterator[str]:
+        """Yield the story as text deltas while the model is still generating"""
+        try:
+            yield from self.iter_story(prompt, creativity_level, on_progress, use_cache, length, latency_budget)
+        except Exception as e:
+            self._report_error(e)
+    
+    def generate_with_progress(self, prompt: str, creativity_level: float,
+                               on_progress: Optional[ProgressCallback] = None,
+                               use_cache: bool = True, length: Optional[str] = None,
+                               latency_budget: Optional[float] = None) -> Optional[str]:
+        """Generate the full story while reporting real progress events to on_progress"""
+        story = ''.join(self.stream_story(prompt, creativity_level, on_progress, use_cache, length, latency_budget))
+        return story or None
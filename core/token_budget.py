@@ -0,0 +1,120 @@
+import math
+import re
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+from config.settings import AppSettings
+
+# A sentence ends at . ! or ? plus any closing quotes or brackets
+_SENTENCE_END = re.compile(r'[.!?]["\'”’)\]]*(?=\s|$)')
+
+def word_range(length: str) -> Tuple[int, int]:
+    """(low, high) from a WORD_TARGETS label, or from a literal range such as "600-800 words" """
+    low, high = re.findall(r'\d+', AppSettings.WORD_TARGETS.get(length, length))[:2]
+    return int(low), int(high)
+
+def target_deviation(words: int, length: str) -> float:
+    """Relative distance outside the target range: 0 inside it, negative when short, positive when long"""
+    low, high = word_range(length)
+    if words < low:
+        return (words - low) / low
+    if words > high:
+        return (words - high) / high
+    return 0.0
+
+def trim_to_sentence(text: str, min_keep: float = 0.5) -> str:
+    """Drop a trailing partial sentence, unless that would throw away most of the text"""
+    ends = list(_SENTENCE_END.finditer(text))
+    if not ends or ends[-1].end() < len(text) * min_keep:
+        return text
+    return text[:ends[-1].end()]
+
+class TokenBudget:
+    """Per-request max_tokens and stop policy derived from the word targets.
+
+    The words-to-tokens ratio is calibrated per model from the completion
+    token counts the API reports, since each model family has its own
+    tokenizer. Until a model has TOKEN_CALIBRATION_MIN_SAMPLES generations
+    the ratio falls back to AppSettings.TOKENS_PER_WORD.
+    """
+
+    def __init__(self, window: int = 200):
+        self.settings = AppSettings()
+        self._samples: Dict[str, deque] = {}
+        # model -> [words, tokens] summed over its samples; routing asks for the ratio on every request
+        self._totals: Dict[str, List[int]] = {}
+        self._window = window
+        self._lengths: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def tokens_per_word(self, model: Optional[str] = None) -> float:
+        with self._lock:
+            count = len(self._samples.get(model, ()))
+            words, tokens = self._totals.get(model, (0, 0))
+        if count < self.settings.TOKEN_CALIBRATION_MIN_SAMPLES:
+            return self.settings.TOKENS_PER_WORD
+        return tokens / words if words else self.settings.TOKENS_PER_WORD
+
+    def max_tokens(self, length: Optional[str], model: Optional[str] = None) -> int:
+        try:
+            _, high = word_range(length)
+        except (TypeError, ValueError):
+            # No length, or one without a word range
+            return self.settings.MAX_TOKENS
+        budget = high * self.tokens_per_word(model) * (1 + self.settings.TOKEN_BUDGET_HEADROOM)
+        # Round up to a multiple of 128 so small calibration drift keeps the cache key stable
+        return min(self.settings.MAX_TOKENS, int(math.ceil(budget / 128) * 128))
+
+    def plan(self, length: Optional[str], model: Optional[str] = None) -> Dict[str, Any]:
+        """Request fields for the budget: max_tokens and stop sequences"""
+        return {'max_tokens': self.max_tokens(length, model), 'stop': list(self.settings.STOP_SEQUENCES)}
+
+    def observe(self, model: str, length: Optional[str], story: str,
+                completion_tokens: Optional[int], finish_reason: Optional[str] = None):
+        words = len(story.split())
+        if not words:
+            return
+        with self._lock:
+            if completion_tokens:
+                samples = self._samples.setdefault(model, deque(maxlen=self._window))
+                totals = self._totals.setdefault(model, [0, 0])
+                if len(samples) == samples.maxlen:
+                    # The oldest sample is about to drop out of the window
+                    totals[0] -= samples[0][0]
+                    totals[1] -= samples[0][1]
+                samples.append((words, completion_tokens))
+                totals[0] += words
+                totals[1] += completion_tokens
+            if length in self.settings.WORD_TARGETS:
+                outcomes = self._lengths.setdefault(length, [])
+                outcomes.append({'words': words, 'truncated': finish_reason == 'length'})
+                del outcomes[:-self._window]
+
+    def report(self) -> Dict[str, Any]:
+        """Calibrated ratios, plus how far actual lengths land from each target"""
+        with self._lock:
+            models = list(self._samples)
+            lengths = {length: list(outcomes) for length, outcomes in self._lengths.items()}
+
+        report = {}
+        for length, outcomes in lengths.items():
+            deviations = [target_deviation(o['words'], length) for o in outcomes]
+            estimate = self.settings.WORD_ESTIMATES[length]
+            words = [o['words'] for o in outcomes]
+            report[length] = {
+                'stories': len(outcomes),
+                'target': self.settings.WORD_TARGETS[length],
+                'mean_words': sum(words) / len(words),
+                'within_target': sum(1 for d in deviations if d == 0) / len(deviations),
+                'mean_deviation': sum(deviations) / len(deviations),
+                'mean_offset_from_estimate': (sum(words) / len(words) - estimate) / estimate,
+                'truncated': sum(1 for o in outcomes if o['truncated']) / len(outcomes)
+            }
+        return {
+            'tokens_per_word': {model: self.tokens_per_word(model) for model in models},
+            'lengths': report
+        }
+
+# Process-wide calibration shared by every session
+token_budget = TokenBudget()
@@ -0,0 +1,61 @@
+"""Bulk export of a saved-story library.
+
+Streams every story (or a genre / favorites subset) from the SQLite store
+into a ZIP of text files, JSON Lines, Markdown or an EPUB, a batch at a
+time, so memory stays flat however large the library is:
+
+    python export.py library.epub
+    python export.py fantasy.jsonl --theme Fantasy --db stories.db
+
+An interrupted export resumes from its last checkpoint when run again with
+the same output path.
+"""
+import argparse
+import os
+import sys
+
+from config.settings import AppSettings
+from utils.export import EXPORT_FORMATS, BulkExport, select_story_ids
+from utils.story_backends import SQLiteStoryBackend
+
+def main():
+    extensions = {writer.extension: name for name, writer in EXPORT_FORMATS.items()}
+    parser = argparse.ArgumentParser(description="Export saved stories to ZIP, JSONL, Markdown or EPUB")
+    parser.add_argument('output', help="File to write; the format follows its extension unless --format is given")
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS))
+    parser.add_argument('--db', default=AppSettings.STORAGE_PATH, help=f"SQLite library (default: {AppSettings.STORAGE_PATH})")
+    parser.add_argument('--theme', help="Only stories of this genre")
+    parser.add_argument('--favorites', action='store_true', help="Only favorite stories")
+    parser.add_argument('--no-resume', action='store_true', help="Start over instead of resuming an interrupted export")
+    args = parser.parse_args()
+
+    fmt = args.format or extensions.get(os.path.splitext(args.output)[1].lstrip('.').lower())
+    if fmt is None:
+        sys.exit(f"Cannot tell the format from {args.output}; pass --format")
+    if not os.path.exists(args.db):
+        sys.exit(f"No story library at {args.db}")
+
+    backend = SQLiteStoryBackend(args.db)
+    export = BulkExport(backend, fmt, args.output)
+    resume_point = None if args.no_resume else export.resume_point()
+    if resume_point:
+        print(f"Resuming at {resume_point['done']:,} of {resume_point['total']:,} stories")
+    else:
+        story_ids = select_story_ids(backend, args.theme, args.favorites)
+        export = BulkExport(backend, fmt, args.output, story_ids)
+        if args.no_resume:
+            for path in (export.partial_path, export.checkpoint_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    for progress in export.run():
+        if progress['finished']:
+            print(
+                f"\n{progress['done']:,} stories, {progress['bytes'] / 1e6:.1f} MB in {progress['elapsed']:.1f}s "
+                f"({progress['stories_per_second']:.0f} stories/s) -> {progress['path']}"
+            )
+        else:
+            print(f"\r{progress['done']:,} / {progress['total']:,}", end="", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Bulk import of story archives into the SQLite library.
+
+Reads single-story TXT downloads, JSON / JSON Lines exports (one saved
+record plus "story" per object, as export.py writes them), batch.py result
+files, and directories or ZIP archives of any of these:
+
+    python import_stories.py archive/ --db stories.db
+    python import_stories.py library.jsonl old-stories.zip --rejects rejects.jsonl
+
+Invalid entries are skipped and reported. Search and duplicate indexing
+run after the load; if an import is interrupted, run the command again
+with no files to finish indexing what was loaded.
+"""
+import argparse
+import json
+import os
+
+from config.settings import AppSettings
+from utils.importer import StoryImporter
+from utils.story_backends import SQLiteStoryBackend
+
+def main():
+    parser = argparse.ArgumentParser(description="Import story archives into the SQLite library")
+    parser.add_argument('inputs', nargs='*', help="Files, directories or ZIP archives to import")
+    parser.add_argument('--db', default=AppSettings.STORAGE_PATH, help=f"SQLite library (default: {AppSettings.STORAGE_PATH})")
+    parser.add_argument('--batch-size', type=int, default=AppSettings.IMPORT_BATCH_SIZE,
+                        help=f"Stories per transaction (default: {AppSettings.IMPORT_BATCH_SIZE})")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processes computing search and duplicate indexes (default: one per CPU)")
+    parser.add_argument('--rejects', help="Write every rejected entry and its reason to this JSONL file")
+    args = parser.parse_args()
+
+    rejects = open(args.rejects, 'w', encoding='utf-8') if args.rejects else None
+    shown = 0
+
+    def report(source, message):
+        nonlocal shown
+        if rejects:
+            rejects.write(json.dumps({'source': source, 'error': message}, ensure_ascii=False) + "\n")
+        if shown < 10:
+            print(f"\n✗ {source}: {message}")
+            shown += 1
+
+    importer = StoryImporter(SQLiteStoryBackend(args.db), batch_size=args.batch_size,
+                             workers=args.workers, on_reject=report)
+    try:
+        for progress in importer.run(args.inputs):
+            if progress['finished']:
+                print(
+                    f"\n{progress['imported']:,} imported, {progress['rejected']:,} rejected in {progress['elapsed']:.1f}s "
+                    f"(load {progress['load_seconds']:.1f}s, indexing {progress['index_seconds']:.1f}s; "
+                    f"{progress['stories_per_second']:,.0f} stories/s)"
+                )
+            elif progress['phase'] == 'load':
+                print(f"\rLoaded {progress['imported']:,}", end="", flush=True)
+            else:
+                print(f"\rIndexed {progress['indexed']:,} / {progress['total']:,}", end="", flush=True)
+    finally:
+        if rejects:
+            rejects.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,10 @@
 import streamlit as st
 from ui.components import setup_page_config, render_header, render_footer
-from ui.sidebar import render_sidebar
-from ui.main_content import render_main_content
-from core.ai_client import get_groq_client
-from utils.storage import StoryStorage, init_session_state
+from ui.client import get_groq_client
 
 def main():
     # Initialize application
     setup_page_config()
-    init_session_state()
-    
-    # Initialize storage
-    storage = StoryStorage()
     
     # Check API key and get client
     client = get_groq_client()
@@ -19,6 +12,18 @@ def main():
         st.warning("Please configure your Groq API key to start generating stories.")
         return
     
+    # The key-entry page above needs none of the generation UI, so it is
+    # imported only once a client exists (cold pods render that page fastest)
+    from ui.sidebar import render_sidebar
+    from ui.main_content import render_main_content
+    from ui.dashboard import render_library_insights
+    from ui.storage import StoryStorage, init_session_state
+    
+    init_session_state()
+    
+    # Initialize storage
+    storage = StoryStorage()
+    
     # Render main UI
     render_header()
     
@@ -30,6 +35,7 @@ def main():
     
     # Show saved stories
     storage.render_saved_stories()
+    render_library_insights(storage.backend)
     
     # Render footer
     render_footer()
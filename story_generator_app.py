@@ -503,26 +503,16 @@ if st.secrets.get("GROQ_API_KEY") or os.getenv("GROQ_API_KEY"):
                 prompt, theme, length, tone, pov, creativity_level
             )
             
-            # Generation with progress
+            # Generation with progress (steps reflect real work, no artificial delay)
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            status_text.text("🧠 Analyzing your concept...")
-            progress_bar.progress(25)
-            time.sleep(0.5)
-            
-            status_text.text("🎨 Crafting characters and setting...")
-            progress_bar.progress(50)
-            time.sleep(0.5)
-            
             status_text.text("📝 Weaving your masterpiece...")
-            progress_bar.progress(75)
+            progress_bar.progress(25)
             
             generated_story = generate_story(client, story_prompt, creativity_level)
             
             progress_bar.progress(100)
-            status_text.text("✨ Story complete!")
-            time.sleep(0.5)
             
             # Clear progress indicators
             progress_bar.empty()
@@ -0,0 +1,21 @@
+from starlette.testclient import TestClient
+
+from api.app import create_app
+from benchmarks.fake_client import make_fake_client
+from utils.story_backends import InMemoryStoryBackend
+
+def post_generate(body):
+    app = create_app(client=make_fake_client(first_token_latency=0), backend=InMemoryStoryBackend())
+    with TestClient(app) as http:
+        return http.post('/generate', json={'user_prompt': "A lighthouse keeper waits for a ship", **body})
+
+def test_flags_must_be_booleans():
+    for name in ('use_cache', 'save'):
+        for value in ("false", "true", 1, None, []):
+            response = post_generate({name: value})
+            assert response.status_code == 422, (name, value)
+            assert response.json() == {'error': f"{name} must be true or false"}
+
+def test_boolean_flags_are_honoured():
+    assert 'saved' not in post_generate({'save': False}).json()
+    assert post_generate({'save': True, 'use_cache': True}).json()['saved']['saved'] is True
@@ -0,0 +1,39 @@
+from starlette.testclient import TestClient
+
+from api.app import create_app
+from benchmarks.fake_client import make_fake_client
+from utils.story_backends import InMemoryStoryBackend
+
+PROMPT = "A lighthouse keeper waits for a ship that never comes"
+# Parses as a three-section outline, and serves as each section's text too
+OUTLINE = "1. Fog | The keeper waits.\n2. Hull | A ship turns toward the light.\n3. Dawn | She rows out.\n"
+
+def stream_events(body, story=None):
+    client = make_fake_client(first_token_latency=0) if story is None else make_fake_client(story, 0)
+    app = create_app(client=client, backend=InMemoryStoryBackend())
+    with TestClient(app) as http:
+        response = http.post('/generate/stream', json=body)
+    return [block.split("\n", 1)[0][len("event: "):] for block in response.text.split("\n\n") if block]
+
+def last_chunk(events):
+    return max(index for index, event in enumerate(events) if event == 'chunk')
+
+def test_done_follows_the_last_chunk():
+    # The worker thread outruns the response at zero latency, which is when events used to overtake chunks
+    for _ in range(20):
+        events = stream_events({'user_prompt': PROMPT, 'length': "Short"})
+
+        assert events[0] == 'request_sent'
+        assert events.index('first_token') < events.index('chunk')
+        assert last_chunk(events) < events.index('done')
+        assert events[-2:] == ['done', 'result']
+
+def test_section_markers_sit_between_their_sections_text():
+    events = stream_events({'user_prompt': PROMPT, 'length': "Long", 'chapters': 3}, story=OUTLINE)
+    sections = [index for index, event in enumerate(events) if event == 'section']
+
+    assert len(sections) == 3
+    assert sections[0] < events.index('chunk')
+    for start, end in zip(sections, sections[1:] + [events.index('done')]):
+        assert 'chunk' in events[start + 1:end]
+    assert last_chunk(events) < events.index('done')
@@ -0,0 +1,70 @@
+import sqlite3
+
+from utils.corpus_analytics import CorpusAnalytics
+from utils.story_backends import InMemoryStoryBackend, SQLiteStoryBackend, build_story_record
+from utils.text_analyzer import analyze_text
+
+STORIES = [
+    ('Fantasy', 'Dark', '"Run," she said. The tower fell. Nobody saw the dragon leave.'),
+    ('Horror', 'Light-hearted', 'The ghost was polite. It asked for tea, and then for "more tea".'),
+    ('Fantasy', 'Light-hearted', 'A short one. It ends here!')
+]
+
+def record(theme, tone, body, analysed=True):
+    params = {'user_prompt': f"A story about {theme}", 'theme': theme, 'length': 'Short', 'tone': tone,
+              'pov': 'First Person', 'creativity_level': 0.7}
+    return build_story_record(params, analyze_text(body) if analysed else {'word_count': len(body.split())})
+
+def analysed(backend):
+    analytics = CorpusAnalytics()
+    analytics.refresh(backend)
+    return analytics
+
+def test_backends_store_the_same_metrics(tmp_path):
+    sqlite_backend = SQLiteStoryBackend(str(tmp_path / "stories.db"))
+    memory_backend = InMemoryStoryBackend()
+    for theme, tone, body in STORIES:
+        sqlite_backend.add_story(record(theme, tone, body), body)
+        memory_backend.add_story(record(theme, tone, body, analysed=False), body)
+
+    expected, actual = analysed(memory_backend), analysed(sqlite_backend)
+
+    assert actual.summary() == expected.summary()
+    assert actual.readability_by_tone() == expected.readability_by_tone()
+    assert actual.dialogue_vs_creativity() == expected.dialogue_vs_creativity()
+
+def test_refresh_reads_stored_metrics_not_bodies(tmp_path, monkeypatch):
+    backend = SQLiteStoryBackend(str(tmp_path / "stories.db"))
+    for theme, tone, body in STORIES:
+        backend.add_story(record(theme, tone, body), body)
+    analytics = analysed(backend)
+    monkeypatch.setattr(backend, 'get_story_body', lambda story_id: 1 / 0)
+
+    backend.delete_story(1)
+    backend.add_story(record(*STORIES[0]), STORIES[0][2])
+
+    assert analytics.refresh(backend) == {'added': 1, 'removed': 1}
+    assert analytics.summary()['stories'] == 3
+
+def test_imported_stories_count_once_indexed(tmp_path):
+    backend = SQLiteStoryBackend(str(tmp_path / "stories.db"))
+    backend.add_stories([(record(theme, tone, body, analysed=False), body) for theme, tone, body in STORIES],
+                        defer_indexes=True)
+    analytics = analysed(backend)
+    assert analytics.summary()['stories'] == 0
+
+    list(backend.build_deferred_indexes())
+
+    assert analytics.refresh(backend)['added'] == 3
+    assert analytics.summary()['stories'] == 3
+
+def test_stories_saved_before_metrics_were_stored_are_backfilled(tmp_path):
+    path = str(tmp_path / "stories.db")
+    backend = SQLiteStoryBackend(path)
+    for theme, tone, body in STORIES:
+        backend.add_story(record(theme, tone, body), body)
+    expected = analysed(backend).readability_by_tone()
+    with sqlite3.connect(path) as db:
+        db.execute("DELETE FROM story_stats")
+
+    assert analysed(SQLiteStoryBackend(path)).readability_by_tone() == expected
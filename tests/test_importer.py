@@ -0,0 +1,49 @@
+import json
+import zipfile
+
+from utils.importer import StoryImporter, iter_entries
+from utils.story_backends import SQLiteStoryBackend
+
+def story_line(prompt: str) -> str:
+    return json.dumps({
+        "prompt": prompt, "theme": "Fantasy", "settings": "Short/Dark/First Person",
+        "timestamp": "2024-05-01 12:00:00", "creativity_level": 0.7, "complexity": "Layered",
+        "story": f"The keeper of {prompt} counted ships that never came. Then one did."
+    }) + "\n"
+
+def run_import(tmp_path, paths):
+    rejects = []
+    importer = StoryImporter(SQLiteStoryBackend(str(tmp_path / "stories.db")), workers=1,
+                             on_reject=lambda source, message: rejects.append((source, message)))
+    progress = list(importer.run([str(path) for path in paths]))
+    return progress[-1], rejects
+
+def test_unreadable_files_are_rejected_without_stopping_the_import(tmp_path):
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    (archive / "a.jsonl").write_text(story_line("the lighthouse"), encoding="utf-8")
+    (archive / "b.txt").write_bytes("Genre: Fantasy\n\nOriginal Prompt:\ncaf\xe9".encode("latin-1"))
+    (archive / "c.zip").write_bytes(b"not a zip archive")
+    (archive / "d.jsonl").write_text(story_line("the harbour"), encoding="utf-8")
+
+    result, rejects = run_import(tmp_path, [archive])
+
+    assert result['imported'] == 2
+    assert result['rejected'] == 2
+    assert sorted(source.rsplit("/", 1)[-1] for source, _ in rejects) == ["b.txt", "c.zip"]
+
+def test_bad_member_does_not_end_the_rest_of_a_zip(tmp_path):
+    path = tmp_path / "stories.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("bad.jsonl", story_line("the lighthouse").encode("utf-8") + b"\xff\xfe\n")
+        archive.writestr("good.jsonl", story_line("the harbour"))
+
+    kinds = [(source.rsplit("!", 1)[-1], kind) for source, kind, _ in iter_entries([str(path)])]
+
+    assert ("bad.jsonl", "error") in kinds
+    assert kinds[-1] == ("good.jsonl:1", "json")
+
+def test_missing_file_is_an_error_entry(tmp_path):
+    entries = list(iter_entries([str(tmp_path / "missing.jsonl")]))
+
+    assert [kind for _, kind, _ in entries] == ["error"]
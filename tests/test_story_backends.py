@@ -0,0 +1,55 @@
+from utils.session_indexes import SessionIndexCache
+from utils.story_backends import InMemoryStoryBackend, SQLiteStoryBackend, SORT_OPTIONS, build_story_record
+
+BODIES = [
+    "The lighthouse keeper counted ships that never came, and then one did.",
+    "A dragon slept beneath the harbour while the town argued about taxes.",
+    "The lighthouse keeper counted ships that never came, and then one did!"
+]
+
+def record(theme="Fantasy"):
+    return build_story_record({'user_prompt': "A story", 'theme': theme, 'length': 'Short',
+                               'tone': 'Dark', 'pov': 'First Person'}, {'word_count': 12})
+
+def test_indexes_survive_eviction_and_stay_out_of_the_session():
+    cache = SessionIndexCache(max_entries=2)
+    backend = InMemoryStoryBackend(indexes=cache)
+    for body in BODIES:
+        backend.add_story(record(), body)
+    assert [hit['id'] for hit in backend.search_stories("lighthouse")] == [3, 1]
+    assert [story_id for story_id, _ in backend.find_near_duplicates(BODIES[0], 0.8)] == [1, 3]
+
+    # Another session's indexes push these out; a delete while evicted must still be reflected
+    other = InMemoryStoryBackend(indexes=cache)
+    other.add_story(record(), BODIES[1])
+    other.search_stories("dragon")
+    other.find_near_duplicates(BODIES[1], 0.8)
+    backend.delete_story(3)
+
+    assert [hit['id'] for hit in backend.search_stories("lighthouse")] == [1]
+    assert [story_id for story_id, _ in backend.find_near_duplicates(BODIES[0], 0.8)] == [1]
+    assert cache.stats()['evictions'] >= 2
+
+def test_collected_store_drops_its_indexes():
+    cache = SessionIndexCache(max_entries=4)
+    backend = InMemoryStoryBackend(indexes=cache)
+    backend.add_story(record(), BODIES[0])
+    backend.search_stories("lighthouse")
+    assert cache.stats()['entries'] == 1
+
+    del backend
+
+    assert cache.stats()['entries'] == 0
+
+def test_backends_page_in_the_same_order(tmp_path):
+    backends = [InMemoryStoryBackend(), SQLiteStoryBackend(str(tmp_path / "stories.db"))]
+    for backend in backends:
+        for number, theme in enumerate(["Horror", "Fantasy", "Horror", "Fantasy", "Fantasy", "Comedy"]):
+            story_id = backend.add_story({**record(theme), 'timestamp': "2024-05-01 12:00:00"}, f"Story {number}.")
+            if number % 2:
+                backend.set_favorite(story_id, True)
+
+    for sort_by in SORT_OPTIONS:
+        pages = [[[story['id'] for story in backend.list_stories(sort_by=sort_by, offset=offset, limit=2)]
+                  for offset in (0, 2, 4)] for backend in backends]
+        assert pages[0] == pages[1], sort_by
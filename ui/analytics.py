@@ -0,0 +1,33 @@
+import streamlit as st
+from typing import Dict, Any, Optional
+from utils.analytics import StoryAnalytics
+from utils.text_analyzer import analyze_text
+
+class StoryAnalyticsView(StoryAnalytics):
+    """StoryAnalytics plus the Streamlit widgets that display it"""
+    
+    def display_analytics(self, analytics_data: Dict[str, Any]):
+        st.subheader("📊 Story Analytics")
+        col1, col2, col3, col4, col5 = st.columns(5)
+        
+        with col1:
+            st.metric("Words", analytics_data['word_count'])
+        with col2:
+            st.metric("Sentences", analytics_data['sentence_count'])
+        with col3:
+            st.metric("Avg Sentence", f"{analytics_data['avg_sentence_length']:.1f}")
+        with col4:
+            st.metric("Read Time", f"{analytics_data['read_time']} min")
+        with col5:
+            st.metric("Dialogue", f"{analytics_data['dialogue_count']} exchanges")
+    
+    def display_style_analysis(self, story: str, analytics_data: Optional[Dict[str, Any]] = None):
+        # Reuse metrics from a previous analysis instead of rescanning the story
+        data = analytics_data if analytics_data and 'action_level' in analytics_data else analyze_text(story)
+        
+        st.info(f'''
+        **Style Analysis:**
+        - Dialogue: {data['dialogue_count']} exchanges  
+        - Action Level: {data['action_level']}
+        - Pacing: {data['pacing']}
+        ''')
@@ -0,0 +1,39 @@
+import streamlit as st
+import os
+from typing import Optional, TYPE_CHECKING
+from config.settings import get_api_key, get_base_url
+from core.ai_client import create_groq_client
+
+if TYPE_CHECKING:
+    from groq import Groq
+
+@st.cache_resource
+def _client_for_key(api_key: str, base_url: Optional[str] = None) -> "Groq":
+    return create_groq_client(api_key, base_url)
+
+def init_groq_client() -> Optional["Groq"]:
+    # Cached per key, so a key entered in the app takes effect on the next run
+    api_key = get_api_key()
+    if not api_key:
+        return None
+    return _client_for_key(api_key, get_base_url())
+
+def get_groq_client():
+    client = init_groq_client()
+    if not client:
+        handle_missing_api_key()
+        return None
+    return client
+
+def handle_missing_api_key():
+    with st.expander("🔑 API Configuration", expanded=True):
+        api_key_input = st.text_input(
+            "Enter your Groq API Key:",
+            type="password",
+            help="Get your free API key from https://console.groq.com/"
+        )
+        
+        if api_key_input:
+            os.environ["GROQ_API_KEY"] = api_key_input
+            st.success("API Key set! Advanced story generation is now available.")
+            st.rerun()
@@ -1,5 +1,9 @@
 import streamlit as st
+import time
+from typing import Iterable, Optional
 from config.settings import AppSettings
+from core.token_budget import target_deviation
+from utils.text_analyzer import StreamingTextAnalyzer
 
 def setup_page_config():
     settings = AppSettings()
@@ -13,10 +17,8 @@ def render_header():
     st.title("📚 AI Story Generator Pro")
     st.markdown("*Create exceptional stories with advanced AI prompting techniques*")
 
-def render_story_display(story: str):
-    st.header("📖 Your Masterpiece")
-    
-    st.markdown(f'''
+def _story_html(story: str) -> str:
+    return f'''
     <div style="
         background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
         padding: 30px;
@@ -30,14 +32,121 @@ def render_story_display(story: str):
     ">
     {story.replace(chr(10), '<br><br>')}
     </div>
-    ''', unsafe_allow_html=True)
+    '''
+
+def render_story_display(story: str):
+    st.header("📖 Your Masterpiece")
+    st.markdown(_story_html(story), unsafe_allow_html=True)
+
+def render_story_stream(chunks: Iterable[str], analyzer: Optional[StreamingTextAnalyzer] = None,
+                        refresh_interval: float = 0.05) -> str:
+    """Render the story progressively as chunks arrive and return the full text"""
+    st.header("📖 Your Masterpiece")
+    placeholder = st.empty()
+    live_stats = st.empty() if analyzer is not None else None
+    
+    parts = []
+    last_render = 0.0
+    for chunk in chunks:
+        parts.append(chunk)
+        if analyzer is not None:
+            analyzer.feed(chunk)
+        # Throttle redraws so fast streams don't flood the websocket
+        now = time.perf_counter()
+        if now - last_render >= refresh_interval:
+            placeholder.markdown(_story_html(''.join(parts) + ' ▌'), unsafe_allow_html=True)
+            if live_stats is not None:
+                stats = analyzer.snapshot(num_keywords=0)
+                live_stats.caption(
+                    f"✍️ {stats['word_count']} words • {stats['sentence_count']} sentences • "
+                    f"{stats['dialogue_count']} dialogue exchanges"
+                )
+            last_render = now
+    
+    story = ''.join(parts)
+    if story:
+        placeholder.markdown(_story_html(story), unsafe_allow_html=True)
+    else:
+        placeholder.empty()
+    if live_stats is not None:
+        live_stats.empty()
+    return story
+
+class GenerationProgress:
+    """Progress bar driven by StoryEngine events instead of timed steps"""
+    
+    def __init__(self, target_words: int):
+        settings = AppSettings()
+        self.target_tokens = max(1, int(target_words * settings.TOKENS_PER_WORD))
+        self.progress_bar = st.progress(0)
+        self.status_text = st.empty()
+        self._percent = 0
+    
+    def _update(self, percent: int, status: str = None):
+        percent = max(0, min(100, percent))
+        if percent != self._percent:
+            self.progress_bar.progress(percent)
+            self._percent = percent
+        if status:
+            self.status_text.text(status)
+    
+    def __call__(self, event: str, data: dict = None):
+        data = data or {}
+        if event == 'prompt_built':
+            self._update(5, "🧠 Concept analyzed, prompt ready...")
+        elif event == 'request_sent':
+            self._update(10, "🎨 Waiting for the storyteller...")
+        elif event == 'fallback':
+            self._update(10, f"🔁 {data['model']} is struggling, switching to {data['fallback']}...")
+        elif event == 'outline_sent':
+            self._update(8, f"🗺️ Planning {data['sections']} chapters...")
+        elif event == 'outline':
+            self._update(10, f"🎨 Writing {len(data['titles'])} chapters in parallel..." if data['titles'] else None)
+        elif event == 'section':
+            self.status_text.text(f"📖 Chapter {data['index'] + 1} of {data['sections']}: {data['title']}")
+        elif event == 'first_token':
+            self._update(15, "📝 Weaving your masterpiece...")
+        elif event == 'tokens':
+            # Only redraw when the integer percentage moves
+            percent = 15 + int(80 * min(1.0, data['tokens'] / self.target_tokens))
+            if percent != self._percent:
+                self._update(percent)
+        elif event in ('done', 'error'):
+            self.clear()
+    
+    def clear(self):
+        self.progress_bar.empty()
+        self.status_text.empty()
+
+def render_generation_error(error: Exception):
+    st.error(f"Error generating story: {str(error)}")
+
+def render_generation_metrics(metrics):
+    if metrics is None or metrics.error:
+        return
+    ttft = metrics.time_to_first_token
+    rate = metrics.tokens_per_second
+    st.caption(
+        f"⚡ {metrics.model} • First token in {ttft:.2f}s • "
+        f"{metrics.token_count} tokens at {rate or 0:.1f} tokens/s • "
+        f"{metrics.total_time:.1f}s total"
+    )
+
+def render_length_check(word_count: int, length: str):
+    target = AppSettings.WORD_TARGETS[length]
+    deviation = target_deviation(word_count, length)
+    if deviation == 0:
+        st.caption(f"🎯 {word_count} words, within the {target} target")
+    else:
+        st.caption(f"🎯 {word_count} words, {abs(deviation):.0%} {'over' if deviation > 0 else 'under'} the {target} target")
 
 def render_footer():
+    models = " • ".join(AppSettings.MODELS)
     st.markdown("---")
-    st.markdown('''
+    st.markdown(f'''
     <div style="text-align: center; color: #666; padding: 20px;">
         <h4>🎭 AI Story Generator Pro</h4>
         <p>Powered by Advanced Prompting Techniques & Groq AI</p>
-        <p><small>Creating masterpieces with Llama-3.1-70B • Built with expertise and creativity</small></p>
+        <p><small>Creating masterpieces with {models} • Built with expertise and creativity</small></p>
     </div>
     ''', unsafe_allow_html=True)
\ No newline at end of file
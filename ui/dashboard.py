@@ -0,0 +1,114 @@
+import contextlib
+import threading
+import streamlit as st
+from typing import TYPE_CHECKING, ContextManager, Tuple
+from config.settings import AppSettings
+from utils.story_backends import StoryBackend
+
+if TYPE_CHECKING:
+    from utils.corpus_analytics import CorpusAnalytics
+
+@st.cache_resource
+def get_shared_corpus_analytics(path: str) -> Tuple["CorpusAnalytics", threading.Lock]:
+    # The SQLite library is shared across sessions, so its analytics are too; the lock
+    # keeps concurrent reruns from refreshing (or reading mid-refresh) at the same time
+    from utils.corpus_analytics import CorpusAnalytics
+    return CorpusAnalytics(), threading.Lock()
+
+def get_corpus_analytics() -> Tuple["CorpusAnalytics", ContextManager]:
+    if AppSettings.STORAGE_BACKEND == "sqlite":
+        return get_shared_corpus_analytics(AppSettings.STORAGE_PATH)
+    if "corpus_analytics" not in st.session_state:
+        from utils.corpus_analytics import CorpusAnalytics
+        st.session_state.corpus_analytics = CorpusAnalytics()
+    # A session's own analytics are only touched by its script thread
+    return st.session_state.corpus_analytics, contextlib.nullcontext()
+
+def render_library_insights(backend: StoryBackend):
+    if not backend.count():
+        return
+
+    # An expander runs its body even while collapsed; the toggle keeps the analytics
+    # (and NumPy) off every page load until someone opens the panel
+    if not st.toggle("📈 Library Insights", key="show_library_insights"):
+        return
+
+    with st.container(border=True):
+        from utils.corpus_analytics import histogram_labels
+        analytics, lock = get_corpus_analytics()
+        with lock:
+            analytics.refresh(backend)
+            summary = analytics.summary()
+            histograms = analytics.word_count_histograms()
+            by_tone = analytics.readability_by_tone()
+            dialogue = analytics.dialogue_vs_creativity()
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Stories", summary['stories'])
+        col2.metric("Total Words", f"{summary['total_words']:,}")
+        col3.metric("Median Length", f"{summary['median_words']:.0f} words")
+
+        st.subheader("Word Count by Genre")
+        if histograms['genres']:
+            st.bar_chart({'words': histogram_labels(histograms['edges']), **histograms['genres']}, x='words')
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Readability by Tone")
+            st.bar_chart({
+                'tone': list(by_tone),
+                'grade level': [row['mean'] for row in by_tone.values()]
+            }, x='tone')
+        with col2:
+            st.subheader("Dialogue vs Creativity")
+            st.bar_chart({
+                'creativity': list(dialogue['levels']),
+                'dialogue per 1k words': [row['mean_density'] for row in dialogue['levels'].values()]
+            }, x='creativity')
+            if dialogue['correlation'] is not None:
+                st.caption(f"Correlation: {dialogue['correlation']:.2f}")
+
+        st.subheader("Near-Duplicates")
+        if st.button("🔎 Scan library for near-duplicates"):
+            render_duplicate_report(backend)
+
+        st.subheader("Session Memory")
+        if st.button("🧠 Measure this session"):
+            render_session_memory()
+
+def render_duplicate_report(backend: StoryBackend):
+    groups = backend.near_duplicate_groups(AppSettings.DUPLICATE_THRESHOLD)
+    if not groups:
+        st.success("No near-duplicate stories found.")
+        return
+
+    redundant = sum(len(group['story_ids']) - 1 for group in groups)
+    label = "group" if len(groups) == 1 else "groups"
+    st.caption(f"{len(groups)} {label} of near-identical stories • {redundant} could be removed")
+    rows = []
+    for group in groups:
+        first = backend.get_story(group['story_ids'][0]) or {}
+        rows.append({
+            'Stories': ", ".join(f"#{story_id}" for story_id in group['story_ids']),
+            'Similarity': f"{group['similarity']:.0%}",
+            'Genre': first.get('theme', ''),
+            'Prompt': (first.get('prompt') or '')[:80]
+        })
+    st.dataframe(rows, use_container_width=True)
+
+def render_session_memory():
+    from utils.memory import session_memory_report
+    state = {key: st.session_state[key] for key in st.session_state.keys()}
+    report = session_memory_report(state)
+    blobs = report['blob_store']
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Session State", f"{report['total_bytes'] / 1024:,.1f} KB")
+    col2.metric("Shared Story Bodies", f"{blobs['stored_bytes'] / 1024:,.1f} KB")
+    if blobs['compression_ratio']:
+        col3.metric("Compression", f"{blobs['compression_ratio']:.1f}x")
+    st.dataframe([
+        {'Key': key, 'KB': round(size / 1024, 1)} for key, size in report['entries'].items()
+    ], use_container_width=True)
+    st.caption("Story bodies live in a compressed store shared by every session, and search and duplicate "
+               "indexes in a cache shared by every session; neither is counted above.")
@@ -0,0 +1,29 @@
+import streamlit as st
+import re
+from typing import List
+
+class UIHelpers:
+    @staticmethod
+    def create_progress_tracker(steps: List[str]) -> None:
+        """Create a visual progress tracker"""
+        progress_container = st.container()
+        with progress_container:
+            cols = st.columns(len(steps))
+            for i, (col, step) in enumerate(zip(cols, steps)):
+                with col:
+                    st.markdown(f"**{i+1}.** {step}")
+    
+    @staticmethod
+    def show_success_animation():
+        """Show a success animation"""
+        st.balloons()
+        st.success("🎉 Masterpiece Created!")
+    
+    @staticmethod
+    def format_story_for_display(story: str) -> str:
+        """Format story text for better display"""
+        # Add proper paragraph spacing
+        story = story.replace('\n', '\n\n')
+        # Ensure dialogue is properly formatted
+        story = re.sub(r'(".*?")', r'<em>\1</em>', story)
+        return story
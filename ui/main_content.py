@@ -1,12 +1,34 @@
+import uuid
+from typing import Iterator
 import streamlit as st
-from ui.components import render_header, render_story_display
+from ui.components import (
+    render_header, render_story_stream, render_generation_metrics, render_generation_error,
+    render_length_check, GenerationProgress
+)
+from core.chapters import ChapteredStory
 from core.story_engine import StoryEngine
+from core.scheduler import RequestScheduler, get_scheduler
 from core.prompt_builder import PromptBuilder
-from utils.analytics import StoryAnalytics
-from utils.storage import StoryStorage
-from data.examples import get_example_prompts
+from core.cache import GenerationCache
+from utils.text_analyzer import StreamingTextAnalyzer
+from ui.storage import StoryStorage
 from config.settings import AppSettings
 
+@st.cache_resource
+def get_generation_cache() -> GenerationCache:
+    # One cache per server process, shared by every session
+    return GenerationCache(
+        max_entries=AppSettings.CACHE_MAX_ENTRIES,
+        disk_path=AppSettings.CACHE_DISK_PATH,
+        ttl_seconds=AppSettings.CACHE_TTL_SECONDS,
+        max_disk_bytes=AppSettings.CACHE_MAX_DISK_MB * 1024 * 1024
+    )
+
+def request_new_variation():
+    # Regenerate on the next run without reading from the cache
+    st.session_state.generate_story = True
+    st.session_state.bypass_cache = True
+
 def render_main_content(client, story_params: dict):
     render_header()
     
@@ -30,6 +52,7 @@ def render_story_input_section(story_params: dict):
     st.header("✨ Your Story Vision")
     
     # Get example prompts
+    from data.examples import get_example_prompts
     example_prompts = get_example_prompts()
     
     # Story concept input
@@ -86,14 +109,37 @@ def render_story_profile(story_params: dict):
     read_time = max(1, avg_words[story_params['length']] // 200)
     st.success(f"📖 Est. Reading Time: {read_time}-{read_time+1} min")
 
+def get_session_id() -> str:
+    # Identifies this browser session to the scheduler, so concurrent sessions share capacity fairly
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+def scheduled(chunks: Iterator[str], scheduler: RequestScheduler, session_id: str) -> Iterator[str]:
+    """Stream chunks while holding one of the process-wide in-flight slots"""
+    with scheduler.blocking_slot(session_id):
+        yield from chunks
+
 def handle_story_generation(client, story_params: dict):
     if 'current_prompt' not in st.session_state:
         return
     
     # Initialize components
-    story_engine = StoryEngine(client)
+    cache = get_generation_cache() if story_params.get('use_cache') else None
+    story_engine = StoryEngine(client, cache=cache, on_error=render_generation_error)
+    use_cache = not st.session_state.pop('bypass_cache', False)
     prompt_builder = PromptBuilder()
-    analytics = StoryAnalytics()
+    # Generation from every session goes through the same in-flight cap as the API and batch runs
+    scheduler = get_scheduler()
+    session_id = get_session_id()
+    if story_params.get('chaptered'):
+        # Same stream_story / last_metrics interface, written as an outline plus parallel chapters,
+        # each call taking its own slot
+        story_engine = ChapteredStory(story_engine, prompt_builder,
+                                      slot=lambda: scheduler.blocking_slot(session_id))
+    # Analytics widgets are only needed once a story is being generated
+    from ui.analytics import StoryAnalyticsView
+    analytics = StoryAnalyticsView()
     storage = StoryStorage()
     
     # Build the master prompt
@@ -102,20 +148,29 @@ def handle_story_generation(client, story_params: dict):
         **story_params
     }
     
+    progress = GenerationProgress(AppSettings.WORD_ESTIMATES[story_params['length']])
     master_prompt = prompt_builder.build_master_prompt(prompt_params)
+    progress('prompt_built')
     
-    # Generate story with progress
-    generated_story = story_engine.generate_with_progress(
-        master_prompt, 
-        story_params['creativity_level']
+    # Stream the story onto the page as it is generated, analysing chunks as they land
+    text_analyzer = StreamingTextAnalyzer()
+    chunks = story_engine.stream_story(
+        master_prompt, story_params['creativity_level'],
+        on_progress=progress, use_cache=use_cache, length=story_params['length']
     )
+    if not story_params.get('chaptered'):
+        chunks = scheduled(chunks, scheduler, session_id)
+    generated_story = render_story_stream(chunks, analyzer=text_analyzer)
+    progress.clear()
+    if story_engine.last_cache_hit:
+        st.caption(f"♻️ Served from cache • hit rate {cache.stats()['hit_rate']:.0%}")
+    else:
+        render_generation_metrics(story_engine.last_metrics)
     
     if generated_story:
-        # Display the story
-        render_story_display(generated_story)
-        
-        # Show analytics
-        analytics_data = analytics.analyze_story(generated_story)
+        # Show analytics (already computed while streaming)
+        analytics_data = text_analyzer.snapshot()
+        render_length_check(analytics_data['word_count'], story_params['length'])
         analytics.display_analytics(analytics_data)
         
         # Story actions
@@ -131,18 +186,25 @@ def render_story_actions(story: str, prompt_params: dict, analytics_data: dict,
             st.success("Story formatted for copying!")
     
     with col2:
-        if st.button("🔄 New Variation"):
-            st.rerun()
+        st.button("🔄 New Variation", on_click=request_new_variation)
     
     with col3:
         if st.button("📊 Style Analysis"):
-            analytics = StoryAnalytics()
-            analytics.display_style_analysis(story)
+            from ui.analytics import StoryAnalyticsView
+            analytics = StoryAnalyticsView()
+            analytics.display_style_analysis(story, analytics_data)
     
     with col4:
         if st.button("💾 Save Story"):
             storage.save_story(story, prompt_params, analytics_data)
-            st.success("Masterpiece saved!")
+            if storage.last_duplicates and AppSettings.DUPLICATE_POLICY == "skip":
+                st.info("A near-identical story is already saved.")
+            else:
+                st.success("Masterpiece saved!")
+                if storage.last_duplicates:
+                    st.warning(f"Very similar to {len(storage.last_duplicates)} saved "
+                               f"{'story' if len(storage.last_duplicates) == 1 else 'stories'} "
+                               f"({storage.last_duplicates[0][1]:.0%} overlap).")
     
     with col5:
         if st.button("🎨 Export"):
@@ -1,6 +1,5 @@
 import streamlit as st
 from config.settings import AppSettings
-from data.examples import get_example_prompts
 
 def render_sidebar() -> dict:
     settings = AppSettings()
@@ -22,6 +21,13 @@ def render_sidebar() -> dict:
             help="Short: Focused impact, Medium: Rich development, Long: Epic depth"
         )
         
+        # Only lengths with a default section count are worth splitting
+        chaptered = length in settings.CHAPTER_SECTIONS and st.checkbox(
+            "Write in chapters",
+            value=True,
+            help="Plan an outline first, then write the chapters in parallel. Much faster for long stories"
+        )
+        
         st.subheader("🎨 Artistic Direction")
         
         # Tone selection
@@ -58,11 +64,19 @@ def render_sidebar() -> dict:
             help="Controls plot intricacy and character development depth"
         )
         
+        use_cache = st.checkbox(
+            "Reuse identical generations",
+            value=False,
+            help="Serve a cached story when the concept and every setting match a previous request. 'New Variation' always generates fresh."
+        )
+        
         return {
             'theme': theme,
             'length': length,
             'tone': tone,
             'pov': pov,
             'creativity_level': creativity_level,
-            'complexity': complexity
+            'complexity': complexity,
+            'use_cache': use_cache,
+            'chaptered': chaptered
         }
\ No newline at end of file
@@ -0,0 +1,258 @@
+import streamlit as st
+import os
+import time
+import uuid
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+import json
+from config.settings import AppSettings
+from utils.export import EXPORT_FORMATS, BulkExport, export_text, select_story_ids
+from utils.story_backends import (
+    StoryBackend, InMemoryStoryBackend, SQLiteStoryBackend, SORT_OPTIONS, build_story_record
+)
+
+@st.cache_resource
+def get_sqlite_backend(path: str) -> SQLiteStoryBackend:
+    # One store per process, shared by every session
+    return SQLiteStoryBackend(path)
+
+def get_story_backend() -> StoryBackend:
+    if AppSettings.STORAGE_BACKEND == "sqlite":
+        return get_sqlite_backend(AppSettings.STORAGE_PATH)
+    if "story_backend" not in st.session_state:
+        st.session_state.story_backend = InMemoryStoryBackend()
+    return st.session_state.story_backend
+
+class StoryStorage:
+    def __init__(self, backend: Optional[StoryBackend] = None):
+        self.init_session_state()
+        self.backend = backend or get_story_backend()
+        # (story_id, similarity) of saved stories close to the last one saved
+        self.last_duplicates: List[Tuple[int, float]] = []
+    
+    def init_session_state(self):
+        if "story_history" not in st.session_state:
+            st.session_state.story_history = deque(maxlen=AppSettings.STORY_HISTORY_LIMIT)
+    
+    def save_story(self, story: str, prompt_params: Dict[str, Any], analytics_data: Dict[str, Any]) -> int:
+        self.last_duplicates = []
+        if AppSettings.DUPLICATE_POLICY != "off":
+            self.last_duplicates = self.backend.find_near_duplicates(story, AppSettings.DUPLICATE_THRESHOLD)
+            if self.last_duplicates and AppSettings.DUPLICATE_POLICY == "skip":
+                return self.last_duplicates[0][0]
+        
+        story_data = build_story_record(prompt_params, analytics_data)
+        
+        story_id = self.backend.add_story(story_data, story)
+        st.session_state.story_history.append({
+            "action": "saved",
+            "story_id": story_id,
+            "timestamp": story_data["timestamp"]
+        })
+        return story_id
+    
+    def export_story(self, story: str, prompt_params: Dict[str, Any]):
+        """Create downloadable formats"""
+        st.download_button(
+            label="📄 Download as Text",
+            data=export_text(prompt_params, story),
+            file_name=f"story_{int(time.time())}.txt",
+            mime="text/plain"
+        )
+    
+    def find_duplicate_groups(self) -> List[Dict[str, Any]]:
+        return self.backend.near_duplicate_groups(AppSettings.DUPLICATE_THRESHOLD)
+    
+    def get_saved_stories(self) -> List[Dict[str, Any]]:
+        return self.backend.list_stories()
+    
+    def get_story_body(self, story_id: int) -> Optional[str]:
+        return self.backend.get_story_body(story_id)
+    
+    def delete_story(self, story_id: int):
+        self.backend.delete_story(story_id)
+        st.session_state.story_history.append({
+            "action": "deleted",
+            "story_id": story_id,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        })
+    
+    def favorite_story(self, story_id: int):
+        self.backend.set_favorite(story_id, True)
+    
+    def unfavorite_story(self, story_id: int):
+        self.backend.set_favorite(story_id, False)
+    
+    def is_favorite(self, story_id: int) -> bool:
+        return self.backend.is_favorite(story_id)
+    
+    def render_saved_stories(self):
+        """Render the saved stories section"""
+        story_count = self.backend.count()
+        if not story_count:
+            st.info("No saved stories yet. Create your first masterpiece!")
+            return
+        
+        st.markdown("---")
+        with st.expander(f"📚 Your Masterpieces ({story_count})", expanded=False):
+            
+            # Filter and sort options
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                sort_by = st.selectbox("Sort by:", SORT_OPTIONS)
+            with col2:
+                filter_genre = st.selectbox("Filter Genre:", ["All"] + self.backend.themes())
+            with col3:
+                show_favorites_only = st.checkbox("Favorites Only")
+            
+            theme = None if filter_genre == "All" else filter_genre
+            self.render_bulk_export(theme, show_favorites_only)
+            query = st.text_input("🔍 Search stories", placeholder="Character names, places, phrases...")
+            if query.strip():
+                self._render_search_results(query, theme, show_favorites_only)
+                return
+            
+            total = self.backend.count_stories(theme=theme, favorites_only=show_favorites_only)
+            if not total:
+                st.info("No stories match these filters.")
+                return
+            
+            # Only the visible page is fetched and rendered
+            page_size = AppSettings.SAVED_STORIES_PAGE_SIZE
+            page_count = (total + page_size - 1) // page_size
+            page = 1
+            if page_count > 1:
+                page = int(st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1))
+            offset = (page - 1) * page_size
+            
+            stories = self.backend.list_stories(
+                theme=theme,
+                favorites_only=show_favorites_only,
+                sort_by=sort_by,
+                offset=offset,
+                limit=page_size
+            )
+            st.caption(f"Showing {offset + 1}–{offset + len(stories)} of {total}")
+            
+            # Display stories
+            for i, story_data in enumerate(stories):
+                self._render_story_card(story_data, offset + i)
+    
+    def render_bulk_export(self, theme: Optional[str], favorites_only: bool):
+        """Export every story matching the filters to a file, resuming a run a rerun interrupted"""
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            fmt = st.selectbox("Export format:", list(EXPORT_FORMATS),
+                               format_func=lambda name: EXPORT_FORMATS[name].label)
+        selection = (fmt, theme, favorites_only)
+        job = st.session_state.get("bulk_export")
+        if job is not None and job["selection"] != selection:
+            job = None
+        
+        resume_point = None
+        if job is not None and not job["finished"]:
+            resume_point = BulkExport(self.backend, fmt, job["path"]).resume_point()
+        with col2:
+            st.write("")
+            if resume_point:
+                label = f"📦 Resume export ({resume_point['done']}/{resume_point['total']})"
+            else:
+                label = "📦 Export stories"
+            start = st.button(label, key="bulk_export_start")
+        
+        if start:
+            if resume_point is None:
+                previous = st.session_state.get("bulk_export")
+                if previous is not None:
+                    # One export file per session: a new export replaces the last one on disk
+                    self._discard_export(previous)
+                os.makedirs(AppSettings.EXPORT_DIR, exist_ok=True)
+                path = os.path.join(AppSettings.EXPORT_DIR, f"stories-{uuid.uuid4().hex[:12]}.{EXPORT_FORMATS[fmt].extension}")
+                job = {"selection": selection, "path": path, "finished": False}
+                # Stored before running so a rerun that interrupts the export can resume it
+                st.session_state.bulk_export = job
+                export = BulkExport(self.backend, fmt, path, select_story_ids(self.backend, theme, favorites_only))
+            else:
+                export = BulkExport(self.backend, fmt, job["path"])
+            progress_bar = st.progress(0.0)
+            for progress in export.run():
+                total = progress["total"] or 1
+                progress_bar.progress(progress["done"] / total,
+                                      text=f"{progress['done']:,} of {progress['total']:,} stories")
+            job["finished"] = True
+            progress_bar.empty()
+        
+        if job is not None and job["finished"] and os.path.exists(job["path"]):
+            writer = EXPORT_FORMATS[fmt]
+            with open(job["path"], "rb") as f:
+                st.download_button(
+                    label=f"⬇️ Download {writer.label} ({os.path.getsize(job['path']) / 1024:,.0f} KB)",
+                    data=f,
+                    file_name=f"stories.{writer.extension}",
+                    mime=writer.mime_type
+                )
+    
+    def _discard_export(self, job: Dict[str, Any]):
+        export = BulkExport(self.backend, job["selection"][0], job["path"])
+        for path in (export.path, export.partial_path, export.checkpoint_path):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def search_stories(self, query: str, theme: Optional[str] = None,
+                       favorites_only: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
+        return self.backend.search_stories(query, theme=theme, favorites_only=favorites_only, limit=limit)
+    
+    def _render_search_results(self, query: str, theme: Optional[str], favorites_only: bool):
+        started = time.perf_counter()
+        results = self.search_stories(query, theme=theme, favorites_only=favorites_only,
+                                      limit=AppSettings.SEARCH_RESULT_LIMIT)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if not results:
+            st.info("No stories match this search.")
+            return
+        
+        st.caption(f"{len(results)} best matches in {elapsed_ms:.0f} ms")
+        for i, story_data in enumerate(results):
+            self._render_story_card(story_data, i)
+    
+    def _render_story_card(self, story_data: Dict[str, Any], index: int):
+        with st.container():
+            col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+            
+            with col1:
+                # Story info
+                favorite_icon = "⭐" if story_data["favorite"] else ""
+                st.markdown(f"**{favorite_icon}{story_data['theme']}** - {story_data['timestamp']}")
+                st.markdown(f"*{story_data['prompt'][:80]}...*")
+            
+            with col2:
+                st.metric("Words", story_data['word_count'])
+            
+            with col3:
+                # Action buttons
+                if st.button(f"👁️ Read", key=f"read_{story_data['id']}"):
+                    st.markdown("### 📖 Story")
+                    st.markdown(self.get_story_body(story_data['id']) or "")
+                
+                if st.button(f"❤️", key=f"fav_{story_data['id']}", help="Toggle Favorite"):
+                    if story_data["favorite"]:
+                        self.unfavorite_story(story_data["id"])
+                    else:
+                        self.favorite_story(story_data["id"])
+                    st.rerun()
+            
+            with col4:
+                if st.button(f"📄 Export", key=f"export_{story_data['id']}"):
+                    self.export_story(self.get_story_body(story_data['id']) or "", story_data)
+                
+                if st.button(f"🗑️ Delete", key=f"delete_{story_data['id']}", help="Delete Story"):
+                    self.delete_story(story_data["id"])
+                    st.success("Story deleted!")
+                    st.rerun()
+            
+            st.markdown("---")
+
+def init_session_state():
+    """Initialize all session state variables"""
+    storage = StoryStorage()
+    # Additional session state initialization can go here
\ No newline at end of file
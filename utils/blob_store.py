@@ -0,0 +1,106 @@
+import hashlib
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+from config.settings import AppSettings
+from utils.compression import BodyCache, StoryCodec
+
+class BlobStore:
+    """Story bodies compressed and shared by every session in the process.
+
+    Bodies are addressed by content hash, so a story held by several
+    sessions (a cache hit, a shared prompt) is stored once and
+    reference-counted. Sessions keep only the key; reads decompress on
+    demand through a small LRU. Each genre gets its own zstd dictionary,
+    trained from the genre's most recent bodies.
+    """
+
+    def __init__(self, codec: Optional[StoryCodec] = None, cache: Optional[BodyCache] = None):
+        self._codec = codec
+        self.cache = cache or BodyCache()
+        # key -> [compressed bytes, reference count, uncompressed size, genre]
+        self._blobs: Dict[str, list] = {}
+        # genre -> keys of its latest bodies, the training set for its next dictionary
+        self._recent: Dict[Optional[str], deque] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def codec(self) -> StoryCodec:
+        # Created on first save so zstandard only loads once there is something to store
+        if self._codec is None:
+            self._codec = StoryCodec()
+        return self._codec
+
+    @staticmethod
+    def key_for(text: str) -> str:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def put(self, text: str, genre: Optional[str] = None) -> str:
+        key = self.key_for(text)
+        with self._lock:
+            entry = self._blobs.get(key)
+            if entry is not None:
+                entry[1] += 1
+                return key
+        compressed = self.codec.compress(text, genre)
+        with self._lock:
+            entry = self._blobs.get(key)
+            if entry is not None:
+                entry[1] += 1
+                return key
+            self._blobs[key] = [compressed, 1, len(text.encode('utf-8')), genre]
+            recent = self._recent.get(genre)
+            if recent is None:
+                recent = self._recent[genre] = deque(maxlen=AppSettings.COMPRESSION_TRAINING_SAMPLES)
+            recent.append(key)
+        if genre is not None and self.codec.note_added(genre):
+            self._train(genre)
+        return key
+
+    def _train(self, genre: str):
+        with self._lock:
+            keys = list(self._recent.get(genre, ()))
+        samples = [text for text in map(self.get, keys) if text is not None]
+        self.codec.train(genre, samples)
+
+    def get(self, key: str) -> Optional[str]:
+        text = self.cache.get(key)
+        if text is not None:
+            return text
+        with self._lock:
+            entry = self._blobs.get(key)
+        if entry is None:
+            return None
+        text = self.codec.decompress(entry[0])
+        self.cache.put(key, text)
+        return text
+
+    def release(self, key: str):
+        with self._lock:
+            entry = self._blobs.get(key)
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self._blobs[key]
+        self.cache.discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self._blobs.values())
+        raw = sum(entry[2] for entry in entries)
+        stored = sum(len(entry[0]) for entry in entries)
+        return {
+            'blobs': len(entries),
+            'references': sum(entry[1] for entry in entries),
+            'raw_bytes': raw,
+            'stored_bytes': stored,
+            'compression_ratio': raw / stored if stored else None,
+            'dictionaries': self._codec.stats()['current'] if self._codec else {},
+            'read_cache': self.cache.stats()
+        }
+
+# Process-wide store shared by every session
+blob_store = BlobStore()
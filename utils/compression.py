@@ -0,0 +1,153 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from config.settings import AppSettings
+
+class BodyCache:
+    """Small LRU of decompressed story bodies, so re-reading a story skips decompression"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = AppSettings.BODY_CACHE_ENTRIES if max_entries is None else max_entries
+        self._entries: "OrderedDict[Any, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key: Any, text: str):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Any):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+class StoryCodec:
+    """zstd compression with one trained dictionary per genre.
+
+    Every frame records the id of the dictionary that compressed it and no
+    dictionary is ever dropped, so bodies written before a retrain stay
+    readable. Genres without a dictionary yet use plain zstd. A loader can
+    supply dictionaries this process has not seen, such as ones trained by
+    another worker sharing the same database.
+    """
+
+    def __init__(self, level: Optional[int] = None,
+                 loader: Optional[Callable[[int], Optional[bytes]]] = None):
+        # Deferred like numpy: only stores that actually save stories pay for the import
+        import zstandard
+        self._zstd = zstandard
+        self.settings = AppSettings()
+        self.level = self.settings.COMPRESSION_LEVEL if level is None else level
+        self.loader = loader
+        self._plain = zstandard.ZstdCompressor(level=self.level)
+        self._dictionaries: Dict[int, Any] = {}
+        # genre -> id of the dictionary new bodies are compressed with
+        self._current: Dict[str, int] = {}
+        # genre -> stories added since its dictionary was trained
+        self._pending: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, data: bytes, compress: bool = False) -> int:
+        dictionary = self._zstd.ZstdCompressionDict(data)
+        if compress:
+            # The precomputed tables take several hundred KB, so only dictionaries in use for writing get them
+            dictionary.precompute_compress(level=self.level)
+        dict_id = dictionary.dict_id()
+        with self._lock:
+            self._dictionaries[dict_id] = dictionary
+        return dict_id
+
+    def load_dictionary(self, genre: str, data: bytes, current: bool = True) -> int:
+        dict_id = self._register(data, compress=current)
+        if current:
+            with self._lock:
+                previous = self._current.get(genre)
+                self._current[genre] = dict_id
+                if previous is not None and previous != dict_id:
+                    # Superseded: keep it for reading older bodies, without the compression tables
+                    self._dictionaries[previous] = self._zstd.ZstdCompressionDict(
+                        self._dictionaries[previous].as_bytes()
+                    )
+        return dict_id
+
+    def compress(self, text: str, genre: Optional[str] = None) -> bytes:
+        with self._lock:
+            dictionary = self._dictionaries.get(self._current.get(genre))
+        if dictionary is None:
+            return self._plain.compress(text.encode('utf-8'))
+        # Compressors are not thread-safe; with the dictionary precomputed a new one is cheap
+        compressor = self._zstd.ZstdCompressor(level=self.level, dict_data=dictionary)
+        return compressor.compress(text.encode('utf-8'))
+
+    def decompress(self, data: bytes) -> str:
+        dict_id = self._zstd.get_frame_parameters(data).dict_id
+        if not dict_id:
+            return self._zstd.ZstdDecompressor().decompress(data).decode('utf-8')
+        with self._lock:
+            dictionary = self._dictionaries.get(dict_id)
+        if dictionary is None:
+            loaded = self.loader(dict_id) if self.loader else None
+            if loaded is None:
+                raise KeyError(f"Unknown compression dictionary {dict_id}")
+            self._register(loaded)
+            with self._lock:
+                dictionary = self._dictionaries[dict_id]
+        return self._zstd.ZstdDecompressor(dict_data=dictionary).decompress(data).decode('utf-8')
+
+    def set_pending(self, genre: str, count: int):
+        with self._lock:
+            self._pending[genre] = count
+
+    def has_dictionary(self, genre: str) -> bool:
+        with self._lock:
+            return genre in self._current
+
+    def note_added(self, genre: str, count: int = 1) -> bool:
+        """Count new stories for genre; True once it is due a (re)trained dictionary"""
+        with self._lock:
+            pending = self._pending.get(genre, 0) + count
+            self._pending[genre] = pending
+            trained = genre in self._current
+        if trained:
+            return pending >= self.settings.COMPRESSION_RETRAIN_EVERY
+        return pending >= self.settings.COMPRESSION_MIN_SAMPLES
+
+    def train(self, genre: str, samples: List[str]) -> Optional[Tuple[int, bytes]]:
+        """Train and adopt a new dictionary for genre; returns (dict_id, bytes), or None if the samples are too few"""
+        try:
+            dictionary = self._zstd.train_dictionary(
+                self.settings.COMPRESSION_DICT_SIZE, [sample.encode('utf-8') for sample in samples],
+                level=self.level
+            )
+        except self._zstd.ZstdError:
+            # Too little text to train on; try again after another batch of stories
+            self.set_pending(genre, 0)
+            return None
+        data = dictionary.as_bytes()
+        dict_id = self.load_dictionary(genre, data)
+        self.set_pending(genre, 0)
+        return dict_id, data
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'dictionaries': len(self._dictionaries), 'current': dict(self._current)}
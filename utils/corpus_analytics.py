@@ -0,0 +1,195 @@
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from utils.story_backends import StoryBackend
+
+class CorpusAnalytics:
+    """Columnar per-story metrics for the whole library, aggregated with NumPy.
+
+    The metrics themselves are stored by the backend when a story is saved
+    or imported; refresh() reads the rows of stories added since the
+    previous refresh in one query and masks out deleted ones, so keeping
+    the table current never touches a story body.
+    """
+
+    # Column name -> dtype
+    COLUMNS = {
+        'id': np.int64,
+        'theme': np.int16,
+        'tone': np.int16,
+        'length': np.int16,
+        'creativity_level': np.float32,
+        'word_count': np.int32,
+        'sentence_count': np.int32,
+        'dialogue_count': np.int32,
+        'avg_word_length': np.float32,
+        'alive': np.bool_
+    }
+
+    def __init__(self, initial_capacity: int = 1024):
+        self.columns = {name: np.zeros(initial_capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self.size = 0
+        self.rows: Dict[int, int] = {}
+        # Category labels per coded column, index = code
+        self.labels: Dict[str, List[str]] = {'theme': [], 'tone': [], 'length': []}
+        self._codes: Dict[str, Dict[str, int]] = {'theme': {}, 'tone': {}, 'length': {}}
+
+    def _code(self, column: str, label: str) -> int:
+        codes = self._codes[column]
+        if label not in codes:
+            codes[label] = len(codes)
+            self.labels[column].append(label)
+        return codes[label]
+
+    def _grow(self, needed: int):
+        capacity = len(self.columns['id'])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def _compact(self):
+        alive = self.columns['alive'][:self.size].copy()
+        for column in self.columns.values():
+            kept = column[:self.size][alive]
+            column[:len(kept)] = kept
+        self.size = int(alive.sum())
+        self.rows = {int(story_id): row for row, story_id in enumerate(self.columns['id'][:self.size])}
+
+    def add_rows(self, rows: List[Tuple]):
+        """Append StoryBackend.analytics_rows output, one column at a time"""
+        if not rows:
+            return
+        ids, themes, settings, creativity, words, sentences, dialogue, word_length = zip(*rows)
+        lengths, tones = [], []
+        for value in settings:
+            length, tone, _ = (value or '//').split('/', 2)
+            lengths.append(self._code('length', length))
+            tones.append(self._code('tone', tone))
+
+        start = self.size
+        self._grow(start + len(rows))
+        span = slice(start, start + len(rows))
+        values = {
+            'id': ids,
+            'theme': [self._code('theme', theme or '') for theme in themes],
+            'tone': tones,
+            'length': lengths,
+            'creativity_level': [level or 0.0 for level in creativity],
+            'word_count': [count or 0 for count in words],
+            'sentence_count': sentences,
+            'dialogue_count': dialogue,
+            'avg_word_length': word_length,
+            'alive': True
+        }
+        for name, value in values.items():
+            self.columns[name][span] = value
+        self.rows.update(zip(ids, range(start, start + len(rows))))
+        self.size += len(rows)
+
+    def remove(self, story_id: int):
+        row = self.rows.pop(story_id, None)
+        if row is not None:
+            self.columns['alive'][row] = False
+
+    def refresh(self, backend: StoryBackend) -> Dict[str, int]:
+        """Bring the table in line with the backend, reading only changed stories' stored metrics"""
+        current = set(backend.story_ids())
+        known = set(self.rows)
+        removed = known - current
+
+        for story_id in removed:
+            self.remove(story_id)
+        # Stories whose metrics are not stored yet (still queued by an import) come in on a later refresh
+        rows = backend.analytics_rows(current - known)
+        self.add_rows(rows)
+
+        if self.size and self.size - len(self.rows) > self.size // 4:
+            self._compact()
+        return {'added': len(rows), 'removed': len(removed)}
+
+    def _view(self) -> Dict[str, np.ndarray]:
+        alive = self.columns['alive'][:self.size]
+        return {name: column[:self.size][alive] for name, column in self.columns.items()}
+
+    @staticmethod
+    def readability(view: Dict[str, np.ndarray]) -> np.ndarray:
+        # Automated Readability Index: grade level from word and sentence length
+        words = np.maximum(view['word_count'], 1)
+        sentences = np.maximum(view['sentence_count'], 1)
+        return 4.71 * view['avg_word_length'] + 0.5 * (words / sentences) - 21.43
+
+    @staticmethod
+    def dialogue_density(view: Dict[str, np.ndarray]) -> np.ndarray:
+        # Dialogue exchanges per 1000 words
+        return view['dialogue_count'] * 1000.0 / np.maximum(view['word_count'], 1)
+
+    def _group_mean(self, codes: np.ndarray, values: np.ndarray, labels: List[str]) -> Dict[str, Dict[str, float]]:
+        counts = np.bincount(codes, minlength=len(labels))
+        sums = np.bincount(codes, weights=values, minlength=len(labels))
+        return {
+            label: {'stories': int(counts[code]), 'mean': float(sums[code] / counts[code])}
+            for code, label in enumerate(labels) if counts[code]
+        }
+
+    def word_count_histograms(self, bins: int = 20) -> Dict[str, Any]:
+        """Word-count distribution per genre over shared bin edges"""
+        view = self._view()
+        if not len(view['id']):
+            return {'edges': [], 'genres': {}}
+
+        edges = np.histogram_bin_edges(view['word_count'], bins=bins)
+        bin_index = np.clip(np.searchsorted(edges, view['word_count'], side='right') - 1, 0, bins - 1)
+        themes = self.labels['theme']
+        counts = np.bincount(view['theme'] * bins + bin_index, minlength=len(themes) * bins)
+        counts = counts.reshape(len(themes), bins)
+        return {
+            'edges': edges.tolist(),
+            'genres': {theme: counts[code].tolist() for code, theme in enumerate(themes) if counts[code].any()}
+        }
+
+    def readability_by_tone(self) -> Dict[str, Dict[str, float]]:
+        view = self._view()
+        return self._group_mean(view['tone'], self.readability(view), self.labels['tone'])
+
+    def word_count_by_genre(self) -> Dict[str, Dict[str, float]]:
+        view = self._view()
+        return self._group_mean(view['theme'], view['word_count'].astype(np.float64), self.labels['theme'])
+
+    def dialogue_vs_creativity(self) -> Dict[str, Any]:
+        """Mean dialogue density per creativity level, plus their correlation"""
+        view = self._view()
+        density = self.dialogue_density(view)
+        # Sidebar creativity moves in 0.1 steps; bucket on that grid
+        levels = np.rint(view['creativity_level'] * 10).astype(np.int64)
+        counts = np.bincount(levels, minlength=11)
+        sums = np.bincount(levels, weights=density, minlength=11)
+
+        correlation: Optional[float] = None
+        if len(density) > 1 and density.std() > 0 and view['creativity_level'].std() > 0:
+            correlation = float(np.corrcoef(view['creativity_level'], density)[0, 1])
+        return {
+            'levels': {
+                f"{level / 10:.1f}": {'stories': int(counts[level]), 'mean_density': float(sums[level] / counts[level])}
+                for level in range(len(counts)) if counts[level]
+            },
+            'correlation': correlation
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        view = self._view()
+        words = view['word_count']
+        return {
+            'stories': int(len(words)),
+            'total_words': int(words.sum()),
+            'mean_words': float(words.mean()) if len(words) else 0.0,
+            'median_words': float(np.median(words)) if len(words) else 0.0
+        }
+
+def histogram_labels(edges: List[float]) -> List[str]:
+    return [f"{int(low)}–{int(high)}" for low, high in zip(edges[:-1], edges[1:])]
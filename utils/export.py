@@ -0,0 +1,435 @@
+import base64
+import html
+import io
+import json
+import os
+import re
+import time
+import uuid
+import zipfile
+from contextlib import nullcontext
+from typing import Dict, Any, BinaryIO, Iterator, List, Optional, Tuple
+
+from config.settings import AppSettings
+from utils.story_backends import StoryBackend
+
+def export_text(record: Dict[str, Any], body: str) -> str:
+    """The plain-text layout of a single-story download; takes story params or a saved record"""
+    if record.get('settings'):
+        settings = ", ".join(record['settings'].split('/'))
+    else:
+        settings = f"{record.get('length', '')}, {record.get('tone', '')}, {record.get('pov', '')}"
+    return f"""Title: Generated Story
+Genre: {record.get('theme') or 'Unknown'}
+Created: {record.get('timestamp') or time.strftime("%Y-%m-%d %H:%M:%S")}
+Settings: {settings}
+
+Original Prompt:
+{record.get('user_prompt') or record.get('prompt') or ''}
+
+Story:
+{body}
+
+---
+Generated by AI Story Generator Pro
+"""
+
+def story_title(record: Dict[str, Any], max_length: int = 60) -> str:
+    prompt = ' '.join((record.get('prompt') or '').split())
+    if not prompt:
+        return f"Story {record['id']}"
+    if len(prompt) <= max_length:
+        return prompt
+    return prompt[:max_length].rsplit(' ', 1)[0] + "…"
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', (text or 'unknown').lower()).strip('-') or 'unknown'
+
+def select_story_ids(backend: StoryBackend, theme: Optional[str] = None,
+                     favorites_only: bool = False, page_size: int = 1000) -> List[int]:
+    """Ids of the stories matching the filters, oldest first"""
+    if theme is None and not favorites_only:
+        return sorted(backend.story_ids())
+    ids, offset = [], 0
+    while True:
+        page = backend.list_stories(theme=theme, favorites_only=favorites_only, offset=offset, limit=page_size)
+        ids.extend(record['id'] for record in page)
+        if len(page) < page_size:
+            return sorted(ids)
+        offset += page_size
+
+def iter_story_batches(backend: StoryBackend, story_ids: List[int], batch_size: int,
+                       lock=None) -> Iterator[List[Tuple[Dict[str, Any], str]]]:
+    """(record, body) pairs a batch at a time, so only one batch of bodies is in memory; deleted stories are skipped"""
+    for start in range(0, len(story_ids), batch_size):
+        batch = []
+        with lock or nullcontext():
+            for story_id in story_ids[start:start + batch_size]:
+                record = backend.get_story(story_id)
+                body = backend.get_story_body(story_id)
+                if record is not None and body is not None:
+                    batch.append((record, body))
+        yield batch
+
+class ExportWriter:
+    """Writes stories one at a time to a binary file object.
+
+    checkpoint() returns what changed since the previous call, and a writer
+    built with restore() on all of them picks up an interrupted file
+    truncated to the last checkpoint.
+    """
+
+    label = ""
+    extension = ""
+    mime_type = "application/octet-stream"
+
+    def __init__(self, fp: BinaryIO):
+        self.fp = fp
+
+    def start(self):
+        """Anything written once at the top of a fresh export"""
+
+    def write_story(self, record: Dict[str, Any], body: str):
+        raise NotImplementedError
+
+    def checkpoint(self) -> Dict[str, Any]:
+        return {}
+
+    def restore(self, checkpoints: List[Dict[str, Any]]):
+        pass
+
+    def finish(self):
+        pass
+
+    def abandon(self):
+        """Stop without finishing; the file is left for a resumed export to truncate"""
+
+class JsonlWriter(ExportWriter):
+    label = "JSON Lines"
+    extension = "jsonl"
+    mime_type = "application/x-ndjson"
+
+    def write_story(self, record: Dict[str, Any], body: str):
+        line = json.dumps({**record, 'story': body}, ensure_ascii=False) + "\n"
+        self.fp.write(line.encode('utf-8'))
+
+class MarkdownWriter(ExportWriter):
+    label = "Markdown"
+    extension = "md"
+    mime_type = "text/markdown"
+
+    def start(self):
+        self.fp.write(b"# Story Library\n\n")
+
+    def write_story(self, record: Dict[str, Any], body: str):
+        details = " · ".join(str(part) for part in (
+            record.get('theme'), record.get('timestamp'), record.get('settings'),
+            f"{record.get('word_count', 0)} words"
+        ) if part)
+        prompt = "\n".join("> " + line for line in (record.get('prompt') or '').splitlines())
+        section = f"## {story_title(record)}\n\n*{details}*\n\n{prompt}\n\n{body.strip()}\n\n---\n\n"
+        self.fp.write(section.encode('utf-8'))
+
+def _zipinfo_state(info: zipfile.ZipInfo) -> Dict[str, Any]:
+    state = {}
+    for slot in zipfile.ZipInfo.__slots__:
+        value = getattr(info, slot, None)
+        state[slot] = {'b64': base64.b64encode(value).decode('ascii')} if isinstance(value, bytes) else value
+    return state
+
+def _zipinfo_from_state(state: Dict[str, Any]) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(state['filename'], tuple(state['date_time']))
+    for slot, value in state.items():
+        if isinstance(value, dict):
+            value = base64.b64decode(value['b64'])
+        elif slot == 'date_time':
+            value = tuple(value)
+        setattr(info, slot, value)
+    return info
+
+class _ZipWriter(ExportWriter):
+    """Archive formats; the checkpoint carries the member headers the central directory needs"""
+
+    def __init__(self, fp: BinaryIO):
+        super().__init__(fp)
+        self.zip = zipfile.ZipFile(fp, 'w', zipfile.ZIP_DEFLATED)
+        self._checkpointed = 0
+
+    def write_member(self, name: str, data: str, compress_type: int = zipfile.ZIP_DEFLATED):
+        self.zip.writestr(name, data.encode('utf-8'), compress_type=compress_type)
+
+    def checkpoint(self) -> Dict[str, Any]:
+        entries = [_zipinfo_state(info) for info in self.zip.filelist[self._checkpointed:]]
+        self._checkpointed = len(self.zip.filelist)
+        return {'entries': entries}
+
+    def restore(self, checkpoints: List[Dict[str, Any]]):
+        for checkpoint in checkpoints:
+            for state in checkpoint['entries']:
+                info = _zipinfo_from_state(state)
+                self.zip.filelist.append(info)
+                self.zip.NameToInfo[info.filename] = info
+        self._checkpointed = len(self.zip.filelist)
+
+    def finish(self):
+        self.zip.close()
+
+    def abandon(self):
+        # Otherwise ZipFile.__del__ would append a central directory to the closed file
+        self.zip.fp = None
+
+class ZipTextWriter(_ZipWriter):
+    label = "ZIP of text files"
+    extension = "zip"
+    mime_type = "application/zip"
+
+    def write_story(self, record: Dict[str, Any], body: str):
+        self.write_member(f"{_slug(record.get('theme'))}/story_{record['id']:06d}.txt", export_text(record, body))
+
+_XHTML_HEAD = (
+    '<?xml version="1.0" encoding="utf-8"?>\n<!DOCTYPE html>\n'
+    '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="en">\n'
+)
+
+class EpubWriter(_ZipWriter):
+    """EPUB 3 with one chapter per story; the package document and contents are written by finish()"""
+
+    label = "EPUB e-book"
+    extension = "epub"
+    mime_type = "application/epub+zip"
+
+    CONTAINER = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">\n'
+        '  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>\n'
+        '</container>\n'
+    )
+
+    def __init__(self, fp: BinaryIO):
+        super().__init__(fp)
+        self.identifier = str(uuid.uuid4())
+        self.chapters: List[Tuple[str, str]] = []
+        self._chapters_checkpointed = 0
+
+    def start(self):
+        # Readers identify the format from an uncompressed mimetype stored first
+        self.write_member("mimetype", "application/epub+zip", zipfile.ZIP_STORED)
+        self.write_member("META-INF/container.xml", self.CONTAINER)
+
+    def write_story(self, record: Dict[str, Any], body: str):
+        title = html.escape(story_title(record))
+        details = html.escape(" · ".join(str(part) for part in (
+            record.get('theme'), record.get('timestamp'), f"{record.get('word_count', 0)} words"
+        ) if part))
+        paragraphs = "".join(
+            f"<p>{html.escape(' '.join(paragraph.split()))}</p>\n"
+            for paragraph in re.split(r'\n\s*\n', body) if paragraph.strip()
+        )
+        name = f"story_{record['id']:06d}.xhtml"
+        self.write_member(f"OEBPS/{name}", (
+            f"{_XHTML_HEAD}<head><title>{title}</title></head>\n<body><section epub:type=\"chapter\">\n"
+            f"<h1>{title}</h1>\n<p><em>{details}</em></p>\n"
+            f"<blockquote><p>{html.escape(record.get('prompt') or '')}</p></blockquote>\n"
+            f"{paragraphs}</section></body></html>\n"
+        ))
+        self.chapters.append((name, title))
+
+    def checkpoint(self) -> Dict[str, Any]:
+        chapters = self.chapters[self._chapters_checkpointed:]
+        self._chapters_checkpointed = len(self.chapters)
+        return {**super().checkpoint(), 'identifier': self.identifier, 'chapters': chapters}
+
+    def restore(self, checkpoints: List[Dict[str, Any]]):
+        super().restore(checkpoints)
+        for checkpoint in checkpoints:
+            self.identifier = checkpoint['identifier']
+            self.chapters.extend((name, title) for name, title in checkpoint['chapters'])
+        self._chapters_checkpointed = len(self.chapters)
+
+    def _write_lines(self, name: str, lines: Iterator[str]):
+        # Contents for tens of thousands of chapters are streamed into the member, not built as one string
+        with self.zip.open(name, 'w') as member:
+            for line in lines:
+                member.write(line.encode('utf-8'))
+
+    def _nav(self) -> Iterator[str]:
+        yield f'{_XHTML_HEAD}<head><title>Contents</title></head>\n<body><nav epub:type="toc" id="toc">\n'
+        yield '<h1>Contents</h1>\n<ol>\n'
+        for name, title in self.chapters:
+            yield f'<li><a href="{name}">{title}</a></li>\n'
+        yield '</ol></nav></body></html>\n'
+
+    def _package(self) -> Iterator[str]:
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id">\n'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+            f'<dc:identifier id="book-id">urn:uuid:{self.identifier}</dc:identifier>\n'
+            '<dc:title>Story Library</dc:title>\n<dc:language>en</dc:language>\n'
+            f'<meta property="dcterms:modified">{time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}</meta>\n'
+            '</metadata>\n<manifest>\n'
+            '<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>\n'
+        )
+        for index, (name, _) in enumerate(self.chapters):
+            yield f'<item id="s{index}" href="{name}" media-type="application/xhtml+xml"/>\n'
+        yield '</manifest>\n<spine>\n'
+        for index in range(len(self.chapters)):
+            yield f'<itemref idref="s{index}"/>\n'
+        yield '</spine>\n</package>\n'
+
+    def finish(self):
+        self._write_lines("OEBPS/nav.xhtml", self._nav())
+        self._write_lines("OEBPS/content.opf", self._package())
+        super().finish()
+
+EXPORT_FORMATS = {
+    "zip": ZipTextWriter,
+    "jsonl": JsonlWriter,
+    "markdown": MarkdownWriter,
+    "epub": EpubWriter
+}
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only sink handed to a writer when streaming; drain() takes what was written since the last call"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def stream_export(backend: StoryBackend, fmt: str, story_ids: Optional[List[int]] = None,
+                  lock=None) -> Iterator[bytes]:
+    """The export as a stream of chunks, about one batch of stories each, for an HTTP response"""
+    sink = _ChunkBuffer()
+    writer = EXPORT_FORMATS[fmt](sink)
+    writer.start()
+    if story_ids is None:
+        with lock or nullcontext():
+            story_ids = select_story_ids(backend)
+    for batch in iter_story_batches(backend, story_ids, AppSettings.EXPORT_BATCH_SIZE, lock):
+        for record, body in batch:
+            writer.write_story(record, body)
+        yield sink.drain()
+    writer.finish()
+    yield sink.drain()
+
+class BulkExport:
+    """Exports a selection of stories to a file, resumable after an interruption.
+
+    The file is written as <path>.partial next to an append-only log,
+    <path>.checkpoint, that gets a line after every batch: stories done,
+    bytes written (flushed to disk) and the writer's checkpoint. A new
+    BulkExport for the same path and format truncates the partial file to
+    the last logged line and carries on from there. The partial file is
+    renamed to path once the export is complete.
+    """
+
+    def __init__(self, backend: StoryBackend, fmt: str, path: str, story_ids: Optional[List[int]] = None,
+                 batch_size: Optional[int] = None):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+        self.backend = backend
+        self.fmt = fmt
+        self.path = path
+        self.partial_path = path + ".partial"
+        self.checkpoint_path = path + ".checkpoint"
+        self.batch_size = batch_size or AppSettings.EXPORT_BATCH_SIZE
+        self._requested_ids = story_ids
+
+    def _read_log(self) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        if not (os.path.exists(self.checkpoint_path) and os.path.exists(self.partial_path)):
+            return None, []
+        lines = []
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    lines.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A run killed mid-write can leave a torn last line
+                    break
+        if not lines or lines[0].get('format') != self.fmt:
+            return None, []
+        if self._requested_ids is not None and lines[0]['story_ids'] != self._requested_ids:
+            return None, []
+        return lines[0], lines[1:]
+
+    def resume_point(self) -> Optional[Dict[str, int]]:
+        """Stories done and total of an interrupted export this one would continue, if any"""
+        header, checkpoints = self._read_log()
+        if header is None or not checkpoints:
+            return None
+        return {'done': checkpoints[-1]['done'], 'total': len(header['story_ids'])}
+
+    def _write_log_line(self, log, entry: Dict[str, Any]):
+        log.write(json.dumps(entry) + "\n")
+        log.flush()
+        os.fsync(log.fileno())
+
+    def run(self) -> Iterator[Dict[str, Any]]:
+        """Export, yielding progress after every batch; the last item has finished=True"""
+        started = time.perf_counter()
+        header, checkpoints = self._read_log()
+        writer_class = EXPORT_FORMATS[self.fmt]
+
+        if header is not None and checkpoints:
+            story_ids = header['story_ids']
+            done = checkpoints[-1]['done']
+            fp = open(self.partial_path, 'r+b')
+            fp.truncate(checkpoints[-1]['offset'])
+            fp.seek(checkpoints[-1]['offset'])
+            writer = writer_class(fp)
+            writer.restore([checkpoint['state'] for checkpoint in checkpoints])
+            log = open(self.checkpoint_path, 'a', encoding='utf-8')
+        else:
+            story_ids = self._requested_ids if self._requested_ids is not None else select_story_ids(self.backend)
+            done = 0
+            fp = open(self.partial_path, 'wb')
+            writer = writer_class(fp)
+            writer.start()
+            log = open(self.checkpoint_path, 'w', encoding='utf-8')
+            self._write_log_line(log, {'format': self.fmt, 'story_ids': story_ids})
+        resumed_from = done
+
+        try:
+            for batch in iter_story_batches(self.backend, story_ids[done:], self.batch_size):
+                for record, body in batch:
+                    writer.write_story(record, body)
+                done = min(len(story_ids), done + self.batch_size)
+                fp.flush()
+                os.fsync(fp.fileno())
+                self._write_log_line(log, {'done': done, 'offset': fp.tell(), 'state': writer.checkpoint()})
+                yield {
+                    'done': done, 'total': len(story_ids), 'resumed_from': resumed_from,
+                    'bytes': fp.tell(), 'elapsed': time.perf_counter() - started, 'finished': False
+                }
+            writer.finish()
+        except BaseException:
+            writer.abandon()
+            raise
+        finally:
+            fp.close()
+            log.close()
+
+        os.replace(self.partial_path, self.path)
+        os.remove(self.checkpoint_path)
+        elapsed = time.perf_counter() - started
+        yield {
+            'done': len(story_ids), 'total': len(story_ids), 'resumed_from': resumed_from,
+            'bytes': os.path.getsize(self.path), 'elapsed': elapsed, 'finished': True, 'path': self.path,
+            'stories_per_second': (len(story_ids) - resumed_from) / elapsed if elapsed else 0.0
+        }
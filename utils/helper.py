@@ -1,6 +1,10 @@
-import streamlit as st
 import re
+from collections import Counter
 from typing import List, Dict, Any
+from utils.text_analyzer import analyze_text, tokenize_keywords
+
+# Saved stories sort by timestamp as text, so every stored one must use this layout
+TIMESTAMP_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}')
 
 class TextUtils:
     @staticmethod
@@ -12,19 +16,14 @@ class TextUtils:
     
     @staticmethod
     def extract_keywords(text: str, num_keywords: int = 10) -> List[str]:
-        # Simple keyword extraction
-        words = re.findall(r'\b[a-zA-Z]{4,}\b', text.lower())
-        # Remove common words
-        common_words = {'that', 'with', 'have', 'this', 'will', 'they', 'from', 'been', 'said', 'each', 'which', 'their', 'time', 'would', 'there', 'could', 'other'}
-        keywords = [word for word in words if word not in common_words]
+        # Simple keyword extraction, common words removed
+        keywords = tokenize_keywords(text)
         
         # Count frequency
-        word_freq = {}
-        for word in keywords:
-            word_freq[word] = word_freq.get(word, 0) + 1
+        word_freq = Counter(keywords)
         
         # Return top keywords
-        return sorted(word_freq.keys(), key=lambda x: word_freq[x], reverse=True)[:num_keywords]
+        return sorted(word_freq, key=word_freq.__getitem__, reverse=True)[:num_keywords]
     
     @staticmethod
     def estimate_reading_time(text: str, wpm: int = 200) -> int:
@@ -33,44 +32,16 @@ class TextUtils:
     
     @staticmethod
     def get_text_statistics(text: str) -> Dict[str, Any]:
-        words = text.split()
-        sentences = text.count('.') + text.count('!') + text.count('?')
-        paragraphs = text.count('\n\n') + 1
+        stats = analyze_text(text)
         
         return {
-            'word_count': len(words),
-            'sentence_count': sentences,
-            'paragraph_count': paragraphs,
-            'avg_words_per_sentence': len(words) / max(sentences, 1),
-            'avg_sentences_per_paragraph': sentences / max(paragraphs, 1)
+            'word_count': stats['word_count'],
+            'sentence_count': stats['sentence_count'],
+            'paragraph_count': stats['paragraph_count'],
+            'avg_words_per_sentence': stats['avg_sentence_length'],
+            'avg_sentences_per_paragraph': stats['avg_sentences_per_paragraph']
         }
 
-class UIHelpers:
-    @staticmethod
-    def create_progress_tracker(steps: List[str]) -> None:
-        """Create a visual progress tracker"""
-        progress_container = st.container()
-        with progress_container:
-            cols = st.columns(len(steps))
-            for i, (col, step) in enumerate(zip(cols, steps)):
-                with col:
-                    st.markdown(f"**{i+1}.** {step}")
-    
-    @staticmethod
-    def show_success_animation():
-        """Show a success animation"""
-        st.balloons()
-        st.success("🎉 Masterpiece Created!")
-    
-    @staticmethod
-    def format_story_for_display(story: str) -> str:
-        """Format story text for better display"""
-        # Add proper paragraph spacing
-        story = story.replace('\n', '\n\n')
-        # Ensure dialogue is properly formatted
-        story = re.sub(r'(".*?")', r'<em>\1</em>', story)
-        return story
-
 class ValidationHelpers:
     @staticmethod
     def validate_story_prompt(prompt: str) -> tuple[bool, str]:
@@ -100,4 +71,35 @@ class ValidationHelpers:
         if not 0.1 <= params['creativity_level'] <= 1.0:
             return False, "Creativity level must be between 0.1 and 1.0"
         
-        return True, "Valid parameters"
\ No newline at end of file
+        return True, "Valid parameters"
+    
+    @staticmethod
+    def validate_story_record(record: Dict[str, Any], body: Any) -> tuple[bool, str]:
+        """Validate a saved-story record and body before it is imported"""
+        if not isinstance(body, str) or not body.strip():
+            return False, "Story text is missing or empty"
+        
+        if not isinstance(record.get('prompt'), str):
+            return False, "Missing required field: prompt"
+        
+        if len(record['prompt']) > 1000:
+            return False, "Prompt is longer than 1000 characters"
+        
+        if not isinstance(record.get('theme'), str) or not record['theme'].strip():
+            return False, "Missing required field: theme"
+        
+        word_count = record.get('word_count')
+        if isinstance(word_count, bool) or not isinstance(word_count, int) or word_count < 0:
+            return False, "Word count must be a non-negative integer"
+        
+        if not isinstance(record.get('timestamp'), str) or not TIMESTAMP_PATTERN.fullmatch(record['timestamp']):
+            return False, "Timestamp must look like 2024-01-31 18:05:00"
+        
+        creativity_level = record.get('creativity_level')
+        if creativity_level is not None:
+            if isinstance(creativity_level, bool) or not isinstance(creativity_level, (int, float)):
+                return False, "Creativity level must be a number"
+            if not 0.1 <= creativity_level <= 1.0:
+                return False, "Creativity level must be between 0.1 and 1.0"
+        
+        return True, "Valid record"
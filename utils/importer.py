@@ -0,0 +1,222 @@
+import io
+import json
+import os
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from config.settings import AppSettings
+from utils.helper import ValidationHelpers
+from utils.story_backends import METADATA_FIELDS, StoryBackend, build_story_record
+
+IMPORT_EXTENSIONS = ('.txt', '.json', '.jsonl')
+# Failures reading a file or ZIP member; zlib.error is corrupt deflate data,
+# NotImplementedError an unsupported compression method and RuntimeError an encrypted member
+READ_ERRORS = (OSError, UnicodeDecodeError, EOFError, zipfile.BadZipFile, zlib.error,
+               NotImplementedError, RuntimeError)
+
+# Last lines of export_text
+_TEXT_FOOTER = "\n---\nGenerated by AI Story Generator Pro"
+
+def parse_story_text(text: str) -> Tuple[Dict[str, Any], str]:
+    """Read back the single-story TXT layout written by export_text"""
+    text = text.replace("\r\n", "\n")
+    header, found, rest = text.partition("\n\nOriginal Prompt:\n")
+    if not found:
+        raise ValueError("Not a story export: no \"Original Prompt:\" section")
+    prompt, found, body = rest.partition("\n\nStory:\n")
+    if not found:
+        raise ValueError("Not a story export: no \"Story:\" section")
+    body = body.rstrip()
+    if body.endswith(_TEXT_FOOTER):
+        body = body[:-len(_TEXT_FOOTER)]
+
+    fields = {}
+    for line in header.splitlines():
+        name, _, value = line.partition(":")
+        fields[name.strip().lower()] = value.strip()
+    return {
+        "prompt": prompt.strip(),
+        "theme": fields.get("genre"),
+        "settings": "/".join(part.strip() for part in fields.get("settings", "").split(",")),
+        "timestamp": fields.get("created")
+    }, body.strip()
+
+def parse_story_json(data: Any) -> Tuple[Dict[str, Any], str]:
+    """A (record, body) pair from a JSONL export line or a batch.py result line"""
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    body = data.get("story")
+    if "params" in data:
+        # batch.py output: generation parameters rather than a saved record
+        if data.get("status", "ok") != "ok":
+            raise ValueError(f"Failed generation: {data.get('error', 'no story')}")
+        if not isinstance(data["params"], dict):
+            raise ValueError("params must be an object")
+        record = build_story_record(data["params"], {"word_count": data.get("word_count")})
+    else:
+        record = {field: data.get(field) for field in METADATA_FIELDS}
+        record["favorite"] = bool(data.get("favorite"))
+    return record, body
+
+def _read_entries(source: str, extension: str, f: TextIO) -> Iterator[Tuple[str, str, Any]]:
+    if extension == ".jsonl":
+        # Line by line, so an archive of any size is never read into memory whole
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                yield f"{source}:{line_number}", "json", line
+    elif extension == ".json":
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            yield source, "error", f"Invalid JSON: {e}"
+            return
+        if isinstance(data, list):
+            for index, item in enumerate(data):
+                yield f"{source}[{index}]", "record", item
+        else:
+            yield source, "record", data
+    else:
+        yield source, "text", f.read()
+
+def _guarded(source: str, entries: Iterator[Tuple[str, str, Any]]) -> Iterator[Tuple[str, str, Any]]:
+    """entries, ending with an error entry for source if reading it fails partway"""
+    try:
+        yield from entries
+    except READ_ERRORS as e:
+        yield source, "error", f"Cannot read file: {e}"
+
+def _read_file(path: str, extension: str) -> Iterator[Tuple[str, str, Any]]:
+    with open(path, encoding="utf-8-sig") as f:
+        yield from _read_entries(path, extension, f)
+
+def _read_member(archive: zipfile.ZipFile, member: zipfile.ZipInfo, source: str,
+                 extension: str) -> Iterator[Tuple[str, str, Any]]:
+    with archive.open(member) as raw:
+        yield from _read_entries(source, extension, io.TextIOWrapper(raw, encoding="utf-8-sig"))
+
+def _read_zip(path: str) -> Iterator[Tuple[str, str, Any]]:
+    with zipfile.ZipFile(path) as archive:
+        for member in archive.infolist():
+            extension = os.path.splitext(member.filename)[1].lower()
+            if member.is_dir() or extension not in IMPORT_EXTENSIONS:
+                continue
+            # Each member is guarded on its own, so one bad member does not end the archive
+            source = f"{path}!{member.filename}"
+            yield from _guarded(source, _read_member(archive, member, source, extension))
+
+def iter_entries(paths: Iterable[str]) -> Iterator[Tuple[str, str, Any]]:
+    """(source, kind, payload) for every story in the given files, directories and ZIP archives.
+
+    Files that cannot be read (bad encoding, corrupt archive, I/O errors)
+    come through as "error" entries rather than exceptions.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, subdirectories, files in os.walk(path):
+                subdirectories.sort()
+                yield from iter_entries(
+                    os.path.join(directory, name) for name in sorted(files)
+                    if os.path.splitext(name)[1].lower() in IMPORT_EXTENSIONS + (".zip",)
+                )
+            continue
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".zip":
+            yield from _guarded(path, _read_zip(path))
+        elif extension in IMPORT_EXTENSIONS:
+            yield from _guarded(path, _read_file(path, extension))
+        else:
+            yield path, "error", "Unsupported file type; expected .txt, .json, .jsonl, .zip or a directory"
+
+def parse_entry(kind: str, payload: Any) -> Tuple[Dict[str, Any], str]:
+    """Parse and validate one entry from iter_entries; raises ValueError if it cannot be imported"""
+    if kind == "error":
+        raise ValueError(payload)
+    if kind == "text":
+        record, body = parse_story_text(payload)
+    else:
+        record, body = parse_story_json(json.loads(payload) if kind == "json" else payload)
+    if record.get("word_count") is None and isinstance(body, str):
+        record["word_count"] = len(body.split())
+    is_valid, message = ValidationHelpers.validate_story_record(record, body)
+    if not is_valid:
+        raise ValueError(message)
+    return record, body
+
+class StoryImporter:
+    """Loads stories from export files into a backend in large batches.
+
+    Entries are parsed and validated as they stream in, and each batch of
+    valid stories is written in one transaction. The store's listing
+    indexes are dropped for the load and rebuilt once at the end; search
+    and duplicate entries are deferred too and computed afterwards, spread
+    over worker processes. Entries that fail validation are counted and
+    passed to on_reject(source, message) rather than stopping the import.
+    """
+
+    def __init__(self, backend: StoryBackend, batch_size: Optional[int] = None,
+                 workers: Optional[int] = None, on_reject: Optional[Callable[[str, str], None]] = None):
+        self.backend = backend
+        self.batch_size = batch_size or AppSettings.IMPORT_BATCH_SIZE
+        self.workers = workers or os.cpu_count() or 1
+        self.on_reject = on_reject
+        self.stats = {'imported': 0, 'rejected': 0, 'indexed': 0}
+
+    def _reject(self, source: str, message: str):
+        self.stats['rejected'] += 1
+        if self.on_reject:
+            self.on_reject(source, message)
+
+    def _load(self, paths: Iterable[str], started: float) -> Iterator[Dict[str, Any]]:
+        batch: List[Tuple[Dict[str, Any], str]] = []
+        for source, kind, payload in iter_entries(paths):
+            try:
+                batch.append(parse_entry(kind, payload))
+            except ValueError as e:
+                self._reject(source, str(e))
+                continue
+            if len(batch) >= self.batch_size:
+                self.stats['imported'] += len(self.backend.add_stories(batch, defer_indexes=True))
+                batch = []
+                yield self._progress('load', started)
+        if batch:
+            self.stats['imported'] += len(self.backend.add_stories(batch, defer_indexes=True))
+            yield self._progress('load', started)
+
+    def _index(self, started: float) -> Iterator[Dict[str, Any]]:
+        batch_size = AppSettings.IMPORT_INDEX_BATCH_SIZE
+        if self.workers <= 1:
+            for done, total in self.backend.build_deferred_indexes(batch_size):
+                self.stats['indexed'] = done
+                yield self._progress('index', started, total)
+            return
+        with ProcessPoolExecutor(self.workers) as pool:
+            def map_fn(function, bodies):
+                return pool.map(function, bodies, chunksize=max(1, len(bodies) // (self.workers * 4)))
+            for done, total in self.backend.build_deferred_indexes(batch_size, map_fn):
+                self.stats['indexed'] = done
+                yield self._progress('index', started, total)
+
+    def _progress(self, phase: str, started: float, total: Optional[int] = None) -> Dict[str, Any]:
+        return {**self.stats, 'phase': phase, 'total': total, 'elapsed': time.perf_counter() - started,
+                'finished': False}
+
+    def run(self, paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Import, yielding progress after every batch; the last item has finished=True.
+
+        The index phase also picks up stories left queued by an interrupted
+        import, so running with no paths just finishes that one.
+        """
+        started = time.perf_counter()
+        with self.backend.bulk_load():
+            yield from self._load(paths, started)
+        load_seconds = time.perf_counter() - started
+        yield from self._index(started)
+        elapsed = time.perf_counter() - started
+        yield {
+            **self.stats, 'phase': 'done', 'finished': True, 'elapsed': elapsed,
+            'load_seconds': load_seconds, 'index_seconds': elapsed - load_seconds,
+            'stories_per_second': self.stats['imported'] / elapsed if elapsed else 0.0
+        }
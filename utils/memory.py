@@ -0,0 +1,32 @@
+import gc
+import sys
+import types
+from typing import Dict, Any, Iterable, Mapping, Set
+
+from utils.blob_store import blob_store
+from utils.session_indexes import session_indexes
+
+def retained_size(root: Any, shared: Set[int]) -> int:
+    """Bytes reachable from root, not counting objects in shared or anything module-level"""
+    seen = set(shared)
+    pending = [root]
+    size = 0
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, (type, types.ModuleType, types.FunctionType)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+    return size
+
+def session_memory_report(state: Mapping[str, Any], shared: Iterable[Any] = ()) -> Dict[str, Any]:
+    """Bytes each session state entry keeps alive, excluding the shared blob store, index cache and any shared objects"""
+    exclude = {id(blob_store), id(session_indexes), *(id(obj) for obj in shared)}
+    entries = {key: retained_size(value, exclude) for key, value in state.items()}
+    return {
+        'total_bytes': sum(entries.values()),
+        'entries': dict(sorted(entries.items(), key=lambda item: item[1], reverse=True)),
+        'blob_store': blob_store.stats(),
+        'session_indexes': session_indexes.stats()
+    }
@@ -0,0 +1,215 @@
+import re
+import sqlite3
+import zlib
+from typing import Dict, List, Optional, Set, Tuple, Iterable
+
+import numpy as np
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above ~0.7 Jaccard almost always share a bucket
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 31) - 1
+# Fixed seed so signatures persisted by one process stay comparable in the next
+_rng = np.random.RandomState(20240601)
+_A = _rng.randint(1, _PRIME, NUM_PERM).astype(np.uint64)[:, None]
+_B = _rng.randint(0, _PRIME, NUM_PERM).astype(np.uint64)[:, None]
+
+_WORD = re.compile(r"[a-z0-9']+")
+# Shingles permuted per block in minhash
+_BLOCK = 256
+
+def shingle_hashes(text: str) -> np.ndarray:
+    words = _WORD.findall(text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        shingles = [" ".join(words)]
+    else:
+        shingles = set(map(" ".join, zip(*(words[i:] for i in range(SHINGLE_SIZE)))))
+    hashes = np.fromiter(map(zlib.crc32, map(str.encode, shingles)), dtype=np.uint64, count=len(shingles))
+    return hashes % _PRIME
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature of the text's word 5-gram shingles"""
+    hashes = shingle_hashes(text)
+    # Permute a block of shingles at a time in one reused buffer that stays in cache
+    signature = np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    block = np.empty((NUM_PERM, _BLOCK), dtype=np.uint64)
+    for start in range(0, len(hashes), _BLOCK):
+        chunk = hashes[start:start + _BLOCK]
+        values = block[:, :len(chunk)]
+        np.multiply(_A, chunk[None, :], out=values)
+        values += _B
+        np.remainder(values, _PRIME, out=values)
+        np.minimum(signature, values.min(axis=1), out=signature)
+    return signature.astype(np.uint32)
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    # Fraction of agreeing slots estimates the Jaccard similarity of the shingle sets
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+def band_keys(signature: np.ndarray) -> List[bytes]:
+    return [signature[band * ROWS:(band + 1) * ROWS].tobytes() for band in range(BANDS)]
+
+def group_pairs(pairs: Iterable[Tuple[int, int, float]]) -> List[Dict]:
+    """Merge verified duplicate pairs into connected groups"""
+    parent: Dict[int, int] = {}
+
+    def find(x: int) -> int:
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    best: Dict[Tuple[int, int], float] = {}
+    for a, b, score in pairs:
+        parent[find(a)] = find(b)
+        best[(a, b)] = score
+
+    groups: Dict[int, List[int]] = {}
+    for story_id in parent:
+        groups.setdefault(find(story_id), []).append(story_id)
+    max_similarity: Dict[int, float] = {}
+    for (a, _), score in best.items():
+        root = find(a)
+        max_similarity[root] = max(max_similarity.get(root, 0.0), score)
+
+    report = [{'story_ids': sorted(ids), 'similarity': max_similarity[root]} for root, ids in groups.items()]
+    return sorted(report, key=lambda group: (-len(group['story_ids']), group['story_ids'][0]))
+
+class InMemoryDuplicateIndex:
+    """MinHash signatures plus LSH band buckets, so a lookup only compares
+    against stories that share at least one band"""
+
+    def __init__(self):
+        self.signatures: Dict[int, np.ndarray] = {}
+        self.buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(BANDS)]
+
+    def add(self, story_id: int, text: str):
+        signature = minhash(text)
+        self.signatures[story_id] = signature
+        for band, key in enumerate(band_keys(signature)):
+            self.buckets[band].setdefault(key, set()).add(story_id)
+
+    def remove(self, story_id: int):
+        signature = self.signatures.pop(story_id, None)
+        if signature is None:
+            return
+        for band, key in enumerate(band_keys(signature)):
+            bucket = self.buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(story_id)
+                if not bucket:
+                    del self.buckets[band][key]
+
+    def find(self, text: str, threshold: float) -> List[Tuple[int, float]]:
+        signature = minhash(text)
+        candidates = set()
+        for band, key in enumerate(band_keys(signature)):
+            candidates |= self.buckets[band].get(key, set())
+        matches = [(story_id, similarity(signature, self.signatures[story_id])) for story_id in candidates]
+        return sorted((m for m in matches if m[1] >= threshold), key=lambda m: -m[1])
+
+    def groups(self, threshold: float) -> List[Dict]:
+        pairs = {}
+        for band in self.buckets:
+            for bucket in band.values():
+                if len(bucket) < 2:
+                    continue
+                ids = sorted(bucket)
+                for i, a in enumerate(ids):
+                    for b in ids[i + 1:]:
+                        if (a, b) not in pairs:
+                            pairs[(a, b)] = similarity(self.signatures[a], self.signatures[b])
+        return group_pairs((a, b, score) for (a, b), score in pairs.items() if score >= threshold)
+
+class SQLiteDuplicateIndex:
+    """The same index kept in tables next to the stories it covers"""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS story_minhash (story_id INTEGER PRIMARY KEY, signature BLOB NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS story_lsh ("
+        "band INTEGER NOT NULL, bucket BLOB NOT NULL, story_id INTEGER NOT NULL, "
+        "PRIMARY KEY (band, bucket, story_id)) WITHOUT ROWID"
+    )
+    INSERT_SIGNATURE = "INSERT OR REPLACE INTO story_minhash (story_id, signature) VALUES (?, ?)"
+    INSERT_BUCKET = "INSERT OR IGNORE INTO story_lsh (band, bucket, story_id) VALUES (?, ?, ?)"
+    SELECT_SIGNATURE = "SELECT signature FROM story_minhash WHERE story_id = ?"
+    DELETE_SIGNATURE = "DELETE FROM story_minhash WHERE story_id = ?"
+    DELETE_BUCKET = "DELETE FROM story_lsh WHERE band = ? AND bucket = ? AND story_id = ?"
+    SELECT_BUCKET = "SELECT story_id FROM story_lsh WHERE band = ? AND bucket = ?"
+    SELECT_SHARED_BUCKETS = (
+        "SELECT group_concat(story_id) FROM story_lsh GROUP BY band, bucket HAVING COUNT(*) > 1"
+    )
+    # Stories queued in unindexed_stories by a bulk import are left to its deferred build
+    SELECT_UNINDEXED = (
+        "SELECT b.story_id, b.body FROM story_bodies b "
+        "LEFT JOIN story_minhash m ON m.story_id = b.story_id WHERE m.story_id IS NULL "
+        "AND b.story_id NOT IN (SELECT story_id FROM unindexed_stories)"
+    )
+
+    @staticmethod
+    def _signature(blob: bytes) -> np.ndarray:
+        return np.frombuffer(blob, dtype=np.uint32)
+
+    def create(self, db: sqlite3.Connection):
+        for statement in self.SCHEMA:
+            db.execute(statement)
+        # Stores created before the index existed get backfilled once
+        for story_id, body in db.execute(self.SELECT_UNINDEXED).fetchall():
+            self.add(db, story_id, body)
+
+    def add(self, db: sqlite3.Connection, story_id: int, text: str):
+        signature = minhash(text)
+        db.execute(self.INSERT_SIGNATURE, (story_id, signature.tobytes()))
+        db.executemany(self.INSERT_BUCKET, [(band, key, story_id) for band, key in enumerate(band_keys(signature))])
+
+    def add_many(self, db: sqlite3.Connection, rows: Iterable[Tuple[int, np.ndarray]]):
+        """Index (story_id, signature) pairs with signatures already computed"""
+        signatures, buckets = [], []
+        for story_id, signature in rows:
+            signatures.append((story_id, signature.tobytes()))
+            buckets.extend((band, key, story_id) for band, key in enumerate(band_keys(signature)))
+        db.executemany(self.INSERT_SIGNATURE, signatures)
+        # In key order, so the bucket index is filled sequentially rather than at random
+        buckets.sort()
+        db.executemany(self.INSERT_BUCKET, buckets)
+
+    def remove(self, db: sqlite3.Connection, story_id: int):
+        row = db.execute(self.SELECT_SIGNATURE, (story_id,)).fetchone()
+        if row is None:
+            return
+        keys = band_keys(self._signature(row[0]))
+        db.executemany(self.DELETE_BUCKET, [(band, key, story_id) for band, key in enumerate(keys)])
+        db.execute(self.DELETE_SIGNATURE, (story_id,))
+
+    def _load(self, db: sqlite3.Connection, story_id: int) -> Optional[np.ndarray]:
+        row = db.execute(self.SELECT_SIGNATURE, (story_id,)).fetchone()
+        return self._signature(row[0]) if row else None
+
+    def find(self, db: sqlite3.Connection, text: str, threshold: float) -> List[Tuple[int, float]]:
+        signature = minhash(text)
+        candidates = set()
+        for band, key in enumerate(band_keys(signature)):
+            candidates.update(row[0] for row in db.execute(self.SELECT_BUCKET, (band, key)))
+        matches = []
+        for story_id in candidates:
+            other = self._load(db, story_id)
+            if other is not None:
+                matches.append((story_id, similarity(signature, other)))
+        return sorted((m for m in matches if m[1] >= threshold), key=lambda m: -m[1])
+
+    def groups(self, db: sqlite3.Connection, threshold: float) -> List[Dict]:
+        pairs = {}
+        signatures: Dict[int, np.ndarray] = {}
+        for (members,) in db.execute(self.SELECT_SHARED_BUCKETS).fetchall():
+            ids = sorted(int(x) for x in members.split(","))
+            for story_id in ids:
+                if story_id not in signatures:
+                    signatures[story_id] = self._load(db, story_id)
+            for i, a in enumerate(ids):
+                for b in ids[i + 1:]:
+                    if (a, b) not in pairs:
+                        pairs[(a, b)] = similarity(signatures[a], signatures[b])
+        return group_pairs((a, b, score) for (a, b), score in pairs.items() if score >= threshold)
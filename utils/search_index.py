@@ -0,0 +1,122 @@
+import heapq
+import math
+import sqlite3
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple, Callable
+
+from utils.text_analyzer import tokenize_keywords
+
+# Okapi BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def query_terms(query: str) -> List[str]:
+    """Distinct query terms, tokenized with the same rules as indexed stories"""
+    return list(dict.fromkeys(tokenize_keywords(query)))
+
+def bm25_idf(doc_count: int, doc_freq: int) -> float:
+    # Same idf as SQLite FTS5's bm25(), so both backends rank alike
+    idf = math.log((doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+    return idf if idf > 0 else 1e-6
+
+class InMemorySearchIndex:
+    """Inverted index over story bodies: term -> {story_id: term frequency}"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+
+    def add(self, story_id: int, text: str):
+        tokens = tokenize_keywords(text)
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, {})[story_id] = tf
+        self.doc_lengths[story_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, story_id: int, text: str):
+        if story_id not in self.doc_lengths:
+            return
+        for term in set(tokenize_keywords(text)):
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(story_id, None)
+                if not docs:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(story_id)
+
+    def search(self, query: str, limit: int = 50,
+               accept: Optional[Callable[[int], bool]] = None) -> List[Tuple[int, float]]:
+        """Top (story_id, score) pairs; accept filters candidates before ranking"""
+        doc_count = len(self.doc_lengths)
+        if not doc_count:
+            return []
+        avg_length = self.total_length / doc_count or 1.0
+
+        scores: Dict[int, float] = {}
+        for term in query_terms(query):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = bm25_idf(doc_count, len(docs))
+            lengths = self.doc_lengths
+            for story_id, tf in docs.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[story_id] / avg_length)
+                scores[story_id] = scores.get(story_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        candidates = scores.items()
+        if accept is not None:
+            candidates = [(story_id, score) for story_id, score in candidates if accept(story_id)]
+        return heapq.nlargest(limit, candidates, key=lambda item: (item[1], item[0]))
+
+class SQLiteSearchIndex:
+    """The same index kept in an FTS5 table next to the stories it covers.
+
+    Rows hold the already-tokenized body, so FTS5 sees exactly the terms the
+    in-memory index would and its built-in bm25() ranks identically. The
+    table is contentless; bodies stay in story_bodies. Callers pass the
+    connection so the index is written in the same transaction as the story.
+    """
+
+    CREATE_TABLE = "CREATE VIRTUAL TABLE story_search USING fts5(tokens, content='')"
+    INSERT = "INSERT INTO story_search (rowid, tokens) VALUES (?, ?)"
+    DELETE = "INSERT INTO story_search (story_search, rowid, tokens) VALUES ('delete', ?, ?)"
+    TABLE_EXISTS = "SELECT 1 FROM sqlite_master WHERE name = 'story_search'"
+
+    def create(self, db: sqlite3.Connection):
+        if db.execute(self.TABLE_EXISTS).fetchone():
+            return
+        db.execute(self.CREATE_TABLE)
+        # Stores created before search existed get indexed once
+        for story_id, body in db.execute("SELECT story_id, body FROM story_bodies").fetchall():
+            self.add(db, story_id, body)
+
+    @staticmethod
+    def terms(text: str) -> str:
+        return " ".join(tokenize_keywords(text))
+
+    def add(self, db: sqlite3.Connection, story_id: int, text: str):
+        db.execute(self.INSERT, (story_id, self.terms(text)))
+
+    def add_many(self, db: sqlite3.Connection, rows: Iterable[Tuple[int, str]]):
+        """Index (story_id, terms) pairs with terms already computed"""
+        db.executemany(self.INSERT, rows)
+
+    def remove(self, db: sqlite3.Connection, story_id: int, text: str):
+        # Contentless tables need the original tokens to drop a row
+        db.execute(self.DELETE, (story_id, " ".join(tokenize_keywords(text))))
+
+    def search(self, db: sqlite3.Connection, query: str, limit: int = 50,
+               where: str = "", args: Optional[List] = None) -> List[Tuple[int, float]]:
+        """Top (story_id, score) pairs; where/args filter on the stories table"""
+        terms = query_terms(query)
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+        conditions = " AND " + where[len(" WHERE "):] if where else ""
+        sql = (
+            "SELECT story_search.rowid, -bm25(story_search) AS score FROM story_search "
+            "JOIN stories ON stories.id = story_search.rowid "
+            f"WHERE story_search MATCH ?{conditions} ORDER BY score DESC, story_search.rowid DESC LIMIT ?"
+        )
+        return [(row[0], row[1]) for row in db.execute(sql, [match, *(args or []), limit])]
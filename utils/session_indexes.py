@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from config.settings import AppSettings
+
+class SessionIndexCache:
+    """Search and duplicate indexes of per-session stores, held outside session state.
+
+    An index is built from its store's bodies the first time a search or a
+    duplicate check needs it, kept current by the store while it is cached,
+    and dropped least recently used beyond max_entries. Memory is bounded
+    per process rather than growing with every session; a session whose
+    index was dropped rebuilds it on next use.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or AppSettings.SESSION_INDEX_CACHE_ENTRIES
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """The cached index for key, built with build() if it is not cached"""
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                return index
+        index = build()
+        with self._lock:
+            self.builds += 1
+            self._entries[key] = index
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return index
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """The cached index for key without building it or marking it used; for keeping it current"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def discard(self, owner: Hashable):
+        """Drop every index of one store, whose keys are (owner, kind)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == owner]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'builds': self.builds, 'evictions': self.evictions}
+
+# Process-wide cache shared by every session
+session_indexes = SessionIndexCache()
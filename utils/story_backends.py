@@ -0,0 +1,756 @@
+import bisect
+import itertools
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Collection, Iterable, Iterator, List, Optional, Tuple
+
+from utils.blob_store import BlobStore, blob_store
+from utils.compression import BodyCache, StoryCodec
+from utils.search_index import InMemorySearchIndex, SQLiteSearchIndex
+from utils.session_indexes import SessionIndexCache, session_indexes
+from utils.text_analyzer import analyze_text
+
+# Metadata fields kept for every story; the body is stored separately
+METADATA_FIELDS = (
+    "prompt", "theme", "word_count", "settings",
+    "timestamp", "creativity_level", "complexity"
+)
+
+# Text metrics stored with every story so library analytics never re-read bodies
+STATS_FIELDS = ("sentence_count", "dialogue_count", "avg_word_length")
+# Row layout of StoryBackend.analytics_rows
+ANALYTICS_FIELDS = ("id", "theme", "settings", "creativity_level", "word_count") + STATS_FIELDS
+
+SORT_OPTIONS = ["Recent", "Word Count", "Genre", "Favorites"]
+
+# Low-cardinality fields whose strings are interned so every record shares them
+_INTERNED_FIELDS = ("theme", "settings", "complexity")
+
+class StoryMeta:
+    """Compact metadata for one saved story; a slotted object instead of a dict per story"""
+
+    __slots__ = ("id",) + METADATA_FIELDS + STATS_FIELDS
+
+    def __init__(self, story_id: int, record: Dict[str, Any], stats: Tuple = (0, 0, 0.0)):
+        self.id = story_id
+        for field in METADATA_FIELDS:
+            value = record.get(field)
+            if field in _INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, field, value)
+        for field, value in zip(STATS_FIELDS, stats):
+            setattr(self, field, value)
+
+    def analytics_row(self) -> Tuple:
+        return (self.id, self.theme, self.settings, self.creativity_level, self.word_count,
+                self.sentence_count, self.dialogue_count, self.avg_word_length)
+
+    def to_record(self, favorite: bool) -> Dict[str, Any]:
+        # Spelled out rather than looped over METADATA_FIELDS: listing builds one per row and this is ~4x faster
+        return {
+            "id": self.id, "prompt": self.prompt, "theme": self.theme, "word_count": self.word_count,
+            "settings": self.settings, "timestamp": self.timestamp,
+            "creativity_level": self.creativity_level, "complexity": self.complexity, "favorite": favorite
+        }
+
+def _release_bodies(blobs: BlobStore, body_keys: Dict[int, str]):
+    for key in body_keys.values():
+        blobs.release(key)
+
+# Owner ids that key each in-memory store's entries in the shared index cache
+_index_owners = itertools.count(1)
+
+def text_stats(record: Dict[str, Any], body: str) -> Tuple:
+    """STATS_FIELDS of a story: taken from the record when it was built from analytics, else computed"""
+    if all(record.get(field) is not None for field in STATS_FIELDS):
+        return tuple(record[field] for field in STATS_FIELDS)
+    stats = analyze_text(body)
+    return tuple(stats[field] for field in STATS_FIELDS)
+
+def index_terms(body: str) -> Tuple[str, Any, Tuple]:
+    """Search terms, MinHash signature and text stats of a body; module-level so a process pool can compute them"""
+    from utils.near_duplicates import minhash
+    return SQLiteSearchIndex.terms(body), minhash(body), text_stats({}, body)
+
+def build_story_record(prompt_params: Dict[str, Any], analytics_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "prompt": prompt_params.get('user_prompt', ''),
+        "theme": prompt_params.get('theme', ''),
+        "word_count": analytics_data.get('word_count', 0),
+        "settings": f"{prompt_params.get('length', '')}/{prompt_params.get('tone', '')}/{prompt_params.get('pov', '')}",
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "creativity_level": prompt_params.get('creativity_level', 0.7),
+        "complexity": prompt_params.get('complexity', 'Medium'),
+        **{field: analytics_data.get(field) for field in STATS_FIELDS}
+    }
+
+class StoryBackend(ABC):
+    """Interface every story store implements.
+
+    Listing calls return metadata dicts only (no "story" key); bodies are
+    fetched one at a time with get_story_body. add_stories, bulk_load and
+    build_deferred_indexes have working defaults a store may override.
+    """
+
+    @abstractmethod
+    def add_story(self, record: Dict[str, Any], body: str) -> int:
+        ...
+
+    def add_stories(self, items: Iterable[Tuple[Dict[str, Any], str]], defer_indexes: bool = False) -> List[int]:
+        """Add (record, body) pairs in one go, honouring a "favorite" key in the record.
+
+        With defer_indexes a store may leave search and duplicate indexing
+        to build_deferred_indexes.
+        """
+        story_ids = []
+        for record, body in items:
+            story_id = self.add_story(record, body)
+            if record.get("favorite"):
+                self.set_favorite(story_id, True)
+            story_ids.append(story_id)
+        return story_ids
+
+    @contextmanager
+    def bulk_load(self):
+        """Wraps a large import; a store may suspend index maintenance until it exits"""
+        yield
+
+    def build_deferred_indexes(self, batch_size: int = 1000,
+                               map_fn: Callable = map) -> Iterator[Tuple[int, int]]:
+        """Index stories added with defer_indexes, yielding (done, total) after each batch.
+
+        map_fn(index_terms, bodies) computes the index entries, so a caller
+        can spread them over a process pool.
+        """
+        return iter(())
+
+    @abstractmethod
+    def get_story(self, story_id: int) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def get_story_body(self, story_id: int) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def list_stories(self, theme: Optional[str] = None, favorites_only: bool = False,
+                     sort_by: str = "Recent", offset: int = 0,
+                     limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def count_stories(self, theme: Optional[str] = None, favorites_only: bool = False) -> int:
+        ...
+
+    @abstractmethod
+    def search_stories(self, query: str, theme: Optional[str] = None,
+                       favorites_only: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
+        """Full-text search over bodies, best BM25 match first; records carry a "score" key"""
+
+    @abstractmethod
+    def find_near_duplicates(self, body: str, threshold: float) -> List[Tuple[int, float]]:
+        """(story_id, estimated similarity) of saved stories at or above threshold, closest first"""
+
+    @abstractmethod
+    def near_duplicate_groups(self, threshold: float) -> List[Dict[str, Any]]:
+        """Every group of mutually near-duplicate stories in the store"""
+
+    @abstractmethod
+    def delete_story(self, story_id: int):
+        ...
+
+    @abstractmethod
+    def set_favorite(self, story_id: int, favorite: bool):
+        ...
+
+    @abstractmethod
+    def is_favorite(self, story_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    def story_ids(self) -> List[int]:
+        ...
+
+    @abstractmethod
+    def analytics_rows(self, story_ids: Collection[int]) -> List[Tuple]:
+        """ANALYTICS_FIELDS of the given stories in one read; stories whose stats are not stored yet are left out"""
+
+    @abstractmethod
+    def themes(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+class _SortedIds:
+    """Story ids kept in ascending key order, maintained on every insert/delete"""
+
+    def __init__(self):
+        self.keys: List[Tuple] = []
+        self.ids: List[int] = []
+
+    def add(self, story_id: int, key: Tuple):
+        position = bisect.bisect_left(self.keys, key)
+        self.keys.insert(position, key)
+        self.ids.insert(position, story_id)
+
+    def remove(self, story_id: int, key: Tuple):
+        position = bisect.bisect_left(self.keys, key)
+        if position < len(self.ids) and self.ids[position] == story_id:
+            del self.keys[position]
+            del self.ids[position]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def page(self, offset: int, limit: Optional[int], descending: bool) -> List[int]:
+        # Slice only the requested window so a page costs O(limit), not O(n)
+        total = len(self.ids)
+        end = total if limit is None else min(total, offset + limit)
+        if offset >= end:
+            return []
+        if descending:
+            return self.ids[total - end:total - offset][::-1]
+        return self.ids[offset:end]
+
+class InMemoryStoryBackend(StoryBackend):
+    """Per-session store matching the original st.session_state behaviour.
+
+    Secondary indexes (favorites set, per-genre groups, and orders by time,
+    word count and genre) are updated on every write so that listing a page
+    never sorts or scans the whole collection. The session holds only
+    StoryMeta records; bodies go to the shared compressed BlobStore and are
+    released when the story is deleted or the store is collected. Search and
+    duplicate indexes are not kept here either: they live in the bounded
+    process-wide SessionIndexCache, built from the bodies on first use and
+    rebuilt if they have been evicted since.
+    """
+
+    # (order, descending) for each sort option
+    SORT_ORDERS = {
+        "Recent": ("recent", True),
+        "Word Count": ("word_count", True),
+        "Genre": ("genre", False)
+    }
+
+    def __init__(self, blobs: Optional[BlobStore] = None, indexes: Optional[SessionIndexCache] = None):
+        self.stories: Dict[int, StoryMeta] = {}
+        self.blobs = blobs or blob_store
+        self._body_keys: Dict[int, str] = {}
+        weakref.finalize(self, _release_bodies, self.blobs, self._body_keys)
+        self.indexes = indexes or session_indexes
+        self._index_owner = next(_index_owners)
+        weakref.finalize(self, self.indexes.discard, self._index_owner)
+        self.favorites = set()
+        # (theme or None for all genres, "all" | "favorites" | "others") -> order name -> sorted ids
+        self._groups: Dict[Tuple[Optional[str], str], Dict[str, _SortedIds]] = {}
+        self._next_id = 1
+
+    def _build_search_index(self) -> InMemorySearchIndex:
+        index = InMemorySearchIndex()
+        for story_id in self.stories:
+            index.add(story_id, self.get_story_body(story_id) or "")
+        return index
+
+    def _build_duplicate_index(self):
+        # Imported here so numpy only loads once there is something to compare
+        from utils.near_duplicates import InMemoryDuplicateIndex
+        index = InMemoryDuplicateIndex()
+        for story_id in self.stories:
+            index.add(story_id, self.get_story_body(story_id) or "")
+        return index
+
+    @property
+    def search_index(self) -> InMemorySearchIndex:
+        return self.indexes.get((self._index_owner, "search"), self._build_search_index)
+
+    @property
+    def duplicate_index(self):
+        return self.indexes.get((self._index_owner, "duplicates"), self._build_duplicate_index)
+
+    def _cached_indexes(self) -> List[Any]:
+        # Only indexes that are built need to follow a write; the rest are built from the bodies later
+        return [index for index in (self.indexes.peek((self._index_owner, kind)) for kind in ("search", "duplicates"))
+                if index is not None]
+
+    def _sort_keys(self, story_id: int) -> Dict[str, Tuple]:
+        # The id tiebreak keeps keys unique; one tuple per order is shared by every group
+        story = self.stories[story_id]
+        return {
+            "recent": (story.timestamp or "", story_id),
+            "word_count": (story.word_count or 0, story_id),
+            "genre": (story.theme or "", story_id)
+        }
+
+    def _group(self, theme: Optional[str], membership: str) -> Dict[str, _SortedIds]:
+        group = self._groups.get((theme, membership))
+        if group is None:
+            group = {name: _SortedIds() for name in ("recent", "word_count", "genre")}
+            self._groups[(theme, membership)] = group
+        return group
+
+    def _memberships(self, story_id: int) -> List[Tuple[Optional[str], str]]:
+        theme = self.stories[story_id].theme
+        state = "favorites" if story_id in self.favorites else "others"
+        return [(None, "all"), (theme, "all"), (None, state), (theme, state)]
+
+    def _index(self, story_id: int):
+        keys = self._sort_keys(story_id)
+        for theme, membership in self._memberships(story_id):
+            for name, order in self._group(theme, membership).items():
+                order.add(story_id, keys[name])
+
+    def _unindex(self, story_id: int):
+        keys = self._sort_keys(story_id)
+        for theme, membership in self._memberships(story_id):
+            for name, order in self._group(theme, membership).items():
+                order.remove(story_id, keys[name])
+
+    def _with_favorite(self, story_id: int) -> Dict[str, Any]:
+        return self.stories[story_id].to_record(story_id in self.favorites)
+
+    def add_story(self, record: Dict[str, Any], body: str) -> int:
+        story_id = self._next_id
+        self._next_id += 1
+        self.stories[story_id] = StoryMeta(story_id, record, text_stats(record, body))
+        self._body_keys[story_id] = self.blobs.put(body, self.stories[story_id].theme)
+        self._index(story_id)
+        for index in self._cached_indexes():
+            index.add(story_id, body)
+        return story_id
+
+    def get_story(self, story_id: int) -> Optional[Dict[str, Any]]:
+        if story_id not in self.stories:
+            return None
+        return self._with_favorite(story_id)
+
+    def get_story_body(self, story_id: int) -> Optional[str]:
+        key = self._body_keys.get(story_id)
+        return self.blobs.get(key) if key is not None else None
+
+    def list_stories(self, theme: Optional[str] = None, favorites_only: bool = False,
+                     sort_by: str = "Recent", offset: int = 0,
+                     limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        if sort_by == "Favorites" and not favorites_only:
+            # Favorites first, then everything else, each newest first
+            favorites = self._group(theme, "favorites")["recent"]
+            ids = favorites.page(offset, limit, descending=True)
+            remaining = None if limit is None else limit - len(ids)
+            if remaining is None or remaining > 0:
+                ids += self._group(theme, "others")["recent"].page(
+                    max(0, offset - len(favorites)), remaining, descending=True
+                )
+        else:
+            order, descending = self.SORT_ORDERS.get(sort_by, ("recent", True))
+            membership = "favorites" if favorites_only else "all"
+            ids = self._group(theme, membership)[order].page(offset, limit, descending)
+        return [self._with_favorite(story_id) for story_id in ids]
+
+    def search_stories(self, query: str, theme: Optional[str] = None,
+                       favorites_only: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
+        def accept(story_id: int) -> bool:
+            if favorites_only and story_id not in self.favorites:
+                return False
+            return theme is None or self.stories[story_id].theme == theme
+
+        hits = self.search_index.search(query, limit, accept if theme is not None or favorites_only else None)
+        return [{**self._with_favorite(story_id), "score": score} for story_id, score in hits]
+
+    def find_near_duplicates(self, body: str, threshold: float) -> List[Tuple[int, float]]:
+        return self.duplicate_index.find(body, threshold)
+
+    def near_duplicate_groups(self, threshold: float) -> List[Dict[str, Any]]:
+        return self.duplicate_index.groups(threshold)
+
+    def count_stories(self, theme: Optional[str] = None, favorites_only: bool = False) -> int:
+        return len(self._group(theme, "favorites" if favorites_only else "all")["recent"])
+
+    def delete_story(self, story_id: int):
+        if story_id not in self.stories:
+            return
+        self._unindex(story_id)
+        search_index = self.indexes.peek((self._index_owner, "search"))
+        if search_index is not None:
+            search_index.remove(story_id, self.get_story_body(story_id) or "")
+        duplicate_index = self.indexes.peek((self._index_owner, "duplicates"))
+        if duplicate_index is not None:
+            duplicate_index.remove(story_id)
+        self.favorites.discard(story_id)
+        del self.stories[story_id]
+        key = self._body_keys.pop(story_id, None)
+        if key is not None:
+            self.blobs.release(key)
+
+    def set_favorite(self, story_id: int, favorite: bool):
+        if story_id not in self.stories or (story_id in self.favorites) == favorite:
+            return
+        self._unindex(story_id)
+        if favorite:
+            self.favorites.add(story_id)
+        else:
+            self.favorites.discard(story_id)
+        self._index(story_id)
+
+    def is_favorite(self, story_id: int) -> bool:
+        return story_id in self.favorites
+
+    def story_ids(self) -> List[int]:
+        return list(self.stories)
+
+    def analytics_rows(self, story_ids: Collection[int]) -> List[Tuple]:
+        return [self.stories[story_id].analytics_row() for story_id in story_ids if story_id in self.stories]
+
+    def themes(self) -> List[str]:
+        return sorted(theme for (theme, membership), group in self._groups.items()
+                      if theme is not None and membership == "all" and len(group["recent"]))
+
+    def count(self) -> int:
+        return len(self.stories)
+
+class SQLiteStoryBackend(StoryBackend):
+    """Persistent store shared by every session in the process.
+
+    Metadata and bodies live in separate tables so listing never reads
+    story text. Each thread gets its own connection; WAL mode lets readers
+    proceed while another session is writing. Bodies are stored as zstd
+    frames compressed with their genre's dictionary (kept in
+    compression_dictionaries); rows written before compression stay plain
+    text and are read as-is.
+
+    Bulk imports can queue stories in unindexed_stories instead of indexing
+    them as they go; search and duplicate checks skip them until
+    build_deferred_indexes has run.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS stories ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, prompt TEXT NOT NULL, theme TEXT NOT NULL, "
+        "word_count INTEGER NOT NULL, settings TEXT, timestamp TEXT NOT NULL, "
+        "creativity_level REAL, complexity TEXT, favorite INTEGER NOT NULL DEFAULT 0)",
+        "CREATE TABLE IF NOT EXISTS story_bodies ("
+        "story_id INTEGER PRIMARY KEY REFERENCES stories(id) ON DELETE CASCADE, body TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_stories_theme ON stories(theme)",
+        "CREATE INDEX IF NOT EXISTS idx_stories_timestamp ON stories(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_stories_word_count ON stories(word_count)",
+        "CREATE INDEX IF NOT EXISTS idx_stories_favorite ON stories(favorite)",
+        # Composite indexes so filtered + sorted pages are index walks, not sorts
+        "CREATE INDEX IF NOT EXISTS idx_stories_theme_timestamp ON stories(theme, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_stories_favorite_timestamp ON stories(favorite, timestamp)",
+        "CREATE TABLE IF NOT EXISTS compression_dictionaries ("
+        "dict_id INTEGER PRIMARY KEY, genre TEXT NOT NULL, trained_through INTEGER NOT NULL, "
+        "dictionary BLOB NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS unindexed_stories ("
+        "story_id INTEGER PRIMARY KEY REFERENCES stories(id) ON DELETE CASCADE)",
+        "CREATE TABLE IF NOT EXISTS story_stats ("
+        "story_id INTEGER PRIMARY KEY REFERENCES stories(id) ON DELETE CASCADE, "
+        "sentence_count INTEGER NOT NULL, dialogue_count INTEGER NOT NULL, avg_word_length REAL NOT NULL)"
+    )
+
+    # Fixed SQL text so sqlite3's per-connection statement cache reuses the compiled statements
+    INSERT_STORY = (
+        "INSERT INTO stories (prompt, theme, word_count, settings, timestamp, creativity_level, complexity) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)"
+    )
+    INSERT_BODY = "INSERT INTO story_bodies (story_id, body) VALUES (?, ?)"
+    SELECT_COLUMNS = "SELECT id, " + ", ".join(METADATA_FIELDS) + ", favorite FROM stories"
+    SELECT_STORY = SELECT_COLUMNS + " WHERE id = ?"
+    SELECT_BODY = "SELECT body FROM story_bodies WHERE story_id = ?"
+    DELETE_STORY = "DELETE FROM stories WHERE id = ?"
+    UPDATE_FAVORITE = "UPDATE stories SET favorite = ? WHERE id = ?"
+    SELECT_FAVORITE = "SELECT favorite FROM stories WHERE id = ?"
+    INSERT_DICTIONARY = (
+        "INSERT OR REPLACE INTO compression_dictionaries (dict_id, genre, trained_through, dictionary) "
+        "VALUES (?, ?, ?, ?)"
+    )
+    SELECT_DICTIONARY = "SELECT dictionary FROM compression_dictionaries WHERE dict_id = ?"
+    # The newest dictionary per genre compresses new bodies
+    SELECT_CURRENT_DICTIONARIES = (
+        "SELECT genre, dictionary FROM compression_dictionaries d WHERE trained_through = "
+        "(SELECT MAX(trained_through) FROM compression_dictionaries WHERE genre = d.genre)"
+    )
+    # Stories per genre added since its newest dictionary was trained
+    SELECT_PENDING = (
+        "SELECT theme, COUNT(*) FROM stories s WHERE id > COALESCE("
+        "(SELECT MAX(trained_through) FROM compression_dictionaries WHERE genre = s.theme), 0) GROUP BY theme"
+    )
+    QUEUE_INDEX = "INSERT INTO unindexed_stories (story_id) VALUES (?)"
+    SELECT_QUEUED = "SELECT 1 FROM unindexed_stories WHERE story_id = ?"
+    SELECT_QUEUED_BODIES = (
+        "SELECT u.story_id, b.body FROM unindexed_stories u JOIN story_bodies b ON b.story_id = u.story_id "
+        "ORDER BY u.story_id LIMIT ?"
+    )
+    DELETE_QUEUED = "DELETE FROM unindexed_stories WHERE story_id = ?"
+    INSERT_STATS = "INSERT OR REPLACE INTO story_stats (story_id, " + ", ".join(STATS_FIELDS) + ") VALUES (?, ?, ?, ?)"
+    SELECT_ANALYTICS = (
+        "SELECT s.id, s.theme, s.settings, s.creativity_level, s.word_count, "
+        + ", ".join("t." + field for field in STATS_FIELDS) +
+        " FROM stories s JOIN story_stats t ON t.story_id = s.id WHERE s.id >= ? ORDER BY s.id"
+    )
+    # Stories saved before stats were stored; ones queued for a deferred build get theirs there
+    SELECT_MISSING_STATS = (
+        "SELECT s.id, b.body FROM stories s JOIN story_bodies b ON b.story_id = s.id WHERE s.id >= ? "
+        "AND s.id NOT IN (SELECT story_id FROM story_stats) AND s.id NOT IN (SELECT story_id FROM unindexed_stories)"
+    )
+    SELECT_LISTING_INDEXES = (
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'stories' AND sql IS NOT NULL"
+    )
+    SELECT_TRAINING_BODIES = (
+        "SELECT b.story_id, b.body FROM story_bodies b JOIN stories s ON s.id = b.story_id "
+        "WHERE s.theme = ? ORDER BY b.story_id DESC LIMIT ?"
+    )
+
+    ORDER_BY = {
+        "Recent": "timestamp DESC, id DESC",
+        "Word Count": "word_count DESC, id DESC",
+        # Ties by id ascending as in InMemoryStoryBackend; idx_stories_theme holds the rowid, so no sort step
+        "Genre": "theme, id",
+        "Favorites": "favorite DESC, timestamp DESC, id DESC"
+    }
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self.search_index = SQLiteSearchIndex()
+        from utils.near_duplicates import SQLiteDuplicateIndex
+        self.duplicate_index = SQLiteDuplicateIndex()
+        with self._connection() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            for statement in self.SCHEMA:
+                db.execute(statement)
+            self.search_index.create(db)
+            self.duplicate_index.create(db)
+        self.body_cache = BodyCache()
+        self._codec: Optional[StoryCodec] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, cached_statements=256)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA foreign_keys=ON")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @property
+    def codec(self) -> StoryCodec:
+        # Created on first use so zstandard only loads once bodies are written or read
+        if self._codec is None:
+            codec = StoryCodec(loader=self._load_dictionary)
+            db = self._connection()
+            for genre, data in db.execute(self.SELECT_CURRENT_DICTIONARIES):
+                codec.load_dictionary(genre, data)
+            for genre, count in db.execute(self.SELECT_PENDING):
+                codec.set_pending(genre, count)
+            self._codec = codec
+        return self._codec
+
+    def _load_dictionary(self, dict_id: int) -> Optional[bytes]:
+        # Dictionaries trained by another process sharing this file
+        row = self._connection().execute(self.SELECT_DICTIONARY, (dict_id,)).fetchone()
+        return row[0] if row else None
+
+    def _decode(self, body: Any) -> str:
+        return self.codec.decompress(body) if isinstance(body, bytes) else body
+
+    def _train(self, theme: str):
+        rows = self._connection().execute(
+            self.SELECT_TRAINING_BODIES, (theme, self.codec.settings.COMPRESSION_TRAINING_SAMPLES)
+        ).fetchall()
+        if not rows:
+            return
+        trained = self.codec.train(theme, [self._decode(body) for _, body in rows])
+        if trained is not None:
+            dict_id, data = trained
+            with self._connection() as db:
+                db.execute(self.INSERT_DICTIONARY, (dict_id, theme, rows[0][0], data))
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record["favorite"] = bool(record["favorite"])
+        return record
+
+    def add_story(self, record: Dict[str, Any], body: str) -> int:
+        theme = record.get("theme")
+        compressed = self.codec.compress(body, theme)
+        with self._connection() as db:
+            cursor = db.execute(self.INSERT_STORY, tuple(record.get(field) for field in METADATA_FIELDS))
+            story_id = cursor.lastrowid
+            db.execute(self.INSERT_BODY, (story_id, compressed))
+            db.execute(self.INSERT_STATS, (story_id, *text_stats(record, body)))
+            self.search_index.add(db, story_id, body)
+            self.duplicate_index.add(db, story_id, body)
+        if theme and self.codec.note_added(theme):
+            self._train(theme)
+        return story_id
+
+    def add_stories(self, items: Iterable[Tuple[Dict[str, Any], str]], defer_indexes: bool = False) -> List[int]:
+        story_ids = []
+        added = Counter()
+        with self._connection() as db:
+            for record, body in items:
+                theme = record.get("theme")
+                cursor = db.execute(self.INSERT_STORY, tuple(record.get(field) for field in METADATA_FIELDS))
+                story_id = cursor.lastrowid
+                db.execute(self.INSERT_BODY, (story_id, self.codec.compress(body, theme)))
+                if record.get("favorite"):
+                    db.execute(self.UPDATE_FAVORITE, (1, story_id))
+                if defer_indexes:
+                    # Stats are computed with the index entries, off the load path
+                    db.execute(self.QUEUE_INDEX, (story_id,))
+                else:
+                    db.execute(self.INSERT_STATS, (story_id, *text_stats(record, body)))
+                    self.search_index.add(db, story_id, body)
+                    self.duplicate_index.add(db, story_id, body)
+                story_ids.append(story_id)
+                if theme:
+                    added[theme] += 1
+        for theme, count in added.items():
+            # Only a genre's first dictionary is trained mid-batch: retraining every few hundred
+            # stories would dominate a large import, and the next regular save retrains anyway
+            if self.codec.note_added(theme, count) and not self.codec.has_dictionary(theme):
+                self._train(theme)
+        return story_ids
+
+    @contextmanager
+    def bulk_load(self):
+        """Drops the listing indexes and rebuilds each in one pass at the end, instead of updating them per row"""
+        db = self._connection()
+        with db:
+            for (name,) in db.execute(self.SELECT_LISTING_INDEXES).fetchall():
+                db.execute(f"DROP INDEX {name}")
+        try:
+            yield
+        finally:
+            with db:
+                for statement in self.SCHEMA:
+                    if statement.startswith("CREATE INDEX"):
+                        db.execute(statement)
+
+    def build_deferred_indexes(self, batch_size: int = 1000,
+                               map_fn: Callable = map) -> Iterator[Tuple[int, int]]:
+        db = self._connection()
+        total = db.execute("SELECT COUNT(*) FROM unindexed_stories").fetchone()[0]
+        done = 0
+        while True:
+            rows = db.execute(self.SELECT_QUEUED_BODIES, (batch_size,)).fetchall()
+            if not rows:
+                return
+            story_ids = [row[0] for row in rows]
+            entries = list(map_fn(index_terms, [self._decode(row[1]) for row in rows]))
+            with db:
+                self.search_index.add_many(db, [(story_id, terms) for story_id, (terms, _, _) in zip(story_ids, entries)])
+                self.duplicate_index.add_many(db, [
+                    (story_id, signature) for story_id, (_, signature, _) in zip(story_ids, entries)
+                ])
+                db.executemany(self.INSERT_STATS, [
+                    (story_id, *stats) for story_id, (_, _, stats) in zip(story_ids, entries)
+                ])
+                db.executemany(self.DELETE_QUEUED, [(story_id,) for story_id in story_ids])
+            done += len(rows)
+            yield done, total
+
+    def get_story(self, story_id: int) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(self.SELECT_STORY, (story_id,)).fetchone()
+        return self._to_record(row) if row else None
+
+    def get_story_body(self, story_id: int) -> Optional[str]:
+        body = self.body_cache.get(story_id)
+        if body is not None:
+            return body
+        row = self._connection().execute(self.SELECT_BODY, (story_id,)).fetchone()
+        if row is None:
+            return None
+        body = self._decode(row[0])
+        self.body_cache.put(story_id, body)
+        return body
+
+    @staticmethod
+    def _where(theme: Optional[str], favorites_only: bool) -> Tuple[str, List[Any]]:
+        conditions, args = [], []
+        if theme is not None:
+            conditions.append("theme = ?")
+            args.append(theme)
+        if favorites_only:
+            conditions.append("favorite = 1")
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), args
+
+    def list_stories(self, theme: Optional[str] = None, favorites_only: bool = False,
+                     sort_by: str = "Recent", offset: int = 0,
+                     limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        where, args = self._where(theme, favorites_only)
+        query = self.SELECT_COLUMNS + where
+        query += " ORDER BY " + self.ORDER_BY.get(sort_by, self.ORDER_BY["Recent"])
+        query += " LIMIT ? OFFSET ?"
+        args += [-1 if limit is None else limit, offset]
+        return [self._to_record(row) for row in self._connection().execute(query, args)]
+
+    def search_stories(self, query: str, theme: Optional[str] = None,
+                       favorites_only: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
+        where, args = self._where(theme, favorites_only)
+        results = []
+        for story_id, score in self.search_index.search(self._connection(), query, limit, where, args):
+            record = self.get_story(story_id)
+            if record is not None:
+                results.append({**record, "score": score})
+        return results
+
+    def find_near_duplicates(self, body: str, threshold: float) -> List[Tuple[int, float]]:
+        return self.duplicate_index.find(self._connection(), body, threshold)
+
+    def near_duplicate_groups(self, threshold: float) -> List[Dict[str, Any]]:
+        return self.duplicate_index.groups(self._connection(), threshold)
+
+    def count_stories(self, theme: Optional[str] = None, favorites_only: bool = False) -> int:
+        where, args = self._where(theme, favorites_only)
+        return self._connection().execute("SELECT COUNT(*) FROM stories" + where, args).fetchone()[0]
+
+    def delete_story(self, story_id: int):
+        with self._connection() as db:
+            row = db.execute(self.SELECT_BODY, (story_id,)).fetchone()
+            # A story still queued for a deferred build has no search entry to remove
+            if row is not None and not db.execute(self.SELECT_QUEUED, (story_id,)).fetchone():
+                self.search_index.remove(db, story_id, self._decode(row[0]))
+            self.duplicate_index.remove(db, story_id)
+            db.execute(self.DELETE_STORY, (story_id,))
+        self.body_cache.discard(story_id)
+
+    def set_favorite(self, story_id: int, favorite: bool):
+        with self._connection() as db:
+            db.execute(self.UPDATE_FAVORITE, (int(favorite), story_id))
+
+    def is_favorite(self, story_id: int) -> bool:
+        row = self._connection().execute(self.SELECT_FAVORITE, (story_id,)).fetchone()
+        return bool(row and row[0])
+
+    def story_ids(self) -> List[int]:
+        return [row[0] for row in self._connection().execute("SELECT id FROM stories")]
+
+    def analytics_rows(self, story_ids: Collection[int]) -> List[Tuple]:
+        if not story_ids:
+            return []
+        wanted = set(story_ids)
+        # One range read from the lowest id asked for, rather than a lookup per story
+        first = min(wanted)
+        db = self._connection()
+        missing = db.execute(self.SELECT_MISSING_STATS, (first,)).fetchall()
+        if missing:
+            with db:
+                db.executemany(self.INSERT_STATS, [
+                    (story_id, *text_stats({}, self._decode(body))) for story_id, body in missing
+                ])
+        return [tuple(row) for row in db.execute(self.SELECT_ANALYTICS, (first,)) if row[0] in wanted]
+
+    def themes(self) -> List[str]:
+        return [row[0] for row in self._connection().execute("SELECT DISTINCT theme FROM stories ORDER BY theme")]
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM stories").fetchone()[0]
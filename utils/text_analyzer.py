@@ -0,0 +1,133 @@
+import re
+from collections import Counter
+from typing import Dict, Any, List
+
+# Tokenization rules shared by keyword extraction and search
+KEYWORD_PATTERN = re.compile(r'\b[a-zA-Z]{4,}\b')
+COMMON_WORDS = frozenset({
+    'that', 'with', 'have', 'this', 'will', 'they', 'from', 'been', 'said',
+    'each', 'which', 'their', 'time', 'would', 'there', 'could', 'other'
+})
+
+ACTION_PATTERN = re.compile(r'(?<!\S)(?:ran|walked|moved)(?!\S)')
+_NEWLINES = re.compile(r'\n+')
+
+def tokenize_keywords(text: str) -> List[str]:
+    return [word for word in KEYWORD_PATTERN.findall(text.lower()) if word not in COMMON_WORDS]
+
+class StreamingTextAnalyzer:
+    """Computes every story metric in one pass over the text.
+
+    Text can be fed in arbitrary chunks as it streams in; each chunk is
+    scanned once and never revisited. A word split across chunks is held
+    back until its end arrives.
+    """
+
+    def __init__(self):
+        self.word_count = 0
+        self.letter_count = 0
+        self.sentence_marks = 0
+        self.period_count = 0
+        self.quote_count = 0
+        self.action_count = 0
+        self.paragraph_breaks = 0
+        self.keyword_counts = Counter()
+        self._pending_word = ''
+        self._newline_run = 0
+
+    def feed(self, chunk: str):
+        if not chunk:
+            return
+
+        # Single characters can't straddle a chunk boundary
+        periods = chunk.count('.')
+        self.period_count += periods
+        self.sentence_marks += periods + chunk.count('!') + chunk.count('?')
+        self.quote_count += chunk.count('"')
+        self._count_paragraph_breaks(chunk)
+
+        text = self._pending_word + chunk
+        if text[-1].isspace():
+            self._pending_word = ''
+        else:
+            # Hold back the trailing word, it may continue in the next chunk
+            parts = text.rsplit(None, 1)
+            self._pending_word = parts[-1]
+            text = parts[0] if len(parts) == 2 else ''
+        self._count_words(text)
+
+    def _count_paragraph_breaks(self, chunk: str):
+        # Matches str.count('\n\n'): every run of n newlines holds n // 2 breaks
+        carried = self._newline_run
+        self._newline_run = 0
+        if not chunk.startswith('\n'):
+            self.paragraph_breaks += carried // 2
+            carried = 0
+        for match in _NEWLINES.finditer(chunk):
+            length = match.end() - match.start()
+            if match.start() == 0:
+                length += carried
+            if match.end() == len(chunk):
+                self._newline_run = length
+            else:
+                self.paragraph_breaks += length // 2
+
+    def _count_words(self, text: str):
+        if not text:
+            return
+        lower = text.lower()
+        words = lower.split()
+        self.word_count += len(words)
+        self.letter_count += sum(map(len, words))
+        self.action_count += len(ACTION_PATTERN.findall(lower))
+        self.keyword_counts.update(
+            word for word in KEYWORD_PATTERN.findall(lower) if word not in COMMON_WORDS
+        )
+
+    def keywords(self, num_keywords: int = 10) -> List[str]:
+        counts = self.keyword_counts
+        pending = self._pending_word.lower()
+        if pending:
+            counts = counts.copy()
+            counts.update(w for w in KEYWORD_PATTERN.findall(pending) if w not in COMMON_WORDS)
+        return sorted(counts, key=counts.__getitem__, reverse=True)[:num_keywords]
+
+    def snapshot(self, num_keywords: int = 10) -> Dict[str, Any]:
+        """Metrics for everything fed so far, treating a held-back word as complete"""
+        pending = self._pending_word
+        word_count = self.word_count + (1 if pending else 0)
+        letter_count = self.letter_count + len(pending)
+        action_count = self.action_count + len(ACTION_PATTERN.findall(pending.lower()))
+        sentence_count = self.sentence_marks
+        paragraph_count = self.paragraph_breaks + self._newline_run // 2 + 1
+
+        avg_sentence_length = word_count / max(sentence_count, 1)
+        avg_word_length = letter_count / max(word_count, 1)
+
+        if avg_word_length > 5 and avg_sentence_length > 20:
+            difficulty = "Advanced"
+        elif avg_word_length > 4 and avg_sentence_length > 15:
+            difficulty = "Intermediate"
+        else:
+            difficulty = "Easy"
+
+        return {
+            'word_count': word_count,
+            'sentence_count': sentence_count,
+            'paragraph_count': paragraph_count,
+            'avg_sentence_length': avg_sentence_length,
+            'avg_sentences_per_paragraph': sentence_count / max(paragraph_count, 1),
+            'avg_word_length': avg_word_length,
+            'dialogue_count': self.quote_count // 2,
+            'read_time': max(1, word_count // 200),
+            'action_count': action_count,
+            'action_level': 'High' if action_count > 5 else 'Medium' if action_count > 2 else 'Low',
+            'pacing': 'Fast' if word_count / max(self.period_count, 1) < 15 else 'Moderate',
+            'difficulty': difficulty,
+            'keywords': self.keywords(num_keywords)
+        }
+
+def analyze_text(text: str) -> Dict[str, Any]:
+    analyzer = StreamingTextAnalyzer()
+    analyzer.feed(text)
+    return analyzer.snapshot()